@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""Compare two benchmark results files and flag the regressions.
+
+Works with the results of both bench_micro.py and bench_translator.py. A
+benchmark regresses when one of its metrics grows more than the threshold
+percentage compared to the baseline. The script exits with status 1 when
+at least one regression is found, so it can be used in CI.
+
+Usage:
+    $ python benchmarks/bench_diff.py baseline.json new.json [-t 10]
+
+Attributes:
+    METRICS (dict): Metrics to compare for each results section, lower
+        values are better.
+
+"""
+
+from __future__ import unicode_literals
+
+import sys
+import json
+import argparse
+
+METRICS = {
+    "benchmarks": ["time_min", "allocations"],
+    "scenarios": ["elapsed"]
+}
+
+
+def load_results(filename):
+    """Returns dictionary with {(section, name): entry} pairs."""
+    with open(filename) as input_file:
+        results = json.load(input_file)
+
+    entries = {}
+
+    for section in METRICS:
+        for entry in results.get(section, []):
+            entries[(section, entry["name"])] = entry
+
+    return entries
+
+
+def diff(baseline, current, threshold):
+    """Compare the results and return list with the regressions.
+
+    Returns:
+        List with (name, metric, old value, new value, change %) tuples.
+
+    """
+    regressions = []
+
+    for key in sorted(current):
+        section, name = key
+
+        if key not in baseline:
+            print "%-28s new benchmark" % name
+            continue
+
+        for metric in METRICS[section]:
+            old_value = baseline[key].get(metric)
+            new_value = current[key].get(metric)
+
+            if old_value is None or new_value is None:
+                continue
+
+            if old_value:
+                change = (new_value - old_value) / float(old_value) * 100.0
+            else:
+                change = 0.0 if not new_value else float("inf")
+
+            flag = ""
+
+            if change > threshold:
+                flag = "REGRESSION"
+                regressions.append((name, metric, old_value, new_value, change))
+
+            print "%-28s %-12s %14.6g -> %14.6g %+8.1f%% %s" % (name, metric, old_value, new_value, change, flag)
+
+    return regressions
+
+
+def parse_options():
+    parser = argparse.ArgumentParser(description="Compare benchmark results.")
+
+    parser.add_argument("baseline", help="json file with the baseline results")
+    parser.add_argument("current", help="json file with the new results")
+    parser.add_argument("-t", "--threshold", default=10.0, type=float, help="regression threshold percentage (default: %(default)s)")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_options()
+
+    regressions = diff(load_results(args.baseline), load_results(args.current), args.threshold)
+
+    if regressions:
+        print "\n%d regression(s) above %.1f%%" % (len(regressions), args.threshold)
+        sys.exit(1)
+
+    print "\nNo regressions above %.1f%%" % args.threshold
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,413 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""Microbenchmarks for the CPU hot paths of GoogleTranslator.
+
+Each benchmark times a single code path in isolation using the recorded
+replies under the 'replies' directory (short word, long paragraph, CJK and
+emoji text). Next to the timings each benchmark reports the number and the
+size of the gc tracked objects that one call allocates and keeps alive.
+
+Usage:
+    Run all the benchmarks and store the results as a baseline.
+
+        $ python benchmarks/bench_micro.py -o baseline.json
+
+    Run the benchmarks that match 'tk' and flag the regressions.
+
+        $ python benchmarks/bench_micro.py -k tk -o new.json
+        $ python benchmarks/bench_diff.py baseline.json new.json
+
+Attributes:
+    REPLIES_DIR (string): Directory with the recorded replies.
+
+"""
+
+from __future__ import unicode_literals
+
+import io
+import gc
+import os
+import re
+import sys
+import copy
+import json
+import time
+import platform
+import atexit
+import shutil
+import argparse
+import threading
+import tempfile
+import itertools
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google_translate import GoogleTranslator, __version__
+from google_translate.cache import Cache
+from google_translate.sharded_cache import ShardedCache
+from google_translate.sqlite_cache import SqliteCache
+from google_translate.snapshot import Snapshot, write_snapshot
+from google_translate.utils import parse_sparse_json
+from google_translate.tk_generator import get_tk, get_tk_batch, _TL
+
+REPLIES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replies")
+
+_JSON_REPLACE_PATTERN = re.compile(r",(?=,)|\[,+")
+
+
+def regex_string_to_json(data_string):
+    """The regex based reply parser of the older releases, for reference."""
+    def replace_func(mobj):
+        if '[' in mobj.group(0):
+            return '[' + '"",' * mobj.group(0).count(',')
+        return ',""'
+
+    return json.loads(_JSON_REPLACE_PATTERN.sub(replace_func, data_string))
+
+
+def load_replies():
+    """Returns list with (name, reply string) pairs."""
+    replies = []
+
+    for filename in sorted(os.listdir(REPLIES_DIR)):
+        name, extension = os.path.splitext(filename)
+
+        if extension == ".txt":
+            with io.open(os.path.join(REPLIES_DIR, filename), encoding="UTF-8") as reply_file:
+                replies.append((name, reply_file.read()))
+
+    return replies
+
+
+def measure_time(function, repeat, number):
+    """Returns the (min, median) time in seconds of a single function call."""
+    timings = []
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        for _ in xrange(repeat):
+            start = time.time()
+
+            for _ in xrange(number):
+                function()
+
+            timings.append((time.time() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    timings.sort()
+
+    return timings[0], timings[len(timings) // 2]
+
+
+def _count_new_objects(function, number):
+    """Returns the (count, bytes) of the gc tracked objects left by the calls."""
+    gc.collect()
+    gc.disable()
+
+    try:
+        before = set(id(obj) for obj in gc.get_objects())
+        results = [function() for _ in xrange(number)]
+        new_objects = [obj for obj in gc.get_objects() if id(obj) not in before]
+
+        count = len(new_objects)
+        size = 0
+
+        for obj in new_objects:
+            size += sys.getsizeof(obj)
+
+        del new_objects, results
+    finally:
+        gc.enable()
+
+    return count, size
+
+
+def measure_allocations(function, number=10):
+    """Returns the (count, bytes) of the gc tracked objects allocated per call.
+
+    Python 2 has no tracemalloc so the objects created by the calls are
+    found by diffing gc.get_objects. The results are kept alive until the
+    count is taken, temporaries freed during the call are not counted.
+
+    """
+    count, size = _count_new_objects(function, number)
+
+    # Remove the objects of the measurement itself
+    base_count, base_size = _count_new_objects(lambda: None, number)
+
+    return max(count - base_count, 0) / float(number), max(size - base_size, 0) / float(number)
+
+
+def full_cache_add(size, policy):
+    """Returns (function, setup) pair, function adds a new key to a full cache.
+
+    The setup fills the cache, so the large caches are only built when
+    their benchmark runs.
+
+    """
+    state = {}
+
+    def setup():
+        cache = Cache(size, GoogleTranslator.CACHE_VALID_PERIOD, policy)
+
+        for index in xrange(size):
+            cache.add(index, index)
+
+        state["cache"] = cache
+        state["keys"] = itertools.count(size)
+
+    def cache_add():
+        state["cache"].add(next(state["keys"]), None)
+
+    return cache_add, setup
+
+
+def full_cache_remove_old(size):
+    """Returns (function, setup) pair, function calls remove_old on a full cache.
+
+    The setup fills the cache with items that are not old, so remove_old
+    finds nothing to remove.
+
+    """
+    state = {}
+
+    def setup():
+        cache = Cache(size, GoogleTranslator.CACHE_VALID_PERIOD)
+
+        for index in xrange(size):
+            cache.add(index, index)
+
+        state["cache"] = cache
+
+    def remove_old():
+        state["cache"].remove_old()
+
+    return remove_old, setup
+
+
+def threaded_cache_get(cache, threads, number):
+    """Returns function that runs number cache hits on each of the threads."""
+    for index in xrange(cache.max_size):
+        cache.add(index, index)
+
+    def get_items(start):
+        for index in xrange(start, start + number):
+            cache.get(index % cache.max_size)
+
+    def cache_get():
+        workers = [threading.Thread(target=get_items, args=(index * number,)) for index in xrange(threads)]
+
+        for worker in workers:
+            worker.start()
+
+        for worker in workers:
+            worker.join()
+
+    return cache_get
+
+
+def snapshot_file(temp_dir, size, info_dict):
+    """Returns (filename, setup) pair of a snapshot with size items.
+
+    The setup writes the snapshot if it does not exist yet, so the large
+    snapshots are only built when their benchmark runs.
+
+    """
+    filename = os.path.join(temp_dir, "cache-%d.snap" % size)
+
+    def setup():
+        if not os.path.exists(filename):
+            write_snapshot(filename, (("word%d" % index, [info_dict, time.time()]) for index in xrange(size)))
+
+    return filename, setup
+
+
+def build_benchmarks(replies):
+    """Returns list with (name, function, number, setup) tuples.
+
+    The setup is None or a function that prepares the state of the
+    benchmark, it runs once before the timing starts.
+
+    """
+    translator = GoogleTranslator()
+    benchmarks = []
+
+    for name, reply in replies:
+        json_data = translator._string_to_json(reply)
+        info_dict = translator._extract_data(json_data).to_dict()
+        text = info_dict["original_text"]
+
+        # Bypass the TK_MEMO to time the hash itself
+        benchmarks.append(("tk:" + name, lambda text=text: _TL(text.encode("UTF-8")), 200, None))
+        benchmarks.append(("tk_memo:" + name, lambda text=text: get_tk(text), 2000, None))
+        benchmarks.append(("string_to_json:" + name, lambda reply=reply: translator._string_to_json(reply), 500, None))
+        benchmarks.append(("regex_json:" + name, lambda reply=reply: regex_string_to_json(reply), 500, None))
+        benchmarks.append(("parse_sparse_json:" + name, lambda reply=reply: parse_sparse_json(reply), 500, None))
+        benchmarks.append(("extract_data:" + name, lambda json_data=json_data: translator._extract_data(json_data).to_dict(), 2000, None))
+        benchmarks.append(("extract_src_lang:" + name, lambda json_data=json_data: translator._extract_data(json_data)["src_lang"], 2000, None))
+        benchmarks.append(("deepcopy:" + name, lambda info_dict=info_dict: copy.deepcopy(info_dict), 1000, None))
+
+        # Cached lookup of get_info_dict, the record is shared without a copy
+        translator.cache.add(name + "fren", translator._extract_data(json_data))
+        benchmarks.append(("cache_hit:" + name, lambda name=name: translator._get_info(name, "fr", "en"), 5000, None))
+
+    words = ["word%d" % index for index in xrange(1000)]
+
+    benchmarks.append(("tk_loop:%d" % len(words), lambda: [_TL(word.encode("UTF-8")) for word in words], 3, None))
+    benchmarks.append(("tk_batch:%d" % len(words), lambda: get_tk_batch(words), 3, None))
+
+    def cache_add():
+        cache = Cache(GoogleTranslator.MAX_CACHE_SIZE, GoogleTranslator.CACHE_VALID_PERIOD)
+
+        # Twice the size so that half of the additions evict the oldest item
+        for index in xrange(GoogleTranslator.MAX_CACHE_SIZE * 2):
+            cache.add(index, index)
+
+        return cache
+
+    full_cache = Cache(GoogleTranslator.MAX_CACHE_SIZE, GoogleTranslator.CACHE_VALID_PERIOD)
+
+    for index in xrange(GoogleTranslator.MAX_CACHE_SIZE):
+        full_cache.add(index, index)
+
+    benchmarks.append(("cache_add:%d" % (GoogleTranslator.MAX_CACHE_SIZE * 2), cache_add, 3, None))
+    benchmarks.append(("cache_get_oldest:%d" % GoogleTranslator.MAX_CACHE_SIZE, full_cache.get_oldest, 500, None))
+    benchmarks.append(("cache_get:%d" % GoogleTranslator.MAX_CACHE_SIZE, lambda: full_cache.get(1), 20000, None))
+
+    # Single insert into a full cache, the cost must not depend on the size
+    for policy in ("fifo", "lru", "lfu"):
+        for size in (GoogleTranslator.MAX_CACHE_SIZE, 1000000):
+            function, setup = full_cache_add(size, policy)
+            benchmarks.append(("cache_evict:%s:%d" % (policy, size), function, 20000, setup))
+
+    for size in (GoogleTranslator.MAX_CACHE_SIZE, 1000000):
+        function, setup = full_cache_remove_old(size)
+        benchmarks.append(("cache_remove_old:%d" % size, function, 1000, setup))
+
+    # Concurrent hits, the shards must not wait for a global lock
+    size = GoogleTranslator.MAX_CACHE_SIZE
+    benchmarks.append(("cache_get_threads:8", threaded_cache_get(Cache(size, GoogleTranslator.CACHE_VALID_PERIOD, "lru"), 8, 1000), 20, None))
+    benchmarks.append(("sharded_cache_get_threads:8", threaded_cache_get(ShardedCache(size, GoogleTranslator.CACHE_VALID_PERIOD, "lru"), 8, 1000), 20, None))
+
+    temp_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, temp_dir, True)
+
+    sqlite_file = os.path.join(temp_dir, "cache.db")
+    sqlite_cache = SqliteCache(sqlite_file, 100000, GoogleTranslator.CACHE_VALID_PERIOD)
+    sqlite_keys = itertools.count()
+
+    def sqlite_open():
+        SqliteCache(sqlite_file, 100000, GoogleTranslator.CACHE_VALID_PERIOD).close()
+
+    benchmarks.append(("sqlite_add", lambda: sqlite_cache.add(next(sqlite_keys), info_dict), 2000, None))
+    benchmarks.append(("sqlite_get", lambda: sqlite_cache.get(1), 5000, None))
+    benchmarks.append(("sqlite_open", sqlite_open, 200, None))
+
+    # Opening a snapshot must not depend on the number of items
+    snapshots = {}
+
+    for size in (GoogleTranslator.MAX_CACHE_SIZE, 500000):
+        filename, write_file = snapshot_file(temp_dir, size, info_dict)
+
+        def open_snapshot(filename=filename):
+            Snapshot(filename).close()
+
+        def open_for_get(filename=filename, write_file=write_file):
+            write_file()
+            snapshots[filename] = Snapshot(filename)
+
+        def get_from_snapshot(filename=filename):
+            return snapshots[filename].get("word1")
+
+        benchmarks.append(("snapshot_open:%d" % size, open_snapshot, 1000, write_file))
+        benchmarks.append(("snapshot_get:%d" % size, get_from_snapshot, 5000, open_for_get))
+
+    # Saving one new item appends to the journal, the store is not rewritten
+    store_keys = itertools.count()
+    source_filename, write_source = snapshot_file(temp_dir, 500000, info_dict)
+
+    def open_store():
+        write_source()
+
+        store_filename = os.path.join(temp_dir, "store.snap")
+        shutil.copy(source_filename, store_filename)
+
+        snapshots["store"] = Cache(GoogleTranslator.MAX_CACHE_SIZE, GoogleTranslator.CACHE_VALID_PERIOD)
+        snapshots["store"].open_store(store_filename)
+
+    def save_one():
+        snapshots["store"].add(next(store_keys), info_dict)
+        snapshots["store"].save()
+
+    benchmarks.append(("cache_save:1", save_one, 200, open_store))
+
+    return benchmarks
+
+
+def run_benchmark(name, function, number, repeat, setup=None):
+    """Run the given benchmark and return its results dictionary.
+
+    The setup (if any) runs before the timing, so the first round times
+    the function and not the state that it needs.
+
+    """
+    if setup is not None:
+        setup()
+
+    time_min, time_median = measure_time(function, repeat, number)
+    allocations, allocated_bytes = measure_allocations(function)
+
+    return {
+        "name": name,
+        "time_min": time_min,
+        "time_median": time_median,
+        "allocations": allocations,
+        "allocated_bytes": allocated_bytes,
+    }
+
+
+def parse_options():
+    parser = argparse.ArgumentParser(description="GoogleTranslator microbenchmarks.")
+
+    parser.add_argument("-k", "--keyword", action="append", help="run only the benchmarks that contain the keyword")
+    parser.add_argument("-o", "--output", default="bench_micro.json", help="json file to write the results (default: %(default)s)")
+    parser.add_argument("-r", "--repeat", default=5, type=int, help="number of timing rounds (default: %(default)s)")
+    parser.add_argument("-f", "--factor", default=1.0, type=float, help="multiply the calls of each round by this factor")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_options()
+
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "benchmarks": []
+    }
+
+    for name, function, number, setup in build_benchmarks(load_replies()):
+        if args.keyword and not any(keyword in name for keyword in args.keyword):
+            continue
+
+        benchmark = run_benchmark(name, function, max(1, int(number * args.factor)), args.repeat, setup)
+        results["benchmarks"].append(benchmark)
+
+        print "%-28s min %10.2fus  median %10.2fus  %8.1f objects  %10.1f bytes" % (
+            name, benchmark["time_min"] * 1e6, benchmark["time_median"] * 1e6,
+            benchmark["allocations"], benchmark["allocated_bytes"])
+
+    with open(args.output, 'w') as output_file:
+        json.dump(results, output_file, indent=4, sort_keys=True)
+
+    print "Results written to: %s" % args.output
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""End-to-end throughput and latency benchmarks for GoogleTranslator.
+
+The benchmarks drive GoogleTranslator against a local FakeGoogleServer, so
+they need no network access. For each scenario they report the requests per
+second, the p50/p95/p99 request latency, the cache hit ratio and the bytes
+transferred, and write the results to a json file that can be compared with
+the results of another release.
+
+Usage:
+    Run all the scenarios and store the results.
+
+        $ python benchmarks/bench_translator.py -o results.json
+
+    Run a single scenario and compare it with older results.
+
+        $ python benchmarks/bench_translator.py -s large_list --compare old.json
+
+"""
+
+from __future__ import unicode_literals
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google_translate import GoogleTranslator, __version__
+from google_translate.utils import TokenBucket, RetryPolicy, ConnectionPool, quote_unicode, unquote_unicode, split_text, PUNCTUATIONS
+from google_translate.cache import Cache
+from google_translate.transport import LocalTransport
+from google_translate.fake_server import FakeGoogleServer
+
+
+class TimingTransport(LocalTransport):
+
+    """LocalTransport that records the latency of each request."""
+
+    def __init__(self, server_url, pool=None):
+        super(TimingTransport, self).__init__(server_url, pool)
+
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def request(self, url, headers=None, proxy=None, timeout=10.0):
+        start = time.time()
+
+        try:
+            return super(TimingTransport, self).request(url, headers, proxy, timeout)
+        finally:
+            with self._lock:
+                self.latencies.append(time.time() - start)
+
+
+def percentile(values, percent):
+    """Returns the nearest-rank percentile of the given values or None."""
+    if not values:
+        return None
+
+    values = sorted(values)
+    index = max(0, int(round(percent / 100.0 * len(values) + 0.5)) - 1)
+
+    return values[min(index, len(values) - 1)]
+
+
+def make_words(count, prefix="word"):
+    """Returns a list with count distinct words."""
+    return ["{0}{1}".format(prefix, index) for index in range(count)]
+
+
+def make_translator(server, transport, cache_size=None, **kwargs):
+    """Returns a GoogleTranslator that does not throttle the requests."""
+    translator = GoogleTranslator(transport=transport,
+                                  rate_limiter=TokenBucket(1000000.0, 1000000),
+                                  retry_policy=RetryPolicy(retries=3, backoff=0.0, max_backoff=0.0),
+                                  **kwargs)
+
+    if cache_size is not None:
+        translator.cache = Cache(cache_size, GoogleTranslator.CACHE_VALID_PERIOD)
+
+    # Count the hits per distinct word of each call, the translator itself
+    # reads the cache more than once for each word
+    translate = translator.translate
+    counters = {"hits": 0, "misses": 0}
+
+    def counting_translate(word, dst_lang, src_lang="auto", *args, **kwargs):
+        words = set(word) if isinstance(word, list) else set([word])
+
+        for item in words:
+            counters["hits" if translator.cache.has(item + dst_lang + src_lang) else "misses"] += 1
+
+        return translate(word, dst_lang, src_lang, *args, **kwargs)
+
+    translator.translate = counting_translate
+    translator.cache_counters = counters
+
+    return translator
+
+
+def translate_file(translator, lines, dst_lang):
+    """Translate the given lines the same way the command line utility does."""
+    content = quote_unicode('\n'.join(lines))
+    quoted_punctuations = [quote_unicode(char) for char in PUNCTUATIONS]
+
+    chunks = []
+
+    for text in split_text(content, GoogleTranslator.MAX_INPUT_SIZE, quoted_punctuations):
+        chunks.append(translator.translate(unquote_unicode(text), dst_lang))
+
+    return ' '.join(chunk for chunk in chunks if chunk is not None)
+
+
+def single_words(server, transport, size):
+    translator = make_translator(server, transport)
+
+    for word in make_words(size):
+        translator.translate(word, "fr")
+
+    return translator, size
+
+
+def large_list(server, transport, size):
+    translator = make_translator(server, transport)
+    translator.translate(make_words(size), "fr")
+
+    return translator, size
+
+
+def large_list_workers(server, transport, size):
+    translator = make_translator(server, transport, max_workers=16)
+    translator.translate(make_words(size), "fr")
+
+    return translator, size
+
+
+def large_list_batch(server, transport, size):
+    translator = make_translator(server, transport, batch_mode=True)
+    translator.translate(make_words(size), "fr", "en")
+
+    return translator, size
+
+
+def file_translation(server, transport, size):
+    translator = make_translator(server, transport)
+    translate_file(translator, ["This is the line number {0} of the file.".format(index) for index in range(size)], "fr")
+
+    return translator, size
+
+
+SCENARIOS = [
+    ("single_words", single_words, 200),
+    ("large_list", large_list, 1000),
+    ("large_list_workers", large_list_workers, 1000),
+    ("large_list_batch", large_list_batch, 1000),
+    ("file_translation", file_translation, 500),
+    ("cached_rerun", None, 1000),
+]
+
+
+def run_cached_rerun(server, transport, size):
+    """Translate a list twice and measure only the second run."""
+    translator = make_translator(server, transport, cache_size=size)
+
+    words = make_words(size)
+    translator.translate(words, "fr")
+
+    server.reset_stats()
+    del transport.latencies[:]
+    translator.cache_counters.update(hits=0, misses=0)
+
+    start = time.time()
+    translator.translate(words, "fr")
+
+    return translator, size, time.time() - start
+
+
+def run_scenario(name, function, size, latency, keep_alive):
+    """Run the given scenario and return its results dictionary."""
+    with FakeGoogleServer(latency=latency) as server:
+        pool = ConnectionPool(max_size=32) if keep_alive else None
+        transport = TimingTransport(server.url, pool)
+
+        if function is None:
+            translator, words, elapsed = run_cached_rerun(server, transport, size)
+        else:
+            start = time.time()
+            translator, words = function(server, transport, size)
+            elapsed = time.time() - start
+
+        if pool is not None:
+            pool.clear()
+
+        stats = server.stats
+
+    counters = translator.cache_counters
+    lookups = counters["hits"] + counters["misses"]
+
+    to_ms = lambda value: None if value is None else round(value * 1000.0, 3)
+
+    return {
+        "name": name,
+        "words": words,
+        "elapsed": round(elapsed, 6),
+        "requests": stats["requests"],
+        "requests_per_sec": round(stats["requests"] / elapsed, 3) if elapsed else None,
+        "words_per_sec": round(words / elapsed, 3) if elapsed else None,
+        "latency_ms": {
+            "p50": to_ms(percentile(transport.latencies, 50)),
+            "p95": to_ms(percentile(transport.latencies, 95)),
+            "p99": to_ms(percentile(transport.latencies, 99)),
+        },
+        "cache_hit_ratio": round(float(counters["hits"]) / lookups, 4) if lookups else None,
+        "bytes_transferred": stats["bytes_sent"],
+        "status": dict((str(code), count) for code, count in stats["status"].items()),
+    }
+
+
+def compare(results, old_results):
+    """Print the elapsed time difference of each scenario."""
+    old_scenarios = dict((scenario["name"], scenario) for scenario in old_results["scenarios"])
+
+    print "\nComparison with %s (%s)" % (old_results.get("version"), old_results.get("timestamp"))
+
+    for scenario in results["scenarios"]:
+        old_scenario = old_scenarios.get(scenario["name"])
+
+        if old_scenario is None or not old_scenario["elapsed"]:
+            continue
+
+        change = (scenario["elapsed"] - old_scenario["elapsed"]) / old_scenario["elapsed"] * 100.0
+        print "  %-20s %10.4fs -> %10.4fs (%+.1f%%)" % (scenario["name"], old_scenario["elapsed"], scenario["elapsed"], change)
+
+
+def parse_options():
+    parser = argparse.ArgumentParser(description="GoogleTranslator end-to-end benchmarks.")
+
+    parser.add_argument("-s", "--scenario", action="append", choices=[scenario[0] for scenario in SCENARIOS], help="scenario to run (default: all)")
+    parser.add_argument("-o", "--output", default="bench_results.json", help="json file to write the results (default: %(default)s)")
+    parser.add_argument("-l", "--latency", default=0.002, type=float, help="fake server latency in seconds (default: %(default)s)")
+    parser.add_argument("-n", "--size", default=None, type=int, help="number of words of each scenario")
+    parser.add_argument("--keep-alive", action="store_true", help="reuse connections between requests")
+    parser.add_argument("--compare", help="json file with older results to compare with")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_options()
+
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "latency": args.latency,
+        "keep_alive": args.keep_alive,
+        "scenarios": []
+    }
+
+    for name, function, size in SCENARIOS:
+        if args.scenario and name not in args.scenario:
+            continue
+
+        scenario = run_scenario(name, function, args.size or size, args.latency, args.keep_alive)
+        results["scenarios"].append(scenario)
+
+        print "%-20s %6s words %7.3fs %9.1f req/s  p50=%sms p95=%sms p99=%sms  hit=%s  %s bytes" % (
+            name, scenario["words"], scenario["elapsed"], scenario["requests_per_sec"] or 0,
+            scenario["latency_ms"]["p50"], scenario["latency_ms"]["p95"], scenario["latency_ms"]["p99"],
+            scenario["cache_hit_ratio"], scenario["bytes_transferred"])
+
+    with open(args.output, 'w') as output_file:
+        json.dump(results, output_file, indent=4, sort_keys=True)
+
+    print "Results written to: %s" % args.output
+
+    if args.compare:
+        with open(args.compare) as input_file:
+            compare(results, json.load(input_file))
+
+
+if __name__ == '__main__':
+    main()
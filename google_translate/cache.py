@@ -1,25 +1,214 @@
 #!/usr/bin/env python
 # -*- coding: UTF-8 -*-
 
-"""Module that contains the cache object."""
+"""Module that contains the cache object.
+
+Eviction policies:
+    FIFOPolicy, LRUPolicy, LFUPolicy
+
+Attributes:
+    POLICIES (dict): Maps the policy names that the Cache accepts to the
+        policy classes.
+
+"""
 
 from __future__ import unicode_literals
 
+import os
 import time
+import heapq
+import weakref
 import logging
+import threading
+
+from collections import OrderedDict
 
+from .snapshot import (
+    JOURNAL_SUFFIX,
+    Snapshot,
+    write_snapshot,
+    append_journal,
+    read_journal,
+    lock_file
+)
+from .records import (
+    freeze,
+    to_plain
+)
 from .utils import (
     write_dict,
     get_dict
 )
 
 
+class EvictionPolicy(object):
+
+    """Base class of the cache eviction policies.
+
+    A policy tracks the keys of the cache and decides which key the cache
+    removes when it runs out of space. All the methods must run in O(1).
+
+    """
+
+    def insert(self, key):
+        """Track the given key, called when the key is added or replaced."""
+        raise NotImplementedError()
+
+    def touch(self, key):
+        """Called when the given key is found in the cache."""
+        raise NotImplementedError()
+
+    def remove(self, key):
+        """Stop tracking the given key, unknown keys are ignored."""
+        raise NotImplementedError()
+
+    def peek(self):
+        """Returns the key to evict next or None if there are no keys."""
+        raise NotImplementedError()
+
+    def clear(self):
+        """Stop tracking all the keys."""
+        raise NotImplementedError()
+
+
+class FIFOPolicy(EvictionPolicy):
+
+    """Evict the key that was added (or replaced) first."""
+
+    def __init__(self):
+        self._keys = OrderedDict()
+
+    def insert(self, key):
+        self._keys.pop(key, None)
+        self._keys[key] = None
+
+    def touch(self, key):
+        pass
+
+    def remove(self, key):
+        self._keys.pop(key, None)
+
+    def peek(self):
+        return next(iter(self._keys), None)
+
+    def clear(self):
+        self._keys.clear()
+
+
+class LRUPolicy(FIFOPolicy):
+
+    """Evict the least recently used key."""
+
+    def touch(self, key):
+        if key in self._keys:
+            del self._keys[key]
+            self._keys[key] = None
+
+
+class LFUPolicy(EvictionPolicy):
+
+    """Evict the least frequently used key.
+
+    Keys with the same use count are evicted in FIFO order. Each use count
+    has its own ordered bucket of keys, so all the operations are O(1).
+
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._buckets = {}
+        self._min_count = 0
+
+    def insert(self, key):
+        if key in self._counts:
+            self.touch(key)
+            return
+
+        self._counts[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_count = 1
+
+    def touch(self, key):
+        count = self._counts.get(key)
+
+        if count is None:
+            return
+
+        self._remove_from_bucket(key, count)
+
+        self._counts[key] = count + 1
+        self._buckets.setdefault(count + 1, OrderedDict())[key] = None
+
+        if self._min_count not in self._buckets:
+            self._min_count = count + 1
+
+    def remove(self, key):
+        count = self._counts.pop(key, None)
+
+        if count is not None:
+            self._remove_from_bucket(key, count)
+
+    def peek(self):
+        if not self._counts:
+            return None
+
+        if self._min_count not in self._buckets:
+            # Only after the removal of the last key with the minimum count
+            self._min_count = min(self._buckets)
+
+        return next(iter(self._buckets[self._min_count]))
+
+    def clear(self):
+        self._counts.clear()
+        self._buckets.clear()
+        self._min_count = 0
+
+    def _remove_from_bucket(self, key, count):
+        bucket = self._buckets[count]
+        del bucket[key]
+
+        if not bucket:
+            del self._buckets[count]
+
+
+POLICIES = {
+    "fifo": FIFOPolicy,
+    "lru": LRUPolicy,
+    "lfu": LFUPolicy
+}
+
+
+def store_items(filename, items):
+    """Store the (key, [obj, timestamp]) pairs to the given filename.
+
+    Returns:
+        True on success else False.
+
+    """
+    return write_dict(filename, dict((key, [to_plain(obj), timestamp]) for key, (obj, timestamp) in items))
+
+
 class Cache(object):
 
     """Store objects for a period of time.
 
     Cache like object that uses a dictionary to store multiple objects for a
     period of time. This cache can also be stored in a json file for later use.
+    When the cache is full the eviction policy picks the item to remove in
+    O(1) time. The cache methods are thread safe.
+
+    The expiry times live in a min-heap, so each add removes a few expired
+    items in O(log n) and remove_old only visits the expired items. An
+    optional reaper thread calls remove_old periodically.
+
+    A snapshot file (see the snapshot module) can back the cache. The cache
+    looks up the keys it misses in the memory mapped snapshot and decodes
+    only the items it finds. With open_store the cache also tracks the items
+    added since the last save, save appends only those to the journal of
+    the snapshot and folds the journal into the snapshot once it grows.
+
+    The items decoded from a file, a snapshot or a journal are frozen (see
+    records.freeze), so the callers can share them without a copy.
 
     Examples:
         Simple use case::
@@ -36,6 +225,18 @@ class Cache(object):
             >>> new_cache.load('mycache')  # Load items from 'mycache' file
             >>> new_cache.remove_old()     # Remove all the old items
 
+            >>> lru_cache = Cache(100, 3600.0, policy='lru')
+
+            >>> reaped_cache = Cache(100, 3600.0, reap_interval=60.0)
+            >>> reaped_cache.stop_reaper()
+
+            >>> cache.open_snapshot('mycache.snap')
+            >>> cache.store_snapshot('mycache.snap')
+
+            >>> cache.open_store('mycache.snap')
+            >>> cache.add('key', 'value')
+            >>> cache.save()               # Append 'key' to the journal
+
     Attributes:
         _VALUE (int): Static number(index) that points to the value part of
             the cache item.
@@ -43,6 +244,15 @@ class Cache(object):
         _TIMESTAMP (int): Static number(index) that points to the timestamp
             part of the cache item.
 
+        _EXPIRE_BATCH (int): Maximum number of expired items that each add
+            removes.
+
+        _COMPACT_MIN_SIZE (int): Minimum journal size in bytes that triggers
+            a compaction.
+
+        _COMPACT_RATIO (float): Compact when the journal grows larger than
+            this fraction of the snapshot size.
+
     Args:
         max_size (int): Maximum number of items that the cache can store. The
             cache automatically removes the oldest item when it reaches
@@ -51,12 +261,26 @@ class Cache(object):
         valid_period (float): Time in seconds that the cache items are valid.
             This value can be changed after the object initialization.
 
+        policy (string - EvictionPolicy): Name of the eviction policy, one of
+            'fifo', 'lru', 'lfu' or an EvictionPolicy object (default: fifo).
+
+        reap_interval (float): If set, start a reaper thread that removes the
+            old items every reap_interval seconds (default: None).
+
+    Raises:
+        TypeError, ValueError
+
     """
 
     _VALUE = 0
     _TIMESTAMP = 1
 
-    def __init__(self, max_size, valid_period):
+    _EXPIRE_BATCH = 8
+
+    _COMPACT_MIN_SIZE = 256 * 1024
+    _COMPACT_RATIO = 0.25
+
+    def __init__(self, max_size, valid_period, policy="fifo", reap_interval=None):
         if not isinstance(max_size, int):
             raise TypeError(max_size)
 
@@ -69,13 +293,39 @@ class Cache(object):
         if valid_period <= 0.0:
             raise ValueError(valid_period)
 
+        if isinstance(policy, basestring):
+            if policy not in POLICIES:
+                raise ValueError(policy)
+
+            policy = POLICIES[policy]()
+
+        if not isinstance(policy, EvictionPolicy):
+            raise TypeError(policy)
+
         self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
         self._valid_period = valid_period
         self._max_size = max_size
+        self._policy = policy
+        self._lock = threading.RLock()
         self._items = {}
 
+        # (timestamp, key) pairs, entries of replaced or removed items are
+        # skipped when they reach the top
+        self._expiry_heap = []
+        self._reaper = None
+        self._snapshot = None
+
+        # Items of the journal and the keys added since the last save
+        self._journal = {}
+        self._dirty = set()
+        self._journal_torn = False
+        self._store_filename = None
+
         self.logger.debug("Cache initiated max_size: (%s), valid_period: (%s)", max_size, valid_period)
 
+        if reap_interval is not None:
+            self.start_reaper(reap_interval)
+
     @property
     def max_size(self):
         return self._max_size
@@ -100,25 +350,17 @@ class Cache(object):
         return len(self._items) < self._max_size
 
     def has(self, key):
-        """Returns True if the key is in the cache else False."""
-        return key in self._items
-
-    def get_oldest(self):
-        """Returns the oldest key in the cache if one exists else None."""
-        min_timestamp = None
-        min_key = None
-
-        for key in self._items:
-            if min_timestamp is None:
-                min_timestamp = self._items[key][self._TIMESTAMP]
-                min_key = key
-                continue
+        """Returns True if the key is in the cache or its store else False."""
+        if key in self._items or key in self._journal:
+            return True
 
-            if self._items[key][self._TIMESTAMP] < min_timestamp:
-                min_timestamp = self._items[key][self._TIMESTAMP]
-                min_key = key
+        snapshot = self._snapshot
+        return snapshot is not None and key in snapshot
 
-        return min_key
+    def get_oldest(self):
+        """Returns the key that the eviction policy removes next if one exists else None."""
+        with self._lock:
+            return self._policy.peek()
 
     def add(self, key, obj):
         """Add new item to the cache.
@@ -134,22 +376,47 @@ class Cache(object):
         """
         self.logger.debug("Adding new item to cache, key: %r", key)
 
-        # If key not in cache and the cache is out of space
-        if not key in self._items and len(self._items) == self._max_size:
-            self.logger.warning("Cache out of limit")
-            oldest = self.get_oldest()
+        with self._lock:
+            self.insert(key, obj, time.time())
+            self._dirty.add(key)
+
+    def insert(self, key, obj, timestamp):
+        """Add new item with the given timestamp to the cache.
+
+        Works like add but keeps the timestamp of an item that was stored
+        earlier (e.g. loaded from a file), so the item expires on time. The
+        item is not written to the journal of the cache store.
+
+        Args:
+            key (hashable type): Key under which the obj will be stored.
+
+            obj (object): Object to store in the cache.
+
+            timestamp (float): Time in seconds since the epoch that the item
+                was added.
+
+        """
+        with self._lock:
+            self._expire(timestamp, self._EXPIRE_BATCH)
 
-            del self._items[oldest]
-            self.logger.debug("Key removed: %r", oldest)
+            # If key not in cache and the cache is out of space
+            if not key in self._items and len(self._items) >= self._max_size:
+                self.logger.debug("Cache out of limit")
+                oldest = self.get_oldest()
 
-        self._items[key] = [obj, time.time()]
+                self._remove_item(oldest)
+                self.logger.debug("Key removed: %r", oldest)
+
+            self._items[key] = [obj, timestamp]
+            self._policy.insert(key)
+            self._push_expiry(timestamp, key)
 
     def get(self, key):
         """Get item from the cache.
 
         Returns the item corresponding to the given key if the given key exists
         else None. Note that if the timestamp of the item is old then it will
-        return None even if the key exists.
+        return None and remove the item.
 
         Args:
             key (hashable type): Key to search for.
@@ -157,9 +424,17 @@ class Cache(object):
         """
         self.logger.debug("Searching cache for key: %r", key)
 
-        if key in self._items and self._valid_timestamp(key):
-            self.logger.info("Item found in cache")
-            return self._items[key][self._VALUE]
+        with self._lock:
+            if key in self._items:
+                if self._valid_timestamp(key):
+                    self.logger.info("Item found in cache")
+                    self._policy.touch(key)
+                    return self._items[key][self._VALUE]
+
+                self._remove_item(key)
+
+        if self._snapshot is not None or self._journal:
+            return self._get_from_store(key)
 
         self.logger.info("Item not in cache")
         return None
@@ -172,12 +447,9 @@ class Cache(object):
 
         """
         self.logger.info("Removing old items from cache")
-        items_removed = 0
 
-        for key in self._items.keys():
-            if not self._valid_timestamp(key):
-                del self._items[key]
-                items_removed += 1
+        with self._lock:
+            items_removed = self._expire(time.time())
 
         self.logger.debug("Items removed: (%s)", items_removed)
         return items_removed
@@ -190,7 +462,11 @@ class Cache(object):
 
         """
         self.logger.debug("Saving cache state to: %r", filename)
-        return write_dict(filename, self._items)
+
+        with self._lock:
+            cache_items = self._items.items()
+
+        return store_items(filename, cache_items)
 
     def load(self, filename):
         """Load the cache content from the given filename.
@@ -199,7 +475,8 @@ class Cache(object):
             True on success else False.
 
         Note:
-            The cache stops adding new items when it reaches the max_size.
+            When the file contains more items than the cache has space for,
+            only the newest items are loaded.
 
         """
         self.logger.debug("Retrieving cache state from: %r", filename)
@@ -209,12 +486,237 @@ class Cache(object):
         if loaded_items is None:
             return False
 
-        for key in loaded_items:
-            if len(self._items) == self.max_size:
+        # Oldest first so that the eviction order follows the timestamps
+        loaded_items = sorted(loaded_items.items(), key=lambda item: item[1][self._TIMESTAMP])
+
+        with self._lock:
+            free_space = self._max_size - len(self._items)
+
+            if len(loaded_items) > free_space:
                 self.logger.warning("Cache reached max size while loading content")
-                break
+                loaded_items = loaded_items[len(loaded_items) - free_space:] if free_space > 0 else []
 
-            self._items[key] = loaded_items[key]
+            for key, (obj, timestamp) in loaded_items:
+                self._items[key] = [freeze(obj), timestamp]
+                self._policy.insert(key)
+
+            self._rebuild_expiry_heap()
+
+        return True
+
+    def start_reaper(self, interval):
+        """Start a daemon thread that calls remove_old every interval seconds.
+
+        The thread holds only a weak reference to the cache and stops when
+        the cache is garbage collected.
+
+        Raises:
+            ValueError
+
+        """
+        if interval <= 0.0:
+            raise ValueError(interval)
+
+        self.stop_reaper()
+
+        stop_event = threading.Event()
+        cache_ref = weakref.ref(self)
+
+        def reap():
+            while not stop_event.wait(interval):
+                cache = cache_ref()
+
+                if cache is None:
+                    break
+
+                cache.remove_old()
+                del cache
+
+        self._reaper = (threading.Thread(target=reap, name="CacheReaper"), stop_event)
+        self._reaper[0].daemon = True
+        self._reaper[0].start()
+
+        self.logger.debug("Reaper started, interval: (%s)", interval)
+
+    def stop_reaper(self):
+        """Stop the reaper thread if one is running."""
+        if self._reaper is None:
+            return
+
+        thread, stop_event = self._reaper
+        self._reaper = None
+
+        stop_event.set()
+
+        if thread is not threading.current_thread():
+            thread.join()
+
+        self.logger.debug("Reaper stopped")
+
+    def open_snapshot(self, filename):
+        """Use the given snapshot file as the backing store of the cache.
+
+        The snapshot replaces the one that is already open, if any.
+
+        Returns:
+            True on success else False.
+
+        """
+        self.logger.debug("Opening cache snapshot: %r", filename)
+
+        try:
+            snapshot = Snapshot(filename)
+        except (IOError, OSError, ValueError) as error:
+            self.logger.debug("Could not open snapshot: %s", error)
+            return False
+
+        with self._lock:
+            old_snapshot, self._snapshot = self._snapshot, snapshot
+
+        if old_snapshot is not None:
+            old_snapshot.close()
+
+        self.logger.debug("Snapshot items: (%s)", len(snapshot))
+        return True
+
+    def store_snapshot(self, filename):
+        """Store the cache to the given snapshot file.
+
+        The snapshot contains the cache items and the valid items of the open
+        snapshot. The items of the open snapshot are copied without decoding.
+
+        Returns:
+            True on success else False.
+
+        """
+        self.logger.debug("Saving cache snapshot to: %r", filename)
+
+        deadline = time.time() - self._valid_period
+
+        with self._lock:
+            cache_keys = set(self._items)
+            cache_items = [(key, item) for key, item in self._items.iteritems() if item[self._TIMESTAMP] >= deadline]
+            journal = self._journal
+            snapshot = self._snapshot
+
+        def snapshot_items():
+            for key, item in cache_items:
+                yield key, item
+
+            for key, raw_item in journal.iteritems():
+                if raw_item.timestamp >= deadline and key not in cache_keys:
+                    yield key, raw_item
+
+            if snapshot is not None:
+                for key, raw_item in snapshot.raw_items():
+                    if raw_item.timestamp >= deadline and key not in cache_keys and key not in journal:
+                        yield key, raw_item
+
+        try:
+            write_snapshot(filename, snapshot_items())
+        except (IOError, OSError) as error:
+            self.logger.error("Could not store snapshot: %s", error)
+            return False
+
+        return True
+
+    def open_store(self, filename):
+        """Use the given snapshot file and its journal as the store of the cache.
+
+        Opens the snapshot (see open_snapshot) and reads the journal. After
+        that, save persists the items added to the cache.
+
+        Returns:
+            True if the store already contains items else False.
+
+        """
+        self.logger.debug("Opening cache store: %r", filename)
+
+        try:
+            # The shared lock keeps a compaction from running in between
+            with lock_file(filename + JOURNAL_SUFFIX, exclusive=False) as journal_file:
+                journal, journal_size = read_journal(journal_file)
+                journal_torn = journal_size < os.fstat(journal_file.fileno()).st_size
+                found = self.open_snapshot(filename)
+        except (IOError, OSError) as error:
+            self.logger.error("Could not open cache store: %s", error)
+            return False
+
+        with self._lock:
+            self._journal = journal
+            self._journal_torn = journal_torn
+            self._store_filename = filename
+
+        self.logger.debug("Journal items: (%s)", len(journal))
+        return found or len(journal) > 0
+
+    def save(self):
+        """Save the items added since the last save to the store.
+
+        The items are appended to the journal with a single write. When the
+        journal grows past the compaction limits it's folded into the
+        snapshot. Items that were removed from the cache before the save
+        are not saved.
+
+        Returns:
+            True on success else False.
+
+        """
+        if self._store_filename is None:
+            self.logger.error("No cache store, call open_store first")
+            return False
+
+        with self._lock:
+            items = [(key, self._items[key]) for key in self._dirty]
+            self._dirty.clear()
+
+        self.logger.debug("Saving cache items: (%s)", len(items))
+
+        if not items:
+            return True
+
+        try:
+            with lock_file(self._store_filename + JOURNAL_SUFFIX) as journal_file:
+                if self._journal_torn:
+                    self.logger.warning("Truncating torn journal record")
+                    journal_file.truncate(read_journal(journal_file)[1])
+                    self._journal_torn = False
+
+                records = append_journal(journal_file, items)
+
+                with self._lock:
+                    for (key, _), (_, raw_item) in zip(items, records):
+                        self._journal[key] = raw_item
+
+                if self._needs_compaction(os.fstat(journal_file.fileno()).st_size):
+                    self._compact(journal_file)
+        except (IOError, OSError) as error:
+            self.logger.error("Could not save cache items: %s", error)
+
+            with self._lock:
+                self._dirty.update(key for key, _ in items if key in self._items)
+
+            return False
+
+        return True
+
+    def compact(self):
+        """Fold the journal into the snapshot of the store.
+
+        Returns:
+            True on success else False.
+
+        """
+        if self._store_filename is None:
+            self.logger.error("No cache store, call open_store first")
+            return False
+
+        try:
+            with lock_file(self._store_filename + JOURNAL_SUFFIX) as journal_file:
+                self._compact(journal_file)
+        except (IOError, OSError) as error:
+            self.logger.error("Could not compact cache store: %s", error)
+            return False
 
         return True
 
@@ -222,6 +724,106 @@ class Cache(object):
         """Returns list with (key, [obj, timestamp]) pairs."""
         return self._items.items()
 
+    def _get_from_store(self, key):
+        """Get item from the journal or the snapshot and move it into the cache."""
+        raw_item = self._journal.get(key)
+        snapshot = self._snapshot
+
+        if raw_item is None and snapshot is not None:
+            raw_item = snapshot.get_raw(key)
+
+        if raw_item is None or time.time() - raw_item.timestamp > self._valid_period:
+            self.logger.info("Item not in cache")
+            return None
+
+        self.logger.info("Item found in cache store")
+        obj = freeze(raw_item.decode()[self._VALUE])
+
+        # Keep the original timestamp so the item expires on time
+        self.insert(key, obj, raw_item.timestamp)
+        return obj
+
+    def _expire(self, now, limit=None):
+        """Remove up to limit expired items, returns the number removed."""
+        heap = self._expiry_heap
+        deadline = now - self._valid_period
+        items_removed = 0
+
+        while heap and heap[0][0] < deadline:
+            if limit is not None and items_removed >= limit:
+                break
+
+            timestamp, key = heapq.heappop(heap)
+            item = self._items.get(key)
+
+            # Skip the entries of replaced or removed items
+            if item is not None and item[self._TIMESTAMP] == timestamp:
+                self._remove_item(key)
+                items_removed += 1
+
+        return items_removed
+
+    def _remove_item(self, key):
+        self._items.pop(key, None)
+        self._policy.remove(key)
+        self._dirty.discard(key)
+
+    def _needs_compaction(self, journal_size):
+        try:
+            snapshot_size = os.path.getsize(self._store_filename)
+        except OSError:
+            snapshot_size = 0
+
+        return journal_size >= self._COMPACT_MIN_SIZE and journal_size >= snapshot_size * self._COMPACT_RATIO
+
+    def _compact(self, journal_file):
+        """Fold the journal into the snapshot, the journal_file must be locked."""
+        self.logger.info("Compacting cache store: %r", self._store_filename)
+
+        # Other processes might have appended items or compacted the store
+        journal = read_journal(journal_file)[0]
+        deadline = time.time() - self._valid_period
+
+        try:
+            snapshot = Snapshot(self._store_filename)
+        except (IOError, OSError, ValueError):
+            snapshot = None
+
+        def store_items():
+            for key, raw_item in journal.iteritems():
+                if raw_item.timestamp >= deadline:
+                    yield key, raw_item
+
+            if snapshot is not None:
+                for key, raw_item in snapshot.raw_items():
+                    if raw_item.timestamp >= deadline and key not in journal:
+                        yield key, raw_item
+
+        try:
+            write_snapshot(self._store_filename, store_items())
+        finally:
+            if snapshot is not None:
+                snapshot.close()
+
+        journal_file.truncate(0)
+
+        with self._lock:
+            self._journal = {}
+            self._journal_torn = False
+
+        self.open_snapshot(self._store_filename)
+
+    def _push_expiry(self, timestamp, key):
+        heapq.heappush(self._expiry_heap, (timestamp, key))
+
+        # Drop the skipped entries when they outnumber the items
+        if len(self._expiry_heap) > 2 * len(self._items) + self._EXPIRE_BATCH:
+            self._rebuild_expiry_heap()
+
+    def _rebuild_expiry_heap(self):
+        self._expiry_heap = [(item[self._TIMESTAMP], key) for key, item in self._items.iteritems()]
+        heapq.heapify(self._expiry_heap)
+
     def _valid_timestamp(self, key):
         """Returns True if the given key has a valid timestamp else False."""
         return time.time() - self._items[key][self._TIMESTAMP] <= self._valid_period
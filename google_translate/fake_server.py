@@ -0,0 +1,354 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""Contains a local fake Google translate server.
+
+The FakeGoogleServer runs in the background of the current process and
+serves replies in the 'translate_a/single' format, so the translators can be
+load tested without network access. The server can also simulate slow
+replies, server errors and bursts of '429 Too Many Requests' replies.
+
+Usage:
+    Call this python script from the command line to start a server.
+
+        $ python -m google_translate.fake_server [port]
+
+    Use this module from another python script.
+
+        >>> from google_translate import GoogleTranslator
+        >>> from google_translate.fake_server import FakeGoogleServer
+
+        >>> with FakeGoogleServer(latency=0.05, error_rate=0.1) as server:
+        ...     translator = GoogleTranslator(transport=server.get_transport())
+        ...     translator.translate(["dog", "cat"], "fr")
+
+Attributes:
+    TRANSLATE_PATH (string): Path of the translate API.
+
+    USERAGENTS_PATH (string): Path of the user-agents page, see
+        selectors.UserAgentSelector.HTTP_URL.
+
+"""
+
+from __future__ import unicode_literals
+
+import sys
+import json
+import time
+import random
+import socket
+import logging
+import urlparse
+import threading
+
+from SocketServer import ThreadingMixIn
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+from .transport import LocalTransport
+
+TRANSLATE_PATH = "/translate_a/single"
+
+USERAGENTS_PATH = "/2012/01/03/most-common-user-agents/"
+
+
+class FakeGoogleServer(object):
+
+    """Local HTTP server that imitates Google translate.
+
+    The fake translation of each text segment is the segment prefixed with
+    the destination language code (e.g. 'fr:dog'). Single words also get an
+    additional 'nouns' translation. The text is split into segments on the
+    newline character just like Google does, so batch requests work too.
+
+    Args:
+        host (string): Address to bind (default: 127.0.0.1).
+
+        port (int): Port to bind, 0 picks a free port (default: 0).
+
+        latency (float - tuple): Delay in seconds before each reply or a
+            (min, max) tuple for a random delay (default: 0.0).
+
+        error_rate (float): Probability of a '500 Internal Server Error'
+            reply (default: 0.0).
+
+        burst_every (int): Number of successful requests after which a burst
+            of 429 replies starts, 0 disables the bursts (default: 0).
+
+        burst_length (int): Number of 429 replies in each burst (default: 0).
+
+        retry_after (int): 'Retry-After' header value of the 429 replies
+            (default: 1).
+
+        useragents (list<string>): User-agents to serve on the USERAGENTS_PATH.
+
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0,
+                 burst_every=0, burst_length=0, retry_after=1, useragents=None):
+        self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+
+        self.latency = latency
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.useragents = useragents or ["Mozilla/5.0 (X11; Linux x86_64)", "Mozilla/5.0 (Windows NT 10.0)"]
+
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._thread = None
+        self._counter = 0
+
+        self._server = _ThreadingHTTPServer((host, port), _FakeGoogleHandler)
+        self._server.fake_google = self
+
+        self.reset_stats()
+
+    @property
+    def url(self):
+        """Base url of the server."""
+        return "http://{0}:{1}".format(*self._server.server_address)
+
+    @property
+    def stats(self):
+        """Dictionary with the requests, replies per status and bytes sent."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["status"] = dict(self._stats["status"])
+
+        return stats
+
+    def reset_stats(self):
+        """Reset the server statistics."""
+        with self._lock:
+            self._counter = 0
+            self._stats = {"requests": 0, "bytes_sent": 0, "status": {}}
+
+    def get_transport(self, pool=None):
+        """Returns a transport.LocalTransport that targets this server."""
+        return LocalTransport(self.url, pool)
+
+    def start(self):
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+
+        self.logger.info("Fake server listening on: %s", self.url)
+
+    def stop(self):
+        """Stop the server, close the open connections and release the socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+
+        self._server.close_connections()
+        self._server.server_close()
+
+    def handle(self, handler):
+        """Handle a GET request of the given request handler."""
+        url_parts = urlparse.urlsplit(handler.path)
+        params = urlparse.parse_qs(url_parts.query)
+
+        with self._lock:
+            self._counter += 1
+            self._stats["requests"] += 1
+
+            counter = self._counter
+
+        headers = {}
+
+        if url_parts.path == USERAGENTS_PATH:
+            status, body = 200, self.build_useragents_page()
+        elif url_parts.path != TRANSLATE_PATH or "q" not in params:
+            status, body = 404, b""
+        elif self._in_burst(counter):
+            status, body = 429, b""
+            headers["Retry-After"] = str(self.retry_after)
+        elif self.error_rate and random.random() < self.error_rate:
+            status, body = 500, b""
+        else:
+            text = params["q"][0].decode("utf-8")
+            src_lang = params.get("sl", ["auto"])[0]
+            dst_lang = params.get("tl", ["en"])[0]
+
+            status = 200
+            body = dump_sparse_json(self.build_reply(text, dst_lang, src_lang)).encode("utf-8")
+
+        self._sleep()
+
+        with self._lock:
+            self._stats["bytes_sent"] += len(body)
+            self._stats["status"][status] = self._stats["status"].get(status, 0) + 1
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json; charset=UTF-8")
+        handler.send_header("Content-Length", str(len(body)))
+
+        for name, value in headers.items():
+            handler.send_header(name, value)
+
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def build_reply(self, text, dst_lang, src_lang):
+        """Build the reply in the 'translate_a/single' format.
+
+        Returns:
+            Python list ready to be encoded with dump_sparse_json.
+
+        """
+        if src_lang == "auto":
+            src_lang = "en"
+
+        segments = []
+
+        for line in text.splitlines(True):
+            end = "\n" if line.endswith("\n") else ""
+            segments.append(["{0}:{1}{2}".format(dst_lang, line.rstrip("\n"), end), line, None, None, 3])
+
+        translation = ''.join(segment[0] for segment in segments)
+
+        segments.append([None, None, translation, None])
+
+        extra = None
+
+        if text and ' ' not in text and '\n' not in text:
+            extra = [["noun", [segments[0][0]], [[segments[0][0], [text], None, 0.5]], text, 1]]
+
+        return [segments, extra, src_lang, None, None, None, 1, None, [[src_lang], None, [1], [src_lang]]]
+
+    def build_useragents_page(self):
+        """Build a page similar to the one UserAgentSelector parses."""
+        return "<html><textarea rows='10'>{0}\n</textarea></html>".format('\n'.join(self.useragents)).encode("utf-8")
+
+    def _in_burst(self, counter):
+        """Returns True if the request number counter falls in a 429 burst."""
+        if not self.burst_every or not self.burst_length:
+            return False
+
+        return (counter - 1) % (self.burst_every + self.burst_length) >= self.burst_every
+
+    def _sleep(self):
+        """Wait for the configured latency."""
+        latency = self.latency
+
+        if isinstance(latency, tuple):
+            latency = random.uniform(*latency)
+
+        if latency > 0:
+            time.sleep(latency)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def dump_sparse_json(value):
+    """Encode the value in the sparse JSON format of the Google replies.
+
+    The None items of the arrays are elided just like Google does (e.g.
+    [["a", "b", None, None, 3], None, "en"] becomes '[["a","b",,,3],,"en"]')
+    and the trailing None items are dropped. This is the reverse of the
+    utils.parse_sparse_json function.
+
+    Args:
+        value: Lists, strings, numbers and booleans.
+
+    Returns:
+        Unicode string.
+
+    """
+    if isinstance(value, (list, tuple)):
+        items = list(value)
+
+        while items and items[-1] is None:
+            items.pop()
+
+        return "[" + ",".join("" if item is None else dump_sparse_json(item) for item in items) + "]"
+
+    return json.dumps(value, ensure_ascii=False)
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+
+    """HTTPServer that handles each connection in a new thread."""
+
+    daemon_threads = True
+
+    # Avoid the connection backlog under concurrent load tests
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class):
+        HTTPServer.__init__(self, server_address, handler_class)
+
+        self._connections_lock = threading.Lock()
+        self._connections = {}
+
+    def process_request(self, request, client_address):
+        thread = threading.Thread(target=self.process_request_thread, args=(request, client_address))
+        thread.daemon = self.daemon_threads
+
+        with self._connections_lock:
+            self._connections[request] = thread
+
+        thread.start()
+
+    def shutdown_request(self, request):
+        with self._connections_lock:
+            self._connections.pop(request, None)
+
+        HTTPServer.shutdown_request(self, request)
+
+    def close_connections(self, timeout=1.0):
+        """Shut down the keep-alive connections and wait for their threads."""
+        with self._connections_lock:
+            connections = self._connections.items()
+
+        for request, _ in connections:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+        for _, thread in connections:
+            thread.join(timeout)
+
+    def handle_error(self, request, client_address):
+        # Clients are free to drop their keep-alive connections
+        pass
+
+
+class _FakeGoogleHandler(BaseHTTPRequestHandler):
+
+    """Request handler that delegates the work to the FakeGoogleServer."""
+
+    protocol_version = "HTTP/1.1"
+
+    # The headers are written one by one, avoid the delayed ACK stalls
+    # on the keep-alive connections
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.server.fake_google.handle(self)
+
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    fake_server = FakeGoogleServer(port=int(sys.argv[1]) if len(sys.argv) > 1 else 0)
+
+    try:
+        fake_server.start()
+
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        fake_server.stop()
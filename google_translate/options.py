@@ -45,10 +45,14 @@ def parse_options():
     connection_args = parser.add_argument_group("connection arguments")
 
     connection_args.add_argument("--simulate", action="store_true", help="dont send request")
+    connection_args.add_argument("--offline", action="store_true", help="answer only from the cache")
     connection_args.add_argument("--http", action="store_false", help="use HTTP instead of HTTPS")
     connection_args.add_argument("-r", "--retries", default=5, type=int, choices=range(1, 101), help="specify number of tries before giving up (default: %(default)s)", metavar="[1-100]")
     connection_args.add_argument("-w", "--wait-time", default=1.0, type=float, help="time in seconds to wait between requests (default: %(default)s)", metavar="(0-100)")
     connection_args.add_argument("--rand-wait", action="store_true", help="wait random time between requests")
+    connection_args.add_argument("-j", "--workers", default=None, type=int, help="specify number of concurrent requests", metavar="")
+    connection_args.add_argument("--batch", action="store_true", help="pack multiple words into a single request (requires: '--src-lang')")
+    connection_args.add_argument("--keep-alive", action="store_true", help="reuse connections between requests")
     connection_args.add_argument("--timeout", default=10.0, type=float, help="specify socket timeout in seconds (default: %(default)s)", metavar="(0-100)")
 
     proxy_args = parser.add_argument_group("proxy arguments")
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""Contains the info record object.
+
+An info record wraps the parsed Google translate reply of a word and
+exposes the keys of the info dictionary (see docs/api.rst). Each key is
+extracted from the reply the first time it is accessed, so a caller that
+only needs the src_lang does not pay for the translation or the extra
+translations.
+
+Info records are immutable, the 'extra' key holds FrozenDict and
+FrozenList objects. That allows the translators to share the cached
+records with all the callers without copying them. Use the thaw function
+or the InfoRecord.to_dict method to get a mutable copy.
+
+"""
+
+from __future__ import unicode_literals
+
+from collections import Mapping
+
+
+class FrozenDict(dict):
+
+    """Dictionary that raises TypeError on every modification.
+
+    Copies of a FrozenDict are plain mutable dictionaries.
+
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("'%s' object is read only" % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _read_only
+
+    def copy(self):
+        return dict(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (self.__class__, (dict(self),))
+
+
+class FrozenList(list):
+
+    """List that raises TypeError on every modification.
+
+    Copies of a FrozenList are plain mutable lists.
+
+    """
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("'%s' object is read only" % self.__class__.__name__)
+
+    __setitem__ = __delitem__ = __setslice__ = __delslice__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = reverse = sort = _read_only
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+    def __reduce__(self):
+        return (self.__class__, (list(self),))
+
+
+def freeze(value):
+    """Returns a frozen deep copy of the given dictionaries and lists."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.iteritems())
+
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+
+    return value
+
+
+def thaw(value):
+    """Returns a mutable deep copy of the given dictionaries and lists.
+
+    InfoRecord objects become plain info dictionaries. Other values are
+    returned as they are.
+
+    """
+    if isinstance(value, InfoRecord):
+        return value.to_dict()
+
+    if isinstance(value, dict):
+        return dict((key, thaw(item)) for key, item in value.iteritems())
+
+    if isinstance(value, list):
+        return [thaw(item) for item in value]
+
+    return value
+
+
+def to_plain(value):
+    """Returns the plain value that the caches store for the given value.
+
+    Objects like the InfoRecord are stored as plain dictionaries, other
+    values are returned as they are without a copy.
+
+    """
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+
+    return value
+
+
+class InfoRecord(object):
+
+    """Immutable mapping with lazily extracted info dictionary keys.
+
+    Examples:
+        Access a single key::
+
+            >>> record = InfoRecord([[["chien", "dog", "", "", 1]], "", "en"])
+            >>> record["src_lang"]
+            'en'
+
+            >>> record.to_dict()  # Extracts all the keys
+
+    Attributes:
+        KEYS (tuple): The keys of the info dictionary.
+
+        EXTRA_KEYS (dict): Maps the type number of the extra translations
+            to the key under the 'extra' dictionary.
+
+    Args:
+        json_list (list): The parsed Google translate reply.
+
+    """
+
+    KEYS = ("original_text", "romanization", "translation", "has_typo", "src_lang", "extra", "match")
+
+    EXTRA_KEYS = {1: "nouns", 2: "verbs", 3: "adjectives", 4: "adverbs", 5: "prepositions"}
+
+    __slots__ = ("_json_list", "_values")
+
+    def __init__(self, json_list):
+        if not isinstance(json_list, list):
+            json_list = []
+
+        object.__setattr__(self, "_json_list", json_list)
+        object.__setattr__(self, "_values", {})
+
+    def to_dict(self):
+        """Returns a new mutable info dictionary with all the keys."""
+        info_dict = {}
+
+        for key in self.KEYS:
+            info_dict[key] = self[key]
+
+        info_dict["extra"] = thaw(info_dict["extra"])
+
+        return info_dict
+
+    def __getitem__(self, key):
+        values = self._values
+
+        if key not in values:
+            if key not in self.KEYS:
+                raise KeyError(key)
+
+            values[key] = getattr(self, "_extract_" + key)()
+
+        return values[key]
+
+    def get(self, key, default=None):
+        if key in self.KEYS:
+            return self[key]
+
+        return default
+
+    def keys(self):
+        return list(self.KEYS)
+
+    def values(self):
+        return [self[key] for key in self.KEYS]
+
+    def items(self):
+        return [(key, self[key]) for key in self.KEYS]
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+
+        return dict(self.items()) == dict(other.items())
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+
+        if equal is NotImplemented:
+            return equal
+
+        return not equal
+
+    __hash__ = None
+
+    def __setattr__(self, name, value):
+        raise TypeError("'%s' object is read only" % self.__class__.__name__)
+
+    __delattr__ = __setattr__
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, (self._json_list,))
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.to_dict())
+
+    def _extract_romanization(self):
+        romanization = ""
+
+        try:
+            romanization = self._json_list[0][-1][3]
+        except IndexError:
+            pass
+
+        if not romanization or self["src_lang"] == "en":
+            return self["original_text"]
+
+        return romanization
+
+    def _extract_src_lang(self):
+        try:
+            return self._json_list[2]
+        except IndexError:
+            return ""
+
+    def _extract_match(self):
+        try:
+            return self._json_list[6]
+        except IndexError:
+            return 1.0
+
+    def _extract_has_typo(self):
+        try:
+            # When that thing is set it contains the word spelled right?!
+            return True if self._json_list[7] else False
+        except IndexError:
+            return False
+
+    def _extract_segments(self):
+        """Extract the translation & the original text together."""
+        translation = []
+        original_text = []
+
+        try:
+            translation_list = self._json_list[0]
+
+            # Exclude the romanization entry
+            if len(translation_list) > 1:
+                translation_list = translation_list[:-1]
+
+            for item in translation_list:
+                if isinstance(item[4], int):
+                    translation.append(item[0])
+                    original_text.append(item[1])
+        except IndexError:
+            self._values["translation"] = self._values["original_text"] = ""
+            return
+
+        self._values["translation"] = ''.join(translation)
+        self._values["original_text"] = ''.join(original_text)
+
+    def _extract_translation(self):
+        self._extract_segments()
+        return self._values["translation"]
+
+    def _extract_original_text(self):
+        self._extract_segments()
+        return self._values["original_text"]
+
+    def _extract_extra(self):
+        extra = FrozenDict()
+
+        try:
+            if self._json_list[1] is not None:
+                for item in self._json_list[1]:
+                    item_type = item[-1]
+
+                    if item_type in self.EXTRA_KEYS:
+                        dest_key = self.EXTRA_KEYS[item_type]
+                    else:
+                        continue
+
+                    temp_dict = {}
+                    for extra_trans in item[2]:
+                        temp_dict[extra_trans[0]] = freeze(extra_trans[1])
+
+                    dict.__setitem__(extra, dest_key, FrozenDict(temp_dict))
+        except IndexError:
+            pass
+
+        return extra
+
+
+Mapping.register(InfoRecord)
@@ -19,12 +19,13 @@ from __future__ import unicode_literals
 import re
 import random
 import logging
+import threading
 
 from urllib2 import HTTPError, URLError
 
+from .transport import Urllib2Transport
 from .utils import (
     load_from_file,
-    make_request,
     parse_reply
 )
 
@@ -74,6 +75,8 @@ class ProxySelector(object):
     def __init__(self, proxy=None, proxy_file=None, prevent_fallback=False, random_selection=False):
         self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
 
+        self._lock = threading.Lock()
+
         self._proxy = None
         self._proxy_list = []
         self._proxy_counter = 0
@@ -98,6 +101,11 @@ class ProxySelector(object):
         """Returns a proxy back to the user."""
         self.logger.info("Retrieving proxy")
 
+        with self._lock:
+            return self._get_proxy()
+
+    def _get_proxy(self):
+        """Returns a proxy, see get_proxy method."""
         if self._proxy is not None:
             return self._proxy
 
@@ -129,6 +137,15 @@ class ProxySelector(object):
         """
         self.logger.debug("Removing proxy: %r", proxy)
 
+        with self._lock:
+            removed = self._remove_proxy(proxy)
+
+        self.logger.debug("Proxy removed: %r", removed)
+
+        return removed
+
+    def _remove_proxy(self, proxy):
+        """Removes the given proxy, see remove_proxy method."""
         removed = False
 
         if self._prevent_fallback:
@@ -158,8 +175,6 @@ class ProxySelector(object):
                 self._proxy = None
                 removed = True
 
-        self.logger.debug("Proxy removed: %r", removed)
-
         return removed
 
     @staticmethod
@@ -246,6 +261,9 @@ class UserAgentSelector(object):
             and stick with it, even when multiple user-agents are defined
             (from file or HTTP)
 
+        transport (transport.Transport): Object that sends the HTTP requests.
+            When None a transport.Urllib2Transport is used.
+
     """
 
     # best penalty ever
@@ -253,9 +271,14 @@ class UserAgentSelector(object):
 
     HTTP_URL = "http://techblog.willshouse.com/2012/01/03/most-common-user-agents/"
 
-    def __init__(self, user_agent=None, user_agent_file=None, http_mode=False, single_ua=False):
+    def __init__(self, user_agent=None, user_agent_file=None, http_mode=False, single_ua=False, transport=None):
         self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
 
+        if transport is None:
+            transport = Urllib2Transport()
+
+        self._transport = transport
+
         self._user_agent = None
         self._user_agent_list = []
 
@@ -317,7 +340,7 @@ class UserAgentSelector(object):
 
         try:
             # The default user-agent from urllib is blocked
-            reply = make_request(self.HTTP_URL, [("User-Agent", self.DEFAULT_UA)])
+            reply = self._transport.request(self.HTTP_URL, [("User-Agent", self.DEFAULT_UA)])
         except (HTTPError, URLError, IOError) as error:
             self.logger.error("Error %s", error)
 
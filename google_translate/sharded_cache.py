@@ -0,0 +1,170 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""Module that contains the sharded cache object."""
+
+from __future__ import unicode_literals
+
+import logging
+
+from .cache import (
+    Cache,
+    store_items
+)
+from .records import freeze
+from .utils import get_dict
+
+
+class ShardedCache(object):
+
+    """Cache split into independently locked shards.
+
+    Each key belongs to one of the shards, a cache.Cache with its own lock,
+    eviction policy and expiry heap. Threads that work on keys of different
+    shards never wait for each other and no method takes a lock over the
+    whole cache, which makes the ShardedCache a better fit than the Cache
+    for translators with many worker threads.
+
+    The max_size is split evenly between the shards and each shard evicts
+    its own items, so a full shard evicts an item even when other shards
+    still have space.
+
+    Examples:
+        Share one cache between the worker threads::
+
+            >>> from google_translate import GoogleTranslator
+            >>> from google_translate.sharded_cache import ShardedCache
+
+            >>> cache = ShardedCache(10000, 604800.0, 'lru', shards=32)
+            >>> translator = GoogleTranslator(max_workers=8, cache=cache)
+
+    Args:
+        max_size (int): Maximum number of items that the cache can store,
+            must be at least the number of shards.
+
+        valid_period (float): Time in seconds that the cache items are valid.
+            This value can be changed after the object initialization.
+
+        policy (string): Name of the eviction policy of the shards, see
+            cache.POLICIES (default: fifo).
+
+        shards (int): Number of shards (default: 16).
+
+    Raises:
+        TypeError, ValueError
+
+    """
+
+    def __init__(self, max_size, valid_period, policy="fifo", shards=16):
+        if not isinstance(max_size, int):
+            raise TypeError(max_size)
+
+        if not isinstance(shards, int):
+            raise TypeError(shards)
+
+        if not isinstance(policy, basestring):
+            # A policy object can not be shared between the shards
+            raise TypeError(policy)
+
+        if shards < 1 or max_size < shards:
+            raise ValueError(shards)
+
+        self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self._max_size = max_size
+
+        shard_size, remainder = divmod(max_size, shards)
+
+        self._shards = tuple(Cache(shard_size + (1 if index < remainder else 0), valid_period, policy)
+                             for index in xrange(shards))
+
+        self.logger.debug("ShardedCache initiated max_size: (%s), valid_period: (%s), shards: (%s)", max_size, valid_period, shards)
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @property
+    def valid_period(self):
+        return self._shards[0].valid_period
+
+    @valid_period.setter
+    def valid_period(self, value):
+        for shard in self._shards:
+            shard.valid_period = value
+
+    @property
+    def shards(self):
+        return len(self._shards)
+
+    def has_space(self):
+        """Returns True if the cache has not reached the max_size else False."""
+        return len(self) < self._max_size
+
+    def has(self, key):
+        """Returns True if the key is in the cache else False."""
+        return self._get_shard(key).has(key)
+
+    def add(self, key, obj):
+        """Add new item to the shard of the key, see cache.Cache.add."""
+        self._get_shard(key).add(key, obj)
+
+    def get(self, key):
+        """Get item from the shard of the key, see cache.Cache.get."""
+        return self._get_shard(key).get(key)
+
+    def remove_old(self):
+        """Remove the old items of all the shards, returns the number removed."""
+        return sum(shard.remove_old() for shard in self._shards)
+
+    def store(self, filename):
+        """Store the cache to the given filename in the cache.Cache format.
+
+        Returns:
+            True on success else False.
+
+        """
+        self.logger.debug("Saving cache state to: %r", filename)
+        return store_items(filename, self.items())
+
+    def load(self, filename):
+        """Load the cache content from the given cache.Cache file.
+
+        Returns:
+            True on success else False.
+
+        Note:
+            When the file contains more items than a shard has space for,
+            the shard keeps only its newest items. The loaded items are
+            frozen (see records.freeze).
+
+        """
+        self.logger.debug("Retrieving cache state from: %r", filename)
+
+        loaded_items = get_dict(filename)
+
+        if loaded_items is None:
+            return False
+
+        # Oldest first so that the eviction order follows the timestamps
+        for key, (obj, timestamp) in sorted(loaded_items.items(), key=lambda item: item[1][1]):
+            self._get_shard(key).insert(key, freeze(obj), timestamp)
+
+        return True
+
+    def items(self):
+        """Returns list with (key, [obj, timestamp]) pairs."""
+        items = []
+
+        for shard in self._shards:
+            items.extend(shard.items())
+
+        return items
+
+    def _get_shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def __repr__(self):
+        return "%s(%r, %r, shards=%r)" % (self.__class__.__name__, self._max_size, self.valid_period, len(self._shards))
+
+    def __len__(self):
+        return sum(len(shard) for shard in self._shards)
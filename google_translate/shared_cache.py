@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""Cache shared between processes.
+
+The cache lives in a server process and the translators talk to it over
+a local socket through a CacheProxy. Any GoogleTranslator accepts the
+proxy as its cache, so all the translators of all the processes that use
+the same server share a single warm cache.
+
+Processes forked after the server has started (e.g. the workers of a
+pre-fork server like gunicorn) inherit the proxy and the authentication
+key. Unrelated processes connect with the server address and authkey.
+
+Examples:
+    Share the cache between the workers of a pre-fork server::
+
+        >>> from google_translate import GoogleTranslator
+        >>> from google_translate.shared_cache import start_cache_server
+
+        >>> manager = start_cache_server(100000, 604800.0)
+        >>> translator = GoogleTranslator(cache=manager.get_cache())
+
+        >>> # ... fork the workers, at exit:
+        >>> manager.shutdown()
+
+    Connect to a server that listens to a unix socket::
+
+        >>> from google_translate.shared_cache import start_cache_server, connect_cache
+
+        >>> manager = start_cache_server(100000, 604800.0, address='/tmp/translate-cache.sock', authkey=b'secret')
+
+        >>> # In an other process
+        >>> cache = connect_cache('/tmp/translate-cache.sock', authkey=b'secret')
+        >>> translator = GoogleTranslator(cache=cache)
+
+"""
+
+from __future__ import unicode_literals
+
+import os
+import sys
+
+from multiprocessing.managers import (
+    BaseManager,
+    BaseProxy
+)
+
+from .cache import Cache
+
+
+# The cache of the server process
+_server_cache = None
+
+
+def _create_cache(max_size, valid_period, policy):
+    """Server process initializer."""
+    global _server_cache
+    _server_cache = Cache(max_size, valid_period, policy)
+
+
+def _get_cache():
+    return _server_cache
+
+
+def _socket_address(address):
+    # multiprocessing recognizes only byte string paths as unix sockets
+    if isinstance(address, unicode):
+        return address.encode(sys.getfilesystemencoding() or "UTF-8")
+
+    return address
+
+
+class CacheProxy(BaseProxy):
+
+    """Proxy of the cache of the server process.
+
+    The proxy has the get, add, has and remove_old methods of the
+    cache.Cache. Each call is a round trip to the server, the objects are
+    pickled so get returns a new object on each call.
+
+    """
+
+    _exposed_ = ("get", "add", "has", "remove_old", "__len__")
+
+    def _incref(self):
+        BaseProxy._incref(self)
+        self._pid = os.getpid()
+
+    def _callmethod(self, methodname, args=(), kwds={}):
+        pid = os.getpid()
+
+        # A child of os.fork must own its reference and must not share the
+        # connection of its parent (multiprocessing resets only the children
+        # that it starts)
+        if self._pid != pid:
+            self._incref()
+
+        if getattr(self._tls, "pid", None) != pid:
+            self._tls.__dict__.pop("connection", None)
+            self._tls.pid = pid
+
+        return BaseProxy._callmethod(self, methodname, args, kwds)
+
+    def get(self, key):
+        return self._callmethod("get", (key,))
+
+    def add(self, key, obj):
+        return self._callmethod("add", (key, obj))
+
+    def has(self, key):
+        return self._callmethod("has", (key,))
+
+    def remove_old(self):
+        return self._callmethod("remove_old")
+
+    def __len__(self):
+        return self._callmethod("__len__")
+
+
+class CacheManager(BaseManager):
+
+    """Manager of the cache server process, see start_cache_server."""
+
+
+CacheManager.register(b"get_cache", callable=_get_cache, proxytype=CacheProxy)
+
+
+def start_cache_server(max_size, valid_period, policy="lru", address=None, authkey=None):
+    """Start a cache server process.
+
+    Args:
+        max_size (int): Maximum number of items that the cache can store.
+
+        valid_period (float): Time in seconds that the cache items are valid.
+
+        policy (string): Name of the eviction policy, see cache.POLICIES
+            (default: lru).
+
+        address (string or tuple): Path of a unix socket or (host, port)
+            pair to listen to. When None a free address is picked.
+
+        authkey (bytes): Authentication key of the clients. When None the
+            authkey of the current process is used, which the forked
+            processes inherit.
+
+    Returns:
+        The started CacheManager, its get_cache method returns a new
+        CacheProxy and shutdown stops the server.
+
+    Raises:
+        TypeError, ValueError: When the cache arguments are invalid.
+
+    """
+    # Fail in this process rather than in the server
+    Cache(max_size, valid_period, policy)
+
+    manager = CacheManager(_socket_address(address), authkey)
+    manager.start(_create_cache, (max_size, valid_period, policy))
+
+    return manager
+
+
+def connect_cache(address, authkey=None):
+    """Returns CacheProxy of the cache server that listens to the given address."""
+    manager = CacheManager(_socket_address(address), authkey)
+    manager.connect()
+
+    return manager.get_cache()
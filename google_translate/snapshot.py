@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""Read-only cache snapshot format.
+
+A snapshot is a constant database file that maps the cache keys to their
+(obj, timestamp) items. The Snapshot object opens the file through mmap,
+so opening a snapshot costs the same for 500 or 5 million items and a
+lookup decodes only the requested item.
+
+File layout (all the numbers are little endian)::
+
+    header   magic (8 bytes), slots (uint64), count (uint64)
+    table    slots x [hash (uint32), record offset (uint64)]
+    records  count x [key size (uint32), timestamp (double),
+                      value size (uint32), flags (uint8), key, value]
+
+The table is an open addressing hash table with linear probing, an
+offset of 0 marks an empty slot. The keys are json encoded to keep their
+types, the values are json encoded and zlib compressed when that makes
+them smaller.
+
+A journal file is a plain sequence of records in the same format. New
+items are appended to the journal, so saving a few items does not
+rewrite the snapshot. A torn record at the end of the journal (e.g. after
+a crash) is ignored until the next writer truncates it. The lock_file
+function serializes the processes that use the same journal.
+
+Examples:
+    Write and read a snapshot::
+
+        >>> from google_translate.snapshot import Snapshot, write_snapshot
+
+        >>> write_snapshot('cache.snap', {'key': ['value', 1500000000.0]}.items())
+
+        >>> snapshot = Snapshot('cache.snap')
+        >>> snapshot.get('key')
+        ['value', 1500000000.0]
+        >>> snapshot.close()
+
+"""
+
+from __future__ import unicode_literals
+
+import os
+import mmap
+import json
+import zlib
+import struct
+import tempfile
+
+from contextlib import contextmanager
+
+from .records import to_plain
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+MAGIC = b"GTSNAP01"
+
+JOURNAL_SUFFIX = ".journal"
+
+_HEADER = struct.Struct(b"<8sQQ")
+_SLOT = struct.Struct(b"<IQ")
+_RECORD = struct.Struct(b"<IdIB")
+
+_MASK32 = 0xffffffff
+
+_FLAG_ZLIB = 1
+
+
+def _hash(key_bytes):
+    return zlib.crc32(key_bytes) & _MASK32
+
+
+def encode_key(key):
+    """Returns the bytes that represent the given key in the snapshot."""
+    return json.dumps(key, ensure_ascii=False, separators=(",", ":")).encode("UTF-8")
+
+
+def encode_value(obj):
+    """Returns (flags, bytes) pair with the encoded obj."""
+    value = json.dumps(to_plain(obj), separators=(",", ":")).encode("UTF-8")
+    compressed = zlib.compress(value)
+
+    if len(compressed) < len(value):
+        return _FLAG_ZLIB, compressed
+
+    return 0, value
+
+
+def decode_value(flags, value):
+    """Returns the obj of the given encoded value."""
+    if flags & _FLAG_ZLIB:
+        value = zlib.decompress(value)
+
+    return json.loads(value)
+
+
+def encode_items(items):
+    """Returns list with (key bytes, RawItem) pairs for the given items.
+
+    Args:
+        items (iterable): (key, [obj, timestamp]) or (key, RawItem) pairs.
+
+    """
+    records = []
+
+    for key, item in items:
+        if isinstance(item, RawItem):
+            records.append((encode_key(key), item))
+        else:
+            obj, timestamp = item
+            flags, value = encode_value(obj)
+            records.append((encode_key(key), RawItem(timestamp, flags, value)))
+
+    return records
+
+
+def _pack_record(key_bytes, raw_item):
+    return _RECORD.pack(len(key_bytes), raw_item.timestamp, len(raw_item.value), raw_item.flags) + key_bytes + raw_item.value
+
+
+def append_journal(journal_file, items):
+    """Append the given items to the journal file object with a single write.
+
+    Args:
+        journal_file (file): Journal file opened in append mode, see lock_file.
+
+        items (iterable): (key, [obj, timestamp]) or (key, RawItem) pairs.
+
+    Returns:
+        List with the (key bytes, RawItem) pairs written.
+
+    """
+    records = encode_items(items)
+
+    journal_file.write(b"".join(_pack_record(key_bytes, raw_item) for key_bytes, raw_item in records))
+    journal_file.flush()
+    os.fsync(journal_file.fileno())
+
+    return records
+
+
+def read_journal(journal_file):
+    """Read the records of the journal file object.
+
+    When a key appears more than once the last record wins.
+
+    Returns:
+        Tuple with the dictionary of the RawItem of each key and the size of
+        the complete records. Anything after that size is a torn record
+        that must be truncated before new records are appended.
+
+    """
+    journal_file.seek(0)
+    data = journal_file.read()
+
+    items = {}
+    offset = 0
+
+    while offset + _RECORD.size <= len(data):
+        key_size, timestamp, value_size, flags = _RECORD.unpack_from(data, offset)
+        end = offset + _RECORD.size + key_size + value_size
+
+        if end > len(data):
+            break
+
+        key_start = offset + _RECORD.size
+        key = json.loads(data[key_start:key_start + key_size].decode("UTF-8"))
+
+        items[key] = RawItem(timestamp, flags, data[key_start + key_size:end])
+        offset = end
+
+    return items, offset
+
+
+@contextmanager
+def lock_file(filename, exclusive=True):
+    """Open the given file in append mode and hold a lock on it.
+
+    The lock is an advisory flock, on systems without fcntl the file is
+    opened without a lock.
+
+    Yields:
+        The open file object.
+
+    """
+    file_path = os.path.dirname(filename)
+
+    if file_path and not os.path.isdir(file_path):
+        os.makedirs(file_path)
+
+    with open(filename, "a+b") as locked_file:
+        if fcntl is not None:
+            fcntl.flock(locked_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+        try:
+            yield locked_file
+        finally:
+            if fcntl is not None:
+                fcntl.flock(locked_file.fileno(), fcntl.LOCK_UN)
+
+
+def write_snapshot(filename, items):
+    """Write the given items to the snapshot file.
+
+    The snapshot is written to a temporary file which then replaces the
+    given filename, so readers never see a half written snapshot and the
+    processes that have the old snapshot open keep reading the old file.
+
+    Args:
+        filename (string): Path to the snapshot file, the directories are
+            created as needed.
+
+        items (iterable): (key, [obj, timestamp]) pairs. Use Snapshot.raw_items
+            to copy the items of another snapshot without decoding them.
+
+    """
+    records = encode_items(items)
+
+    slots = 8
+
+    while slots < len(records) * 2:
+        slots *= 2
+
+    table = bytearray(slots * _SLOT.size)
+    offset = _HEADER.size + len(table)
+    mask = slots - 1
+
+    for key_bytes, raw_item in records:
+        key_hash = _hash(key_bytes)
+        slot = key_hash & mask
+
+        while _SLOT.unpack_from(table, slot * _SLOT.size)[1] != 0:
+            slot = (slot + 1) & mask
+
+        _SLOT.pack_into(table, slot * _SLOT.size, key_hash, offset)
+        offset += _RECORD.size + len(key_bytes) + len(raw_item.value)
+
+    file_path = os.path.dirname(filename)
+
+    if file_path and not os.path.isdir(file_path):
+        os.makedirs(file_path)
+
+    temp_fd, temp_filename = tempfile.mkstemp(dir=file_path or ".", prefix=".snapshot-")
+
+    try:
+        with os.fdopen(temp_fd, "wb") as snapshot_file:
+            snapshot_file.write(_HEADER.pack(MAGIC, slots, len(records)))
+            snapshot_file.write(table)
+
+            for key_bytes, raw_item in records:
+                snapshot_file.write(_pack_record(key_bytes, raw_item))
+
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+
+        os.rename(temp_filename, filename)
+    except BaseException:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+        raise
+
+
+class RawItem(object):
+
+    """Encoded snapshot item, see Snapshot.raw_items."""
+
+    __slots__ = ("timestamp", "flags", "value")
+
+    def __init__(self, timestamp, flags, value):
+        self.timestamp = timestamp
+        self.flags = flags
+        self.value = value
+
+    def decode(self):
+        """Returns the [obj, timestamp] item."""
+        return [decode_value(self.flags, self.value), self.timestamp]
+
+
+class Snapshot(object):
+
+    """Read-only memory mapped snapshot file.
+
+    Args:
+        filename (string): Path to the snapshot file.
+
+    Raises:
+        IOError, OSError, ValueError: When the file does not exist or it's
+            not a snapshot.
+
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+
+        with open(filename, "rb") as snapshot_file:
+            size = os.fstat(snapshot_file.fileno()).st_size
+
+            if size < _HEADER.size:
+                raise ValueError("Not a snapshot file: %r" % filename)
+
+            self._map = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self._slots, self._count = _HEADER.unpack_from(self._map)
+
+        if magic != MAGIC or _HEADER.size + self._slots * _SLOT.size > size:
+            self._map.close()
+            raise ValueError("Not a snapshot file: %r" % filename)
+
+    def _find(self, key):
+        """Returns the offset of the record value and the record or None."""
+        key_bytes = encode_key(key)
+        key_hash = _hash(key_bytes)
+        mask = self._slots - 1
+        slot = key_hash & mask
+
+        while True:
+            slot_hash, offset = _SLOT.unpack_from(self._map, _HEADER.size + slot * _SLOT.size)
+
+            if offset == 0:
+                return None
+
+            if slot_hash == key_hash:
+                record = _RECORD.unpack_from(self._map, offset)
+                key_start = offset + _RECORD.size
+
+                if self._map[key_start:key_start + record[0]] == key_bytes:
+                    return key_start + record[0], record
+
+            slot = (slot + 1) & mask
+
+    def get_raw(self, key):
+        """Returns the RawItem of the given key or None."""
+        found = self._find(key)
+
+        if found is None:
+            return None
+
+        value_start, (_, timestamp, value_size, flags) = found
+
+        return RawItem(timestamp, flags, self._map[value_start:value_start + value_size])
+
+    def get(self, key):
+        """Returns the [obj, timestamp] item of the given key or None."""
+        raw_item = self.get_raw(key)
+
+        if raw_item is None:
+            return None
+
+        return raw_item.decode()
+
+    def raw_items(self):
+        """Yields (key, RawItem) pairs for all the items in the file order."""
+        offset = _HEADER.size + self._slots * _SLOT.size
+
+        for _ in xrange(self._count):
+            key_size, timestamp, value_size, flags = _RECORD.unpack_from(self._map, offset)
+            offset += _RECORD.size
+
+            key = json.loads(self._map[offset:offset + key_size].decode("UTF-8"))
+            offset += key_size
+
+            yield key, RawItem(timestamp, flags, self._map[offset:offset + value_size])
+            offset += value_size
+
+    def items(self):
+        """Returns list with (key, [obj, timestamp]) pairs."""
+        return [(key, raw_item.decode()) for key, raw_item in self.raw_items()]
+
+    def close(self):
+        self._map.close()
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def __len__(self):
+        return self._count
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.filename)
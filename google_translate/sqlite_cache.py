@@ -0,0 +1,435 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""Module that contains the SQLite cache object."""
+
+from __future__ import unicode_literals
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+
+from contextlib import contextmanager
+
+from .records import (
+    freeze,
+    to_plain
+)
+from .utils import (
+    write_dict,
+    get_dict
+)
+
+
+class SqliteCache(object):
+
+    """Store objects for a period of time in a SQLite database.
+
+    Persistent alternative of the cache.Cache with the same interface. Each
+    add or get touches only the rows of the given key, so opening a cache
+    with millions of items costs the same as opening an empty one and there
+    is no need to store the whole cache at exit.
+
+    The database runs in WAL mode, so readers do not block the writer and
+    a crash never leaves a half written cache. The write transactions start
+    with BEGIN IMMEDIATE and wait up to 'timeout' seconds for the database
+    lock, which makes the cache safe to share between processes. Within a
+    process the cache methods are thread safe.
+
+    The objects are stored as json, the get method returns new objects on
+    each call. Objects like the records.InfoRecord are stored as plain
+    dictionaries.
+
+    With the 'lru' and 'lfu' policies the cache hits are buffered in memory
+    and written in a single transaction every _TOUCH_BATCH hits, on add
+    and before the eviction order is read, so the readers never wait for
+    the database write lock. Other processes see the buffered hits only
+    after they are written.
+
+    Examples:
+        Simple use case::
+
+            >>> from google_translate.sqlite_cache import SqliteCache
+
+            >>> cache = SqliteCache('mycache.db', 1000000, 3600.0)
+            >>> cache.add('key', 'value')
+            >>> value = cache.get('key')
+
+            >>> cache.load('mycache')      # Import the items of a Cache file
+            >>> cache.close()
+
+    Attributes:
+        POLICIES (dict): Maps the eviction policy names to the column that
+            orders the items for eviction.
+
+        _TOUCH_BATCH (int): Number of buffered cache hits that triggers
+            a write.
+
+    Args:
+        filename (string): Path to the database file, the directories are
+            created as needed.
+
+        max_size (int): Maximum number of items that the cache can store.
+
+        valid_period (float): Time in seconds that the cache items are valid.
+            This value can be changed after the object initialization.
+
+        policy (string): Name of the eviction policy, one of 'fifo', 'lru'
+            or 'lfu' (default: fifo).
+
+        timeout (float): Time in seconds to wait for the database lock
+            (default: 30.0).
+
+    Raises:
+        TypeError, ValueError, sqlite3.Error
+
+    """
+
+    POLICIES = {
+        "fifo": "timestamp",
+        "lru": "accessed",
+        "lfu": "hits"
+    }
+
+    _TOUCH_BATCH = 100
+
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS items ("
+        "key PRIMARY KEY, value TEXT NOT NULL, timestamp REAL NOT NULL, "
+        "accessed REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)",
+        "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO meta VALUES ('size', (SELECT COUNT(*) FROM items))",
+        "CREATE INDEX IF NOT EXISTS items_timestamp ON items (timestamp)",
+        # Keep the size in meta, COUNT(*) has to walk the whole table
+        "CREATE TRIGGER IF NOT EXISTS items_insert AFTER INSERT ON items "
+        "BEGIN UPDATE meta SET value = value + 1 WHERE name = 'size'; END",
+        "CREATE TRIGGER IF NOT EXISTS items_delete AFTER DELETE ON items "
+        "BEGIN UPDATE meta SET value = value - 1 WHERE name = 'size'; END"
+    )
+
+    def __init__(self, filename, max_size, valid_period, policy="fifo", timeout=30.0):
+        if not isinstance(filename, basestring):
+            raise TypeError(filename)
+
+        if not isinstance(max_size, int):
+            raise TypeError(max_size)
+
+        if not isinstance(valid_period, float):
+            raise TypeError(valid_period)
+
+        if max_size < 1:
+            raise ValueError(max_size)
+
+        if valid_period <= 0.0:
+            raise ValueError(valid_period)
+
+        if policy not in self.POLICIES:
+            raise ValueError(policy)
+
+        self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self._filename = filename
+        self._max_size = max_size
+        self._valid_period = valid_period
+        self._policy = policy
+        self._timeout = timeout
+        self._lock = threading.RLock()
+
+        self._connection = None
+        self._pid = None
+        self._in_transaction = False
+
+        # key: [accessed, hits] of the hits not yet written
+        self._touches = {}
+        self._touch_count = 0
+
+        file_path = os.path.dirname(filename)
+
+        if file_path and not os.path.isdir(file_path):
+            os.makedirs(file_path)
+
+        self._connect()
+
+        self.logger.debug("SqliteCache initiated filename: %r, max_size: (%s), valid_period: (%s)", filename, max_size, valid_period)
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @property
+    def valid_period(self):
+        return self._valid_period
+
+    @valid_period.setter
+    def valid_period(self, value):
+        if not isinstance(value, float):
+            raise TypeError(value)
+
+        if value <= 0.0:
+            raise ValueError(value)
+
+        self._valid_period = value
+        self.logger.debug("Valid period changed to: (%s)", value)
+
+    def has_space(self):
+        """Returns True if the cache has not reached the max_size else False."""
+        return len(self) < self._max_size
+
+    def has(self, key):
+        """Returns True if the key is in the cache else False."""
+        with self._lock:
+            return self._execute("SELECT 1 FROM items WHERE key = ?", (key,)).fetchone() is not None
+
+    def get_oldest(self):
+        """Returns the key that the eviction policy removes next if one exists else None."""
+        with self._lock:
+            self._flush_touches()
+            row = self._execute(self._victims_query(), (1,)).fetchone()
+
+        return None if row is None else row[0]
+
+    def add(self, key, obj):
+        """Add new item to the cache.
+
+        Adds the key-obj combination to the cache. If the cache reaches the
+        max_size then the expired items and then the item that the eviction
+        policy picks are removed.
+
+        Args:
+            key (hashable type): Key under which the obj will be stored.
+
+            obj (object): Object to store in the cache.
+
+        """
+        self.logger.debug("Adding new item to cache, key: %r", key)
+
+        value = json.dumps(to_plain(obj))
+        timestamp = time.time()
+
+        with self._transaction():
+            self._flush_touches()
+
+            cursor = self._execute("UPDATE items SET value = ?, timestamp = ?, accessed = ?, hits = hits + 1 WHERE key = ?",
+                                   (value, timestamp, timestamp, key))
+
+            if cursor.rowcount > 0:
+                return
+
+            overflow = self._size() - self._max_size + 1
+
+            if overflow > 0:
+                self.logger.debug("Cache out of limit")
+                overflow -= self._execute("DELETE FROM items WHERE timestamp < ?", (timestamp - self._valid_period,)).rowcount
+
+            if overflow > 0:
+                self._execute("DELETE FROM items WHERE key IN (%s)" % self._victims_query(), (overflow,))
+
+            self._execute("INSERT INTO items (key, value, timestamp, accessed, hits) VALUES (?, ?, ?, ?, 1)",
+                          (key, value, timestamp, timestamp))
+
+    def get(self, key):
+        """Get item from the cache.
+
+        Returns the item corresponding to the given key if the given key exists
+        else None. Note that if the timestamp of the item is old then it will
+        return None and remove the item. The dictionaries and lists of the
+        item are frozen (see records.freeze).
+
+        Args:
+            key (hashable type): Key to search for.
+
+        """
+        self.logger.debug("Searching cache for key: %r", key)
+
+        now = time.time()
+
+        with self._lock:
+            row = self._execute("SELECT value, timestamp FROM items WHERE key = ?", (key,)).fetchone()
+
+            if row is not None and now - row[1] > self._valid_period:
+                with self._transaction():
+                    self._execute("DELETE FROM items WHERE key = ? AND timestamp = ?", (key, row[1]))
+
+                row = None
+
+            if row is not None and self._policy != "fifo":
+                self._touch(key, now)
+
+        if row is None:
+            self.logger.info("Item not in cache")
+            return None
+
+        self.logger.info("Item found in cache")
+        return freeze(json.loads(row[0]))
+
+    def remove_old(self):
+        """Remove old items from the cache.
+
+        Removes all the items with invalid timestamp from the cache
+        and returns the number of the items removed.
+
+        """
+        self.logger.info("Removing old items from cache")
+
+        with self._transaction():
+            items_removed = self._execute("DELETE FROM items WHERE timestamp < ?", (time.time() - self._valid_period,)).rowcount
+
+        self.logger.debug("Items removed: (%s)", items_removed)
+        return items_removed
+
+    def store(self, filename):
+        """Export the cache to the given filename in the cache.Cache format.
+
+        Returns:
+            True on success else False.
+
+        """
+        self.logger.debug("Exporting cache to: %r", filename)
+        return write_dict(filename, dict(self.items()))
+
+    def load(self, filename):
+        """Import the items of the given cache.Cache file.
+
+        Items that already exist in the database are replaced. When the file
+        contains more items than the cache has space for, only the newest
+        items are kept.
+
+        Returns:
+            True on success else False.
+
+        """
+        self.logger.debug("Importing cache from: %r", filename)
+
+        loaded_items = get_dict(filename)
+
+        if loaded_items is None:
+            return False
+
+        loaded_items = sorted(loaded_items.items(), key=lambda item: item[1][1])[-self._max_size:]
+
+        with self._transaction():
+            self._flush_touches()
+            self._execute("DELETE FROM items WHERE key = ?", [(key,) for key, _ in loaded_items], many=True)
+
+            self._execute("INSERT INTO items (key, value, timestamp, accessed, hits) VALUES (?, ?, ?, ?, 1)",
+                          [(key, json.dumps(obj), timestamp, timestamp) for key, (obj, timestamp) in loaded_items], many=True)
+
+            overflow = self._size() - self._max_size
+
+            if overflow > 0:
+                self.logger.warning("Cache reached max size while loading content")
+                self._execute("DELETE FROM items WHERE key IN (%s)" % self._victims_query(), (overflow,))
+
+        return True
+
+    def items(self):
+        """Returns list with (key, [obj, timestamp]) pairs."""
+        with self._lock:
+            rows = self._execute("SELECT key, value, timestamp FROM items").fetchall()
+
+        return [(key, [json.loads(value), timestamp]) for key, value, timestamp in rows]
+
+    def close(self):
+        """Write the buffered hits and close the database connection, the
+        next call opens a new one."""
+        with self._lock:
+            if self._connection is not None and self._pid == os.getpid():
+                self._flush_touches()
+                self._connection.close()
+
+            self._connection = None
+
+    def _connect(self):
+        """Open the database connection of the current process."""
+        self._connection = sqlite3.connect(self._filename, timeout=self._timeout, isolation_level=None, check_same_thread=False)
+        self._pid = os.getpid()
+
+        # The buffered hits of a parent process are not ours to write
+        self._touches = {}
+        self._touch_count = 0
+
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+
+        with self._transaction():
+            for statement in self._SCHEMA:
+                self._execute(statement)
+
+            if self._policy != "fifo":
+                column = self.POLICIES[self._policy]
+                self._execute("CREATE INDEX IF NOT EXISTS items_{0} ON items ({0})".format(column))
+
+    def _execute(self, statement, parameters=(), many=False):
+        # A forked child must not reuse the connection of its parent
+        if self._connection is None or self._pid != os.getpid():
+            self._connect()
+
+        if many:
+            return self._connection.executemany(statement, parameters)
+
+        return self._connection.execute(statement, parameters)
+
+    @contextmanager
+    def _transaction(self):
+        """Run the block in a write transaction, nested blocks join the outer one."""
+        with self._lock:
+            if self._in_transaction:
+                yield
+                return
+
+            self._execute("BEGIN IMMEDIATE")
+            self._in_transaction = True
+
+            try:
+                yield
+            except BaseException:
+                self._connection.rollback()
+                raise
+            else:
+                self._connection.commit()
+            finally:
+                self._in_transaction = False
+
+    def _touch(self, key, now):
+        """Buffer a cache hit of the key, see _flush_touches."""
+        touch = self._touches.setdefault(key, [now, 0])
+        touch[0] = now
+        touch[1] += 1
+
+        self._touch_count += 1
+
+        if self._touch_count >= self._TOUCH_BATCH:
+            self._flush_touches()
+
+    def _flush_touches(self):
+        """Write the buffered cache hits in a single transaction."""
+        with self._lock:
+            if not self._touches:
+                return
+
+            with self._transaction():
+                self._execute("UPDATE items SET accessed = MAX(accessed, ?), hits = hits + ? WHERE key = ?",
+                              [(accessed, hits, key) for key, (accessed, hits) in self._touches.iteritems()], many=True)
+
+            self._touches = {}
+            self._touch_count = 0
+
+    def _size(self):
+        return self._execute("SELECT value FROM meta WHERE name = 'size'").fetchone()[0]
+
+    def _victims_query(self):
+        """Returns query that selects the next N keys to evict."""
+        return "SELECT key FROM items ORDER BY %s, timestamp LIMIT ?" % self.POLICIES[self._policy]
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self._filename)
+
+    def __len__(self):
+        with self._lock:
+            return self._size()
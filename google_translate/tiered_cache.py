@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""Module that contains the two level cache object."""
+
+from __future__ import unicode_literals
+
+import Queue
+import logging
+import threading
+
+
+class TieredCache(object):
+
+    """Small in-memory cache in front of a large persistent cache.
+
+    Lookups try the L1 cache first and then the L2 cache, L2 hits are
+    promoted to the L1 cache. New items go to the L1 cache right away and
+    to the L2 cache from a background thread, so a slow L2 (e.g. a SQLite
+    file on a network disk) does not slow down the translations. Items that
+    wait for their L2 write are still visible to get.
+
+    Note that a promoted item gets a new timestamp in the L1 cache.
+
+    Examples:
+        Keep the 500 most recently used items in memory::
+
+            >>> from google_translate import GoogleTranslator
+            >>> from google_translate.cache import Cache
+            >>> from google_translate.sqlite_cache import SqliteCache
+            >>> from google_translate.tiered_cache import TieredCache
+
+            >>> l2_cache = SqliteCache('history.db', 10000000, 604800.0)
+            >>> translator = GoogleTranslator()
+            >>> translator.cache = TieredCache(translator.cache, l2_cache)
+
+            >>> translator.translate('dog', 'fr')
+            >>> translator.cache.close()   # Wait for the pending L2 writes
+
+    Args:
+        l1_cache (cache.Cache): The in-memory cache.
+
+        l2_cache (object): The persistent cache, any object with the get,
+            add, has and remove_old methods of the cache.Cache (e.g.
+            sqlite_cache.SqliteCache).
+
+        async_writes (boolean): When False the items are written to the L2
+            cache before add returns (default: True).
+
+        max_pending (int): Maximum number of items that wait for their L2
+            write, add blocks when the limit is reached (default: 10000).
+
+    """
+
+    def __init__(self, l1_cache, l2_cache, async_writes=True, max_pending=10000):
+        self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+        self.l1_cache = l1_cache
+        self.l2_cache = l2_cache
+
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+
+        self._queue = None
+        self._writer = None
+
+        if async_writes:
+            self._queue = Queue.Queue(max_pending)
+            self._writer = threading.Thread(target=self._write_items, args=(self._queue, self._pending, self._pending_lock, l2_cache, self.logger), name="TieredCacheWriter")
+            self._writer.daemon = True
+            self._writer.start()
+
+    def add(self, key, obj):
+        """Add the item to the L1 cache and write it through to the L2 cache."""
+        self.l1_cache.add(key, obj)
+
+        if self._queue is None:
+            self.l2_cache.add(key, obj)
+            return
+
+        with self._pending_lock:
+            self._pending[key] = obj
+
+        self._queue.put((key, obj))
+
+    def get(self, key):
+        """Get item from the L1 cache, the pending writes or the L2 cache.
+
+        Returns:
+            The item or None if no cache contains a valid item for the key.
+
+        """
+        obj = self.l1_cache.get(key)
+
+        if obj is not None:
+            return obj
+
+        with self._pending_lock:
+            obj = self._pending.get(key)
+
+        if obj is None:
+            obj = self.l2_cache.get(key)
+
+            if obj is None:
+                return None
+
+            self.logger.debug("Promoting key to L1: %r", key)
+
+        self.l1_cache.add(key, obj)
+        return obj
+
+    def has(self, key):
+        """Returns True if any of the caches contains the key else False."""
+        return self.l1_cache.has(key) or key in self._pending or self.l2_cache.has(key)
+
+    def remove_old(self):
+        """Remove the old items from both caches, returns the number removed."""
+        return self.l1_cache.remove_old() + self.l2_cache.remove_old()
+
+    def flush(self):
+        """Block until all the pending items are written to the L2 cache."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write the pending items and stop the writer thread."""
+        if self._queue is None:
+            return
+
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+
+        self._queue = None
+        self._writer = None
+
+    @staticmethod
+    def _write_items(queue, pending, pending_lock, l2_cache, logger):
+        """Writer thread, holds no reference to the TieredCache itself."""
+        while True:
+            item = queue.get()
+
+            try:
+                if item is None:
+                    return
+
+                key, obj = item
+
+                try:
+                    l2_cache.add(key, obj)
+                except Exception as error:
+                    logger.error("Could not write key %r to L2: %s", key, error)
+
+                with pending_lock:
+                    # A newer add of the same key is still queued
+                    if pending.get(key) is obj:
+                        del pending[key]
+            finally:
+                queue.task_done()
+
+    def __repr__(self):
+        return "%s(%r, %r)" % (self.__class__.__name__, self.l1_cache, self.l2_cache)
+
+    def __len__(self):
+        return len(self.l2_cache)
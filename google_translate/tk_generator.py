@@ -18,55 +18,65 @@ Usage:
         >>> import tk_generator
         >>> tk_generator.get_tk('dog')
 
+        >>> tk_generator.get_tk_batch(['dog', 'cat', 'house'])
+
+        >>> tk_generator.TK_MEMO.hits, tk_generator.TK_MEMO.misses
+
 Attributes:
+    TK_MEMO (TkMemo): Memo that get_tk uses to store the tk values.
+
     _ENCODING (string): Default encoding to be used during the string
         encode-decode process.
 
+    _MIN_BATCH_SIZE (int): Minimum number of words that get_tk_batch
+        processes with NumPy. Smaller batches go through the scalar code.
+
 """
 
-__all__ = ["get_tk"]
+__all__ = ["get_tk", "get_tk_batch", "TkMemo"]
 
+import re
 import sys
+import threading
+
+from collections import OrderedDict
 from datetime import datetime
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 _ENCODING = "UTF-8"
 
 
-# Helper functions
-def _mb_strlen(string):
-    """Get the length of the encoded string."""
-    return len(string.decode(_ENCODING))
+_MASK32 = 0xffffffff
 
+_MIN_BATCH_SIZE = 16
 
-def _mb_substr(string, start, length):
-    """Get substring from the encoded string."""
-    return string.decode(_ENCODING)[start: start + length]
+_FORMAT_TABLES = None
 
-##################################################
+# Characters that Google's algorithm does not encode as plain UTF-8
+if sys.maxunicode > 0xffff:
+    _NON_UTF8_PATTERN = re.compile(u"[\ud800-\udfff\U00010000-\U0010ffff]")
+else:
+    _NON_UTF8_PATTERN = re.compile(u"[\ud800-\udfff]")
 
 
+# Helper functions
 def _shr32(x, bits):
+    """Unsigned 32 bit right shift (the '>>>' javascript operator)."""
     if bits <= 0:
         return x
 
     if bits >= 32:
         return 0
 
-    x_bin = bin(x)[2:]
-    x_bin_length = len(x_bin)
-
-    if x_bin_length > 32:
-        x_bin = x_bin[x_bin_length - 32: x_bin_length]
-
-    if x_bin_length < 32:
-        x_bin = x_bin.zfill(32)
-
-    return int(x_bin[:32 - bits].zfill(32), 2)
+    return (x & _MASK32) >> bits
 
 
-def _char_code_at(string, index):
-    return ord(_mb_substr(string, index, 1))
+##################################################
 
 
 #OLD Function
@@ -84,37 +94,72 @@ def _TKK():
     return [406604, 1836941114]
 
 
-def _RL(a, b):
+def _compile_rl(b):
+    """Compile the RL op string into a tuple of (add, shift_right, bits) ops.
+
+    Each op is three characters long, e.g. '+-a' means add the value
+    shifted left by 10 bits and '^+6' means xor the value shifted right
+    by 6 bits.
+
+    """
+    ops = []
+
     for c in range(0, len(b) - 2, 3):
         d = b[c + 2]
 
         if d >= 'a':
-            d = _char_code_at(d, 0) - 87
+            d = ord(d) - 87
         else:
             d = int(d)
 
-        if b[c + 1] == '+':
-            d = _shr32(a, d)
+        ops.append((b[c] == '+', b[c + 1] == '+', d))
+
+    return tuple(ops)
+
+
+_RL_OPS = {}
+
+
+def _RL(a, b):
+    """Apply the RL op string (or the compiled ops) to a."""
+    if isinstance(b, basestring):
+        if b not in _RL_OPS:
+            _RL_OPS[b] = _compile_rl(b)
+
+        b = _RL_OPS[b]
+
+    for add, shift_right, bits in b:
+        if shift_right:
+            d = _shr32(a, bits)
         else:
-            d = a << d
+            d = a << bits
 
-        if b[c] == '+':
-            a = a + d & (pow(2, 32) - 1)
+        if add:
+            a = a + d & _MASK32
         else:
             a = a ^ d
 
     return a
 
 
-def _TL(a):
-    #b = _generateB()
-    tkk = _TKK()
-    b = tkk[0]
+def _get_bytes(string):
+    """Returns the byte values that the algorithm hashes for the string.
+
+    For most of the strings these are the UTF-8 bytes. Surrogates and
+    characters outside the BMP go through the original javascript port so
+    the output stays identical.
+
+    """
+    text = string.decode(_ENCODING)
+
+    if _NON_UTF8_PATTERN.search(text) is None:
+        return bytearray(string)
 
     d = []
+    length = len(text)
 
-    for f in range(0, _mb_strlen(a)):
-        g = _char_code_at(a, f)
+    for f in range(0, length):
+        g = ord(text[f])
 
         if g < 128:
             d.append(g)
@@ -123,11 +168,11 @@ def _TL(a):
                 d.append(g >> 6 | 192)
             else:
                 if ((g & 0xfc00) == 0xd800 and
-                        f + 1 < _mb_strlen(a) and
-                        (_char_code_at(a, f + 1) & 0xfc00) == 0xdc00):
+                        f + 1 < length and
+                        (ord(text[f + 1]) & 0xfc00) == 0xdc00):
 
                     f += 1
-                    g = 0x10000 + ((g & 0x3ff) << 10) + (_char_code_at(a, f) & 0x3ff)
+                    g = 0x10000 + ((g & 0x3ff) << 10) + (ord(text[f]) & 0x3ff)
 
                     d.append(g >> 18 | 240)
                     d.append(g >> 12 & 63 | 128)
@@ -137,11 +182,23 @@ def _TL(a):
 
             d.append(g & 63 | 128)
 
+    return d
+
+
+def _TL(a_string):
+    #b = _generateB()
+    tkk = _TKK()
+    b = tkk[0]
+
+    mask = _MASK32
+
     a = b
 
-    for e in range(0, len(d)):
-        a += d[e]
-        a = _RL(a, "+-a^+6")
+    for byte in _get_bytes(a_string):
+        # Inlined version of _RL(a, "+-a^+6")
+        a += byte
+        a = a + (a << 10) & mask
+        a ^= a >> 6
 
     a = _RL(a, "+-3^+b+-f")
 
@@ -155,12 +212,254 @@ def _TL(a):
     return "%d.%d" % (a, a ^ b)
 
 
+def _get_format_tables():
+    """Returns the (groups, low_dot, low_newline) uint32 tables.
+
+    Each entry holds the four bytes of a three digit group, '%03d' for the
+    entries 0-999 and '%3d' for the entries 1000-1999. The groups table
+    ends with a group of spaces and its entries end with a space, the
+    entries of the low tables end with the '.' or the newline separator.
+
+    """
+    global _FORMAT_TABLES
+
+    if _FORMAT_TABLES is None:
+        def table(fmt):
+            return numpy.frombuffer(b"".join(fmt % index for index in range(1000)), dtype=numpy.uint32)
+
+        _FORMAT_TABLES = (
+            numpy.concatenate([table(b"%03d "), table(b"%3d "), numpy.frombuffer(b"    ", dtype=numpy.uint32)]),
+            numpy.concatenate([table(b"%03d."), table(b"%3d.")]),
+            numpy.concatenate([table(b"%03d\n"), table(b"%3d\n")])
+        )
+
+    return _FORMAT_TABLES
+
+
+def _format_tk_batch(values, b):
+    """Vectorized '%d.%d' % (value, value ^ b) for each of the values.
+
+    Each number is split into three digit groups and each group is looked
+    up in the format tables, the groups before the first non zero group
+    are spaces. The bytes of all the numbers are then joined, stripped
+    from the spaces and split with a single string operation each.
+
+    """
+    numbers = numpy.empty(len(values) * 2, dtype=numpy.uint32)
+    numbers[0::2] = values
+    numbers[1::2] = values ^ numpy.uint32(b)
+
+    if len(numbers) and numbers.max() >= pow(10, 9):
+        return ["%d.%d" % (value, value ^ b) for value in values.tolist()]
+
+    groups, low_dot, low_newline = _get_format_tables()
+
+    high, low = numpy.divmod(numbers, numpy.uint32(1000))
+    high, middle = numpy.divmod(high, numpy.uint32(1000))
+
+    high_set = high > 0
+    leading_set = high_set | (middle > 0)
+
+    rows = numpy.empty((len(numbers), 3), dtype=numpy.uint32)
+    rows[:, 0] = groups.take(numpy.where(high_set, high + 1000, 2000))
+    rows[:, 1] = groups.take(numpy.where(high_set, middle, numpy.where(leading_set, middle + 1000, 2000)))
+
+    low_index = numpy.where(leading_set, low, low + 1000)
+    rows[0::2, 2] = low_dot.take(low_index[0::2])
+    rows[1::2, 2] = low_newline.take(low_index[1::2])
+
+    return rows.tostring().translate(None, b" ").split(b"\n")[:-1]
+
+
+def _join_words(words):
+    """Returns the words as one NUL separated UTF-8 string."""
+    try:
+        # A single encode for the whole batch
+        return u"\0".join(words).encode(_ENCODING)
+    except UnicodeDecodeError:
+        # Non ASCII encoded strings
+        return b"\0".join(word.encode(_ENCODING) if isinstance(word, unicode) else word for word in words)
+
+
+def _TL_batch(words):
+    """Vectorized _TL for a list of words.
+
+    The words are joined into one NUL separated uint8 buffer and each word
+    is a (start, end) offset pair into it. The words are sorted by length,
+    longest first, so at each byte position the words that still have
+    bytes form a prefix of the uint32 hash vector and every step of the
+    hash runs on that prefix at once. The uint32 arithmetic wraps around
+    just like the 32 bit masking of the scalar code.
+
+    Words that need the javascript port of _get_bytes (4 byte UTF-8
+    sequences and surrogates) and the few longest words once less than
+    _MIN_BATCH_SIZE of them are left go through the scalar code.
+
+    Args:
+        words (list): Unicode or UTF-8 encoded strings.
+
+    Returns:
+        List with the tk values in the order of the given words.
+
+    """
+    tkk = _TKK()
+    b = tkk[0]
+
+    count = len(words)
+    joined = _join_words(words)
+    data = numpy.frombuffer(joined, dtype=numpy.uint8) if joined else numpy.zeros(0, dtype=numpy.uint8)
+
+    separators = numpy.flatnonzero(data == 0)
+
+    if len(separators) != count - 1:
+        # NUL characters inside the words
+        return [_TL(word.encode(_ENCODING) if isinstance(word, unicode) else word) for word in words]
+
+    starts = numpy.concatenate([[0], separators + 1])
+    ends = numpy.concatenate([separators, [len(data)]])
+    lengths = ends - starts
+
+    # Lead bytes of 4 byte sequences and UTF-8 encoded surrogates (0xED 0xA0-0xBF)
+    special = numpy.flatnonzero(data >= 0xf0)
+
+    if len(data) > 1:
+        special = numpy.union1d(special, numpy.flatnonzero((data[1:] >= 0xa0) & (data[:-1] == 0xed)))
+
+    scalar_indexes = set(numpy.searchsorted(ends, special, side="right").tolist())
+
+    order = numpy.argsort(-lengths, kind="mergesort")
+    sorted_starts = starts[order]
+
+    # Number of words that are longer than each byte position
+    active_counts = numpy.searchsorted(-lengths[order], -numpy.arange(lengths.max()), side="left")
+
+    a = numpy.full(count, b, dtype=numpy.uint32)
+
+    for position, active in enumerate(active_counts.tolist()):
+        if active < _MIN_BATCH_SIZE:
+            scalar_indexes.update(order[:active].tolist())
+            break
+
+        # Vectorized version of _RL(a, "+-a^+6") for the current byte
+        head = a[:active]
+        head += data[sorted_starts[:active] + position]
+        head += head << numpy.uint32(10)
+        head ^= head >> numpy.uint32(6)
+
+    # Vectorized version of _RL(a, "+-3^+b+-f")
+    a += a << numpy.uint32(3)
+    a ^= a >> numpy.uint32(11)
+    a += a << numpy.uint32(15)
+
+    a ^= numpy.uint32(tkk[1])
+    a %= numpy.uint32(pow(10, 6))
+
+    values = numpy.empty_like(a)
+    values[order] = a
+
+    results = _format_tk_batch(values, b)
+
+    for index in scalar_indexes:
+        results[index] = _TL(joined[starts[index]:ends[index]])
+
+    return results
+
+
+class TkMemo(object):
+
+    """Thread safe bounded LRU memo for the tk values.
+
+    The tk value depends only on the text and the TKK seed, so the values
+    are stored under a (text, seed) key. When the seed changes all the
+    stored values are dropped.
+
+    Args:
+        max_size (int): Maximum number of values to store (default: 1024).
+
+    Attributes:
+        hits (int): Number of values found in the memo.
+
+        misses (int): Number of values that had to be computed.
+
+    """
+
+    def __init__(self, max_size=1024):
+        if max_size < 1:
+            raise ValueError(max_size)
+
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+        self._seed = None
+        self._values = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, word):
+        """Returns the tk value of the given encoded word."""
+        seed = tuple(_TKK())
+        key = (word, seed)
+
+        with self._lock:
+            if seed != self._seed:
+                self._values.clear()
+                self._seed = seed
+
+            value = self._values.pop(key, None)
+
+            if value is not None:
+                # Move it to the most recently used end
+                self._values[key] = value
+                self.hits += 1
+                return value
+
+            self.misses += 1
+
+        value = _TL(word)
+
+        with self._lock:
+            if seed == self._seed:
+                self._values[key] = value
+
+                if len(self._values) > self.max_size:
+                    self._values.popitem(last=False)
+
+        return value
+
+    def clear(self):
+        """Remove all the values and reset the counters."""
+        with self._lock:
+            self._values.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._values)
+
+
+TK_MEMO = TkMemo()
+
+
 def get_tk(word):
     """Returns the tk parameter for the given word."""
     if isinstance(word, unicode):
         word = word.encode(_ENCODING)
 
-    return _TL(word)
+    return TK_MEMO.get(word)
+
+
+def get_tk_batch(words):
+    """Returns list with the tk parameters for the given words.
+
+    Uses NumPy when it's available and there are at least _MIN_BATCH_SIZE
+    words, else it falls back to the scalar code.
+    The values do not go through the TK_MEMO, bulk jobs would only flush it.
+
+    """
+    if numpy is not None and len(words) >= _MIN_BATCH_SIZE:
+        return _TL_batch(words)
+
+    return [_TL(word.encode(_ENCODING) if isinstance(word, unicode) else word) for word in words]
 
 
 if __name__ == '__main__':
@@ -6,24 +6,20 @@
 Translators:
     GoogleTranslator
 
-Attributes:
-    _JSON_REPLACE_PATTERN (regexp): Regular expression to replace
-        contiguous commas.
-
 """
 
 from __future__ import unicode_literals
 
-import re
 import sys
-import copy
 import json
 import random
 import os.path
 import urllib2
 import logging
+import threading
 
-from time import sleep
+from time import sleep, time
+from multiprocessing.pool import ThreadPool
 
 try:
     from twodict import TwoWayOrderedDict
@@ -33,18 +29,20 @@ except ImportError as error:
 
 from .tk_generator import get_tk
 from .cache import Cache
+from .records import InfoRecord, thaw
+from .transport import Urllib2Transport
 from .utils import (
     display_unicode_item,
     get_absolute_path,
     load_from_file,
     quote_unicode,
-    make_request,
-    parse_reply
+    parse_reply,
+    parse_sparse_json,
+    RetryPolicy,
+    SingleFlight,
+    TokenBucket
 )
 
-_JSON_REPLACE_PATTERN = re.compile(r",(?=,)|\[,+")
-
-
 class GoogleTranslator(object):
 
     """Uses the Google translate API to provide different functionalities.
@@ -100,6 +98,9 @@ class GoogleTranslator(object):
         CACHE_VALID_PERIOD (float): Time period in seconds for which the cache
             items are valid.
 
+        CACHE_POLICY (string): Eviction policy of the cache, see the
+            google_translate.cache.POLICIES.
+
         DEFAULT_USERAGENT (string): Default user-agent to use when there is no
             'User-Agent' header in the _user_specific_headers and a ua_selector
             is not defined.
@@ -109,6 +110,14 @@ class GoogleTranslator(object):
 
         REQUEST_URL (string): Google translate API url template.
 
+        BATCH_SEPARATOR (string): Separator used to join multiple words into a
+            single request when 'batch_mode' is enabled.
+
+        BATCH_KEY_SUFFIX (string): Suffix of the cache keys of the info
+            dictionaries that come from a batch request. Those have no
+            additional translations, so only the callers that need the
+            translation, romanization or typo of the word accept them.
+
     Args:
         proxy_selector (ProxySelector): Object used to pick a proxy.
 
@@ -120,15 +129,64 @@ class GoogleTranslator(object):
 
         timeout (float): Socket timeout in seconds.
 
-        retries (int): Maximum attempts number before giving up.
+        retries (int): Maximum attempts number before giving up. Ignored when
+            a retry_policy is given.
 
-        wait_time (float): Time in seconds to wait between requests.
+        wait_time (float): Time in seconds to wait between requests. Unless a
+            rate_limiter is given, GoogleTranslator creates a TokenBucket that
+            allows one request every wait_time seconds. A wait_time of zero
+            or less disables the waits. Note that the waits only take place
+            between requests, cache hits are not throttled.
 
         random_wait (boolean): When True GoogleTranslator will wait a random
-            amount of seconds instead of using the wait_time.
+            amount of seconds between requests instead of using the wait_time.
+            The time passed since the last request counts towards the wait.
+            Can not be combined with a rate_limiter.
 
         encoding (string): Encoding to use during data encode-decode.
 
+        batch_mode (boolean): When True GoogleTranslator will pack multiple
+            words into a single request when processing a list of words.
+            Batch mode is only used by translate (without additional
+            translations), romanize and word_exists since Google returns the
+            additional translations and the detected language per request
+            and not per word. For the same reason the words are only packed
+            when the source language is not 'auto'.
+
+        max_workers (int): Maximum number of threads to use when processing a
+            list of words. When None or less than two the words are processed
+            one after another.
+
+        connection_pool (utils.ConnectionPool): When set the requests are sent
+            over keep-alive connections from the given pool. The same pool can
+            be shared between multiple translators. Ignored when a transport
+            is given.
+
+        rate_limiter (utils.TokenBucket): Rate limiter to charge for each
+            request. The same limiter can be shared between multiple threads
+            and translators in order to apply a global request rate.
+
+        retry_policy (utils.RetryPolicy): Policy that decides when a failed
+            request is retried. When None a RetryPolicy with the given
+            retries is used.
+
+        transport (transport.Transport): Object that sends the requests. When
+            None a transport.Urllib2Transport is used.
+
+        offline (boolean): When True GoogleTranslator answers only from the
+            cache and never sends a request, words that are not cached
+            fail right away.
+
+        cache (object): Object that stores the info dictionaries, any object
+            with the get, add, has and remove_old methods of the cache.Cache
+            (e.g. tiered_cache.TieredCache or shared_cache.CacheProxy). The
+            same cache can be shared between multiple translators. When None
+            a Cache with the MAX_CACHE_SIZE, CACHE_VALID_PERIOD and
+            CACHE_POLICY is used.
+
+    Raises:
+        ValueError: When both random_wait and rate_limiter are given.
+
     """
 
     LANGUAGES_DB = os.path.join(get_absolute_path(__file__), "data", "languages")
@@ -139,6 +197,7 @@ class GoogleTranslator(object):
 
     MAX_CACHE_SIZE = 500
     CACHE_VALID_PERIOD = 604800.0  # one week
+    CACHE_POLICY = "lru"
 
     DEFAULT_USERAGENT = "Mozilla/5.0"
 
@@ -146,22 +205,59 @@ class GoogleTranslator(object):
 
     REQUEST_URL = "{prot}://{host}/translate_a/single?{params}"
 
+    BATCH_SEPARATOR = "\n"
+
+    BATCH_KEY_SUFFIX = ":batch"
+
     def __init__(self, proxy_selector=None, ua_selector=None, simulate=False, https=True,
-                 timeout=10.0, retries=5, wait_time=1.0, random_wait=False, encoding="UTF-8"):
+                 timeout=10.0, retries=5, wait_time=1.0, random_wait=False, encoding="UTF-8",
+                 batch_mode=False, max_workers=None, connection_pool=None, rate_limiter=None,
+                 retry_policy=None, transport=None, offline=False, cache=None):
         self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
 
         # Parse args
         self._https = https
         self._timeout = timeout
-        self._retries = retries
         self._encoding = encoding
+        self._max_workers = max_workers
         self._simulate = simulate
+        self._offline = offline
         self._wait_time = wait_time
+        self._batch_mode = batch_mode
         self._random_wait = random_wait
         self._ua_selector = ua_selector
         self._proxy_selector = proxy_selector
 
-        self.cache = Cache(self.MAX_CACHE_SIZE, self.CACHE_VALID_PERIOD)
+        if transport is None:
+            transport = Urllib2Transport(connection_pool)
+
+        self._transport = transport
+
+        if random_wait and rate_limiter is not None:
+            raise ValueError(rate_limiter)
+
+        if rate_limiter is None and not random_wait and wait_time > 0:
+            rate_limiter = TokenBucket(1.0 / wait_time)
+
+        if retry_policy is None:
+            retry_policy = RetryPolicy(retries)
+
+        self._retries = retry_policy.retries
+        self._retry_policy = retry_policy
+
+        self._single_flight = SingleFlight()
+
+        # Holds the retry budget of the list the current thread works on
+        self._local = threading.local()
+
+        self._rate_limiter = rate_limiter
+        self._last_request = None
+        self._throttle_lock = threading.Lock()
+
+        if cache is None:
+            cache = Cache(self.MAX_CACHE_SIZE, self.CACHE_VALID_PERIOD, self.CACHE_POLICY)
+
+        self.cache = cache
 
         # Set up default headers
         if https:
@@ -172,7 +268,7 @@ class GoogleTranslator(object):
         self._default_headers = {
             "Accept": "*/*",
             "Referer": referer,
-            "Connection": "close",
+            "Connection": "close" if getattr(transport, "pool", None) is None else "keep-alive",
             "Host": self.DOMAIN_NAME,
             "Accept-Language": "en-US,en;q=0.8",
             "Accept-Encoding": "gzip, deflate, sdch",
@@ -312,7 +408,10 @@ class GoogleTranslator(object):
     def get_info_dict(self, word, dst_lang, src_lang="auto", output="text"):
         """Returns the information dictionary for the given word.
 
-        For a list with available dictionary keys, see _extract_data method.
+        For a list with available dictionary keys, see docs/api.rst. With the
+        'text' output the info dictionary is a records.InfoRecord, an
+        immutable mapping shared with the translator cache. The 'dict' and
+        'json' outputs contain mutable copies.
 
         Args:
             word (string - list<string>): Word(s) to process.
@@ -345,20 +444,375 @@ class GoogleTranslator(object):
 
         """
         if isinstance(args[0], list):
-            results_list = []
-
             for word in args[0]:
                 self._validate_word(word)
-                results_list.append(func(word, *args[1:-1]))
 
-                if word != args[0][-1]:
-                    self._wait()
+            # Phase one, answer the cached words right away and
+            # collect the distinct words that need a request
+            results_dict = {}
+            missing_words = []
+
+            for word in args[0]:
+                if word in results_dict:
+                    continue
+
+                if self._is_cached(func, word, *args[1:-1]):
+                    results_dict[word] = func(word, *args[1:-1])
+                else:
+                    results_dict[word] = None
+                    missing_words.append(word)
+
+            self.logger.debug("Cached words: (%s) Missing words: (%s)",
+                              len(results_dict) - len(missing_words), len(missing_words))
+
+            # Phase two, schedule only the missing words
+            if self._batch_mode and self._can_batch(func, *args[1:-1]):
+                lang_pair = self._get_lang_pair(func, *args[1:-1])
+                missing_results = self._do_batch_work(func, lang_pair, missing_words, *args[1:-1])
+            else:
+                missing_results = self._map(lambda word: func(word, *args[1:-1]), missing_words)
+
+            results_dict.update(zip(missing_words, missing_results))
+            results_list = [results_dict[word] for word in args[0]]
 
             return self._convert_output(args[0], results_list, args[-1])
 
         self._validate_word(args[0])
         return self._convert_output(args[0], func(*args[:-1]), args[-1])
 
+    def _do_batch_work(self, func, lang_pair, words, *args):
+        """Run the given function for each word using batch requests.
+
+        Packs the given words into batches, fetches the info dictionaries of
+        each batch with a single request and stores them in the cache. Then
+        func runs for each word and picks its info dictionary from the cache.
+        If a batch reply can not be split back into words, func falls back to
+        a single request for each word of the batch.
+
+        Args:
+            func (function): Function to run (see _do_work).
+
+            lang_pair (tuple): (dst_lang, src_lang) pair used by func.
+
+            words (list<string>): Words to process.
+
+            args (tuple): Extra arguments of func.
+
+        Returns:
+            List with the func results in the same order as the given words.
+
+        """
+        def process_batch(batch):
+            """Run func for each word of the given batch."""
+            self._get_batch_info(batch, *lang_pair)
+
+            return [func(word, *args) for word in batch]
+
+        results_list = []
+
+        for batch_results in self._map(process_batch, self._split_batches(words)):
+            results_list.extend(batch_results)
+
+        return results_list
+
+    def _map(self, function, items):
+        """Apply function to every item of the given list.
+
+        When max_workers is greater than one the items are processed
+        concurrently by a thread pool, else they are processed one after
+        another. There is no wait between the items, the requests are
+        throttled by the rate limiter (see _throttle method).
+
+        All the requests sent while processing the items share the same
+        retry budget (see utils.RetryPolicy.create_budget method).
+
+        Returns:
+            List with the function results in the same order as the items.
+
+        """
+        retry_budget = self._retry_policy.create_budget(len(items))
+
+        def work(item):
+            """Process the item under the shared retry budget."""
+            self._local.retry_budget = retry_budget
+
+            try:
+                return function(item)
+            finally:
+                self._local.retry_budget = None
+
+        if self._max_workers is None or self._max_workers < 2 or len(items) < 2:
+            return [work(item) for item in items]
+
+        workers = min(self._max_workers, len(items))
+        self.logger.debug("Thread pool workers: (%s)", workers)
+
+        pool = ThreadPool(workers)
+
+        try:
+            return pool.map(work, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    def _get_lang_pair(self, func, *args):
+        """Returns the (dst_lang, src_lang) pair that func uses.
+
+        Returns None when the given func with the given args does not
+        need an info dictionary or when func is unknown.
+
+        """
+        if func == self._translate:
+            dst_lang, src_lang = args[:2]
+
+            if dst_lang == src_lang:
+                return None
+
+            return dst_lang, src_lang
+
+        if func == self._get_info:
+            return args[0], args[1]
+
+        if func == self._romanize:
+            return "en", args[0]
+
+        if func == self._detect:
+            return "en", "auto"
+
+        if func == self._word_exists:
+            return self._get_pair_lang(args[0]), args[0]
+
+        return None
+
+    def _can_batch(self, func, *args):
+        """Returns True if func can use batch requests else False.
+
+        Google returns the additional translations and the detected language
+        per request and not per word, so only the functions that do not
+        depend on them can use batch requests. The words of a batch with an
+        'auto' source language would all be cached with the language of the
+        whole batch, under the same keys that detect reads.
+
+        """
+        if func == self._translate:
+            dst_lang, src_lang, additional = args
+            return not additional and dst_lang != src_lang and src_lang != "auto"
+
+        if func == self._romanize or func == self._word_exists:
+            return args[0] != "auto"
+
+        return False
+
+    def _is_cached(self, func, word, *args):
+        """Returns True if func can process the word without a request."""
+        if func == self._translate and args[0] == args[1]:
+            return True
+
+        lang_pair = self._get_lang_pair(func, *args)
+
+        if lang_pair is None:
+            return False
+
+        cache_key = word + lang_pair[0] + lang_pair[1]
+
+        if self.cache.get(cache_key) is not None:
+            return True
+
+        return self._accepts_partial(func, *args) and self.cache.get(cache_key + self.BATCH_KEY_SUFFIX) is not None
+
+    def _accepts_partial(self, func, *args):
+        """Returns True if func can use the info dictionary of a batch request."""
+        if func == self._translate:
+            # The additional translations are not part of the batch replies
+            return not args[2]
+
+        return func == self._romanize or func == self._word_exists
+
+    def _split_batches(self, words):
+        """Split the given words into batches.
+
+        Each batch contains as many words as possible without exceeding the
+        MAX_INPUT_SIZE. Words that contain the BATCH_SEPARATOR always go
+        into a batch of their own.
+
+        Returns:
+            List of lists with words.
+
+        """
+        separator_length = len(quote_unicode(self.BATCH_SEPARATOR, self._encoding))
+
+        batches = []
+        batch_length = 0
+
+        for word in words:
+            word_length = len(quote_unicode(word, self._encoding))
+
+            if (batches and
+                    self.BATCH_SEPARATOR not in word and
+                    self.BATCH_SEPARATOR not in batches[-1][-1] and
+                    batch_length + separator_length + word_length < self.MAX_INPUT_SIZE):
+
+                batches[-1].append(word)
+                batch_length += separator_length + word_length
+            else:
+                batches.append([word])
+                batch_length = word_length
+
+        return batches
+
+    def _get_batch_info(self, words, dst_lang, src_lang):
+        """Fetch and cache the info dictionaries for the given words.
+
+        Only the words that are not already in the cache are sent to Google.
+
+        Returns:
+            True if the info dictionaries of all the words are available
+            in the cache else False.
+
+        """
+        missing_words = []
+
+        for word in words:
+            cache_key = word + dst_lang + src_lang
+
+            if (word not in missing_words and
+                    self.cache.get(cache_key) is None and
+                    self.cache.get(cache_key + self.BATCH_KEY_SUFFIX) is None):
+
+                missing_words.append(word)
+
+        if len(missing_words) < 2:
+            # Nothing to pack, let func handle it
+            return True
+
+        if self._offline:
+            self.logger.info("Offline mode, (%s) words not in cache", len(missing_words))
+            return False
+
+        self.logger.info("Sending batch request for (%s) words", len(missing_words))
+
+        text = self.BATCH_SEPARATOR.join(missing_words)
+        reply = self._try_make_request(self._build_request(text, dst_lang, src_lang))
+
+        if reply is None:
+            return False
+
+        json_data = self._string_to_json(parse_reply(reply, self._encoding))
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("JSON data: %s\n", display_unicode_item(json_data))
+
+        json_list = self._split_batch_reply(json_data, missing_words)
+
+        if json_list is None:
+            self.logger.warning("Could not split the batch reply")
+            return False
+
+        # The records lack the additional translations, keep them apart
+        # from the info dictionaries of the single word requests
+        for index, word in enumerate(missing_words):
+            self.cache.add(word + dst_lang + src_lang + self.BATCH_KEY_SUFFIX, self._extract_data(json_list[index]))
+
+        return True
+
+    def _split_batch_reply(self, json_data, words):
+        """Split the reply of a batch request into per word json lists.
+
+        Google splits the given text into segments on the BATCH_SEPARATOR.
+        Each per word json list contains the segments of the word, the
+        romanization and typo parts of the word and the src_lang and match
+        values of the whole batch, so it can be processed by _extract_data.
+
+        Returns:
+            List with one json list per word or None if the reply does not
+            match the given words.
+
+        """
+        if not isinstance(json_data, list) or not json_data or not isinstance(json_data[0], list):
+            return None
+
+        def get_item(data_list, index):
+            """Returns the item on the index or None."""
+            try:
+                return data_list[index]
+            except (IndexError, TypeError):
+                return None
+
+        segments_list = [[]]
+        romanization = None
+
+        for segment in json_data[0]:
+            if not isinstance(get_item(segment, 4), int):
+                romanization = segment
+                continue
+
+            if segment[1].endswith(self.BATCH_SEPARATOR):
+                segment = [segment[0].rstrip(self.BATCH_SEPARATOR), segment[1].rstrip(self.BATCH_SEPARATOR)] + segment[2:]
+                segments_list[-1].append(segment)
+                segments_list.append([])
+            else:
+                segments_list[-1].append(segment)
+
+        if not segments_list[-1]:
+            segments_list.pop()
+
+        if len(segments_list) != len(words):
+            return None
+
+        # Split the romanization of the target & source text
+        dst_romanization = [None] * len(words)
+        src_romanization = [None] * len(words)
+
+        if get_item(romanization, 2):
+            dst_romanization = romanization[2].split(self.BATCH_SEPARATOR)
+
+        if get_item(romanization, 3):
+            src_romanization = romanization[3].split(self.BATCH_SEPARATOR)
+
+        if len(dst_romanization) != len(words) or len(src_romanization) != len(words):
+            return None
+
+        # Split the typo corrections
+        typos = [None] * len(words)
+
+        if get_item(json_data, 7):
+            corrections = get_item(json_data[7], 1)
+
+            if not isinstance(corrections, basestring):
+                return None
+
+            corrections = corrections.split(self.BATCH_SEPARATOR)
+
+            if len(corrections) != len(words):
+                return None
+
+            for index, word in enumerate(words):
+                if corrections[index].strip() != word.strip():
+                    typos[index] = [corrections[index], corrections[index]]
+
+        src_lang = get_item(json_data, 2) or ""
+
+        match = get_item(json_data, 6)
+
+        if match is None:
+            match = 1.0
+
+        json_list = []
+
+        for index in range(len(words)):
+            json_list.append([
+                segments_list[index] + [[None, None, dst_romanization[index], src_romanization[index]]],
+                None,
+                src_lang,
+                None,
+                None,
+                None,
+                match,
+                typos[index]
+            ])
+
+        return json_list
+
     def _convert_output(self, word, output, output_type):
         """Convert the output to the appropriate format.
 
@@ -377,6 +831,10 @@ class GoogleTranslator(object):
         if output_type == "text":
             return output
 
+        # The shared immutable values are copied only when the caller asks
+        # for mutable dictionaries
+        output = thaw(output)
+
         if isinstance(word, list):
             temp_dict = dict(zip(word, output))
         else:
@@ -450,15 +908,10 @@ class GoogleTranslator(object):
         """Checks if the given word is a valid word in src_lang."""
         self.logger.info("Searching for word: %r", word)
 
-        # Get a destination language different than source
-        dst_lang = src_lang
-        for lang_code in self._lang_dict.values():
-            if lang_code != "auto" and lang_code != src_lang:
-                dst_lang = lang_code
-                break
+        dst_lang = self._get_pair_lang(src_lang)
 
         self.logger.debug("src_lang: %r dst_lang: %r", src_lang, dst_lang)
-        data = self._get_info(word, dst_lang, src_lang)
+        data = self._get_info(word, dst_lang, src_lang, True)
 
         if data is not None:
             if data["original_text"] == data["translation"]:
@@ -468,12 +921,20 @@ class GoogleTranslator(object):
 
         return None
 
+    def _get_pair_lang(self, src_lang):
+        """Returns a destination language different than the src_lang."""
+        for lang_code in self._lang_dict.values():
+            if lang_code != "auto" and lang_code != src_lang:
+                return lang_code
+
+        return src_lang
+
     def _romanize(self, word, src_lang):
         """Romanize the given word."""
         self.logger.info("Romanizing word: %r", word)
 
         self.logger.debug("src_lang: %r", src_lang)
-        data = self._get_info(word, "en", src_lang)
+        data = self._get_info(word, "en", src_lang, True)
 
         if data is not None:
             if not data["has_typo"]:
@@ -504,7 +965,7 @@ class GoogleTranslator(object):
         if dst_lang == src_lang:
             return word
 
-        data = self._get_info(word, dst_lang, src_lang)
+        data = self._get_info(word, dst_lang, src_lang, not additional)
 
         if data is not None:
             if not data["has_typo"]:
@@ -515,9 +976,14 @@ class GoogleTranslator(object):
 
         return None
 
-    def _get_info(self, word, dst_lang, src_lang):
+    def _get_info(self, word, dst_lang, src_lang, partial=False):
         """Get the info dictionary for the given word.
 
+        Args:
+            partial (boolean): When True the info dictionary of a batch
+                request is also accepted (see BATCH_KEY_SUFFIX), else the
+                word is requested on its own (default: False).
+
         Returns:
             Info dictionary, see _extract_data method for a list with valid keys.
 
@@ -527,8 +993,33 @@ class GoogleTranslator(object):
         cache_key = word + dst_lang + src_lang
         info_dict = self.cache.get(cache_key)
 
+        if info_dict is None and partial:
+            info_dict = self.cache.get(cache_key + self.BATCH_KEY_SUFFIX)
+
+        if info_dict is None:
+            # Concurrent misses for the same key share a single request
+            info_dict = self._single_flight.do(cache_key, self._fetch_info, cache_key, word, dst_lang, src_lang)
+
+        # The cached values are immutable, records.InfoRecord objects or
+        # the frozen dictionaries that the cache stores decode, share them
+        return info_dict
+
+    def _fetch_info(self, cache_key, word, dst_lang, src_lang):
+        """Request the info dictionary for the given word and cache it.
+
+        Returns:
+            Info dictionary or None if an error occurs.
+
+        """
+        # Another caller might have cached it while we were waiting
+        info_dict = self.cache.get(cache_key)
+
         if info_dict is not None:
-            return copy.deepcopy(info_dict)
+            return info_dict
+
+        if self._offline:
+            self.logger.info("Offline mode, word not in cache: %r", word)
+            return None
 
         reply = self._try_make_request(self._build_request(word, dst_lang, src_lang))
 
@@ -539,13 +1030,14 @@ class GoogleTranslator(object):
             self.logger.debug("Raw data: %s\n", data)
 
             json_data = self._string_to_json(data)
-            self.logger.debug("JSON data: %s\n", display_unicode_item(json_data))
+
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("JSON data: %s\n", display_unicode_item(json_data))
 
             info_dict = self._extract_data(json_data)
-            self.logger.debug("Extracted data: %s\n", display_unicode_item(info_dict))
 
             self.cache.add(cache_key, info_dict)
-            return copy.deepcopy(info_dict)
+            return info_dict
 
         return None
 
@@ -593,40 +1085,92 @@ class GoogleTranslator(object):
         return request_url
 
     def _try_make_request(self, request_url):
-        """Try to make the request and return the reply or None."""
+        """Try to make the request and return the reply or None.
+
+        The retry_policy decides if and when a failed request is retried.
+        Proxies that fail with a connection error are removed from the
+        proxy selector.
+
+        """
+        retry_budget = getattr(self._local, "retry_budget", None)
         current_attempt = 1
 
-        while current_attempt <= self._retries:
+        while True:
             self.logger.info("Attempt no. %s out of %s", current_attempt, self._retries)
 
             proxy = self._get_proxy()
+            headers = self._get_headers()
+
+            self.logger.debug("Headers: %r", headers)
+            self.logger.debug("Proxy: %r", proxy)
+
+            if self._simulate:
+                self.logger.info("Running in simulate mode no request will be sent")
+                return None
+
+            self._throttle()
 
             try:
-                return make_request(request_url, self._get_headers(), proxy, self._timeout, self._simulate)
+                return self._transport.request(request_url, headers, proxy, self._timeout)
             except (urllib2.HTTPError, urllib2.URLError, IOError) as error:
                 self.logger.error("Error %s", error)
 
-                if proxy is not None and self._proxy_selector is not None:
+                if (proxy is not None and
+                        self._proxy_selector is not None and
+                        self._retry_policy.is_connection_error(error)):
                     self._proxy_selector.remove_proxy(proxy)
 
-            if current_attempt < self._retries:
-                self._wait()
+                delay = self._retry_policy.get_delay(current_attempt, error)
 
-            current_attempt += 1
+            if delay is None:
+                self.logger.warning("Giving up after (%s) attempts", current_attempt)
+                return None
 
-        self.logger.warning("Maximum attempts reached")
+            if retry_budget is not None and not retry_budget.withdraw():
+                self.logger.warning("Retry budget exhausted")
+                return None
 
-        return None
+            self.logger.debug("Retry delay (seconds): (%.1f)", delay)
+            sleep(delay)
 
-    def _wait(self):
-        """Wait for a period of time."""
+            current_attempt += 1
+
+    def _wait(self, elapsed=0.0):
+        """Wait for a period of time minus the elapsed seconds."""
         wait_time = self._wait_time
 
         if self._random_wait:
             wait_time = random.uniform(self.WAIT_MIN, self.WAIT_MAX)
 
-        self.logger.debug("Sleep time (seconds): (%.1f)", wait_time)
-        sleep(wait_time)
+        wait_time -= elapsed
+
+        if wait_time > 0:
+            self.logger.debug("Sleep time (seconds): (%.1f)", wait_time)
+            sleep(wait_time)
+
+    def _throttle(self):
+        """Block until a new request can be sent.
+
+        When random_wait is enabled a random wait (see _wait method) takes
+        place between the requests, less the time passed since the last
+        request, else the rate limiter is charged with one token for each
+        request. The waits hold the throttle lock, so the worker threads
+        send their requests one by one.
+
+        """
+        if self._rate_limiter is not None:
+            waited = self._rate_limiter.consume()
+            self.logger.debug("Throttle time (seconds): (%.1f)", waited)
+            return
+
+        if not self._random_wait and self._wait_time <= 0:
+            return
+
+        with self._throttle_lock:
+            if self._last_request is not None:
+                self._wait(time() - self._last_request)
+
+            self._last_request = time()
 
     def _get_proxy(self):
         """Return proxy using the proxy selector."""
@@ -655,107 +1199,39 @@ class GoogleTranslator(object):
         """Extracts and filters the data from the json_list.
 
         Returns:
-            Python dictionary.
+            records.InfoRecord that extracts each key of the info dictionary
+            the first time it is accessed.
 
         """
-        EXTRA_KEYS = {1: "nouns", 2: "verbs", 3: "adjectives", 4: "adverbs", 5: "prepositions"}
-
-        data_dict = {
-            "original_text": "",
-            "romanization": "",
-            "translation": "",
-            "has_typo": False,
-            "src_lang": "",
-            "extra": {},
-            "match": 1.0
-        }
-
-        if not isinstance(json_list, list):
-            return data_dict
-
-        # Extract the basic ones
-        try:
-            data_dict["romanization"] = json_list[0][-1][3]
-        except IndexError:
-            pass
-
-        try:
-            data_dict["src_lang"] = json_list[2]
-        except IndexError:
-            pass
-
-        try:
-            data_dict["match"] = json_list[6]
-        except IndexError:
-            pass
-
-        try:
-            # When that thing is set it contains the word spelled right?!
-            data_dict["has_typo"] = True if json_list[7] else False
-        except IndexError:
-            pass
-
-        # Extract translation & original text
-        try:
-            translation = []
-            original_text = []
-
-            translation_list = json_list[0]
-
-            # Exclude the romanization entry
-            if len(translation_list) > 1:
-                translation_list = json_list[0][:-1]
+        return InfoRecord(json_list)
 
-            for item in translation_list:
-                if isinstance(item[4], int):
-                    translation.append(item[0])
-                    original_text.append(item[1])
-
-            data_dict["translation"] = ''.join(translation)
-            data_dict["original_text"] = ''.join(original_text)
-        except IndexError:
-            pass
-
-        # Extract extra translations
-        try:
-            if json_list[1] is not None:
-                for item in json_list[1]:
-                    item_type = item[-1]
-
-                    if item_type in EXTRA_KEYS:
-                        dest_key = EXTRA_KEYS[item_type]
-                    else:
-                        continue
-
-                    temp_dict = {}
-                    for extra_trans in item[2]:
-                        temp_dict[extra_trans[0]] = extra_trans[1]
-
-                    data_dict["extra"][dest_key] = temp_dict
-        except IndexError:
-            pass
-
-        # Apply filters
-        if not data_dict["romanization"] or data_dict["src_lang"] == "en":
-            data_dict["romanization"] = data_dict["original_text"]
+    def _string_to_json(self, data_string):
+        """Parse Google translate reply string to json list.
 
-        return data_dict
+        The elided elements of the reply are filled with empty strings using
+        plain string replacements and the result goes to json.loads. The
+        gain over the older regex callback shrinks as json.loads takes over
+        the parse time, bench_micro.py measures about 30-35% on the short
+        replies and only 10-15% on the long one. Filling a comma inside a
+        string always breaks the json syntax, so for those rare replies the
+        utils.parse_sparse_json parser takes over.
 
-    def _string_to_json(self, data_string):
-        """Parse Google translate reply string to json list."""
+        """
         if not isinstance(data_string, basestring):
             return None
 
-        def replace_func(mobj):
-            """Replace the multiple commas in the json reply."""
-            if '[' in mobj.group(0):
-                return '[' + '"",' * mobj.group(0).count(',')
-            return ',""'
+        valid_data = data_string.replace('[,', '["",')
 
-        valid_data = _JSON_REPLACE_PATTERN.sub(replace_func, data_string)
+        while ',,' in valid_data:
+            valid_data = valid_data.replace(',,', ',"",')
+
+        try:
+            return json.loads(valid_data)
+        except ValueError as error:
+            self.logger.debug("Fast parse failed <%s>", error)
 
         try:
-            json_data = json.loads(valid_data)
+            json_data = parse_sparse_json(data_string)
         except ValueError as error:
             self.logger.error("Error <%s>", error)
             return None
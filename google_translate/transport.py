@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+"""Contains the transport objects.
+
+Transports send the HTTP requests on behalf of the translators and the
+selectors. Every transport implements the same request method, so they can
+be swapped without changing the objects that use them.
+
+Transports:
+    Transport, Urllib2Transport, LocalTransport
+
+"""
+
+from __future__ import unicode_literals
+
+import logging
+import urlparse
+
+from .utils import make_request
+
+
+class Transport(object):
+
+    """Base class of the transports.
+
+    Subclasses must implement the request method.
+
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__ + "." + self.__class__.__name__)
+
+    def request(self, url, headers=None, proxy=None, timeout=10.0):
+        """Make a GET request to the given url.
+
+        Args:
+            url (string): URL string.
+
+            headers (list): List that contains ('header', 'value') pairs.
+
+            proxy (string): Proxy string in the 'ip:port' format.
+
+            timeout (float): Socket timeout in seconds (default: 10.0).
+
+        Returns:
+            File like object with the reply.
+
+        Raises:
+            urllib2.HTTPError, urllib2.URLError, IOError
+
+        """
+        raise NotImplementedError()
+
+
+class Urllib2Transport(Transport):
+
+    """Send the requests using the utils.make_request function.
+
+    Args:
+        pool (utils.ConnectionPool): When set the requests are sent over
+            keep-alive connections from the given pool (default: None).
+
+    """
+
+    def __init__(self, pool=None):
+        super(Urllib2Transport, self).__init__()
+        self.pool = pool
+
+    def request(self, url, headers=None, proxy=None, timeout=10.0):
+        return make_request(url, headers, proxy, timeout, pool=self.pool)
+
+
+class LocalTransport(Urllib2Transport):
+
+    """Send all the requests to a local server.
+
+    LocalTransport replaces the scheme and the host of each url with the
+    ones of the given server url and keeps the rest of the request as is.
+    It is meant to be used with the fake_server.FakeGoogleServer in order
+    to run the translators without network access.
+
+    Examples:
+        Translate using a local fake server::
+
+            >>> from google_translate import GoogleTranslator
+            >>> from google_translate.fake_server import FakeGoogleServer
+
+            >>> with FakeGoogleServer() as server:
+            ...     translator = GoogleTranslator(transport=server.get_transport())
+            ...     translator.translate("dog", "fr")
+
+    Args:
+        server_url (string): Base url of the local server
+            (e.g. 'http://127.0.0.1:8080').
+
+        pool (utils.ConnectionPool): See Urllib2Transport.
+
+    """
+
+    def __init__(self, server_url, pool=None):
+        super(LocalTransport, self).__init__(pool)
+
+        server_parts = urlparse.urlsplit(server_url)
+
+        self._scheme = server_parts.scheme
+        self._netloc = server_parts.netloc
+
+    def request(self, url, headers=None, proxy=None, timeout=10.0):
+        url_parts = urlparse.urlsplit(url)
+        local_url = urlparse.urlunsplit((self._scheme, self._netloc) + tuple(url_parts[2:]))
+
+        self.logger.debug("Local url: %r", local_url)
+
+        return super(LocalTransport, self).request(local_url, headers, proxy, timeout)
@@ -14,16 +14,29 @@ Attributes:
 from __future__ import unicode_literals
 
 import os
+import re
 import json
+import time
+import random
+import socket
 import locale
+import httplib
 import urllib2
 import logging
+import urlparse
+import threading
 
 from gzip import GzipFile
 from cStringIO import StringIO
+from json.decoder import scanstring
+from email.utils import parsedate_tz, mktime_tz
 
 MODULE_LOGGER = logging.getLogger(__name__)
 
+_SPARSE_TOKEN_PATTERN = re.compile(r'[ \t\n\r]*(?:(")|(\[)|(\])|(,)|(-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?)|(true|false|null))')
+
+_SPARSE_LITERALS = {"true": True, "false": False, "null": None}
+
 
 def decode_string(string, encoding=None):
     """Decode string back to unicode.
@@ -90,7 +103,576 @@ def ungzip_stream(stream):
         return stream
 
 
-def make_request(url, headers=None, proxy=None, timeout=10.0, simulate=False):
+class PooledResponse(object):
+
+    """File like object that wraps a reply from a pooled connection.
+
+    When the reply is closed after its body has been fully read the
+    underlying connection goes back to the ConnectionPool for reuse,
+    else the connection is closed.
+
+    Args:
+        pool (ConnectionPool): Pool that owns the connection.
+
+        key (tuple): Pool key of the connection.
+
+        connection (httplib.HTTPConnection): Connection used for the request.
+
+        response (httplib.HTTPResponse): Reply to wrap.
+
+    """
+
+    def __init__(self, pool, key, connection, response):
+        self._key = key
+        self._pool = pool
+        self._response = response
+        self._connection = connection
+
+    def read(self, amt=None):
+        return self._response.read(amt)
+
+    def info(self):
+        return self._response.msg
+
+    def getcode(self):
+        return self._response.status
+
+    @property
+    def reason(self):
+        return self._response.reason
+
+    def close(self):
+        if self._connection is None:
+            return
+
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool.release(self._key, self._connection)
+        else:
+            self._response.close()
+            self._connection.close()
+
+        self._connection = None
+
+
+class ConnectionPool(object):
+
+    """Keep HTTP/1.1 connections alive between requests.
+
+    ConnectionPool stores idle connections keyed by (scheme, host, proxy)
+    and reuses them for later requests to the same target in order to avoid
+    a new TCP & TLS handshake for each request. The pool is thread safe and
+    can be shared between multiple objects.
+
+    Examples:
+        Share a pool between multiple requests::
+
+            >>> from google_translate.utils import ConnectionPool, make_request
+
+            >>> pool = ConnectionPool(max_size=5, idle_timeout=30.0)
+            >>> reply = make_request("https://example.com/", pool=pool)
+
+    Args:
+        max_size (int): Maximum number of idle connections to keep for each
+            (scheme, host, proxy) key (default: 10).
+
+        idle_timeout (float): Time in seconds after which an idle connection
+            is closed instead of reused (default: 60.0).
+
+    Attributes:
+        REDIRECT_CODES (tuple): HTTP status codes of the redirects that the
+            pool follows just like urllib2 does.
+
+        MAX_REDIRECTIONS (int): Maximum number of redirects to follow for a
+            single request.
+
+    """
+
+    REDIRECT_CODES = (301, 302, 303, 307)
+
+    MAX_REDIRECTIONS = 10
+
+    def __init__(self, max_size=10, idle_timeout=60.0):
+        if not isinstance(max_size, int) or max_size < 1:
+            raise ValueError(max_size)
+
+        if idle_timeout <= 0:
+            raise ValueError(idle_timeout)
+
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def request(self, url, headers=None, proxy=None, timeout=10.0):
+        """Make a GET request to the given url using a pooled connection.
+
+        The redirects are followed (e.g. the redirect of a rate limited
+        request to the Google 'sorry' page) and every other reply that is
+        not a success raises an HTTPError, the same as urllib2.urlopen.
+
+        Returns:
+            PooledResponse object.
+
+        Raises:
+            urllib2.HTTPError, urllib2.URLError
+
+        """
+        for _ in xrange(self.MAX_REDIRECTIONS + 1):
+            reply = self._request_once(url, headers, proxy, timeout)
+            status = reply.getcode()
+
+            if 200 <= status < 300:
+                return reply
+
+            location = reply.info().getheader("Location")
+            body = reply.read()
+            reply.close()
+
+            if status not in self.REDIRECT_CODES or location is None:
+                raise urllib2.HTTPError(url, status, reply.reason, reply.info(), StringIO(body))
+
+            MODULE_LOGGER.debug("Redirected (%s) to: %r", status, location)
+            url = urlparse.urljoin(url, location)
+
+        raise urllib2.HTTPError(url, status, "Too many redirects", reply.info(), StringIO(body))
+
+    def release(self, key, connection):
+        """Return the given connection back to the pool."""
+        with self._lock:
+            idle_list = self._idle.setdefault(key, [])
+
+            if len(idle_list) < self.max_size:
+                idle_list.append((connection, time.time()))
+                return
+
+        connection.close()
+
+    def clear(self):
+        """Close all the idle connections."""
+        with self._lock:
+            idle_lists = self._idle.values()
+            self._idle = {}
+
+        for idle_list in idle_lists:
+            for connection, _ in idle_list:
+                connection.close()
+
+    def _request_once(self, url, headers, proxy, timeout):
+        """Make a single GET request, returns the PooledResponse."""
+        url_parts = urlparse.urlsplit(url)
+
+        key = (url_parts.scheme, url_parts.netloc, proxy)
+
+        if proxy is not None and url_parts.scheme == "http":
+            # Plain HTTP proxies expect the absolute url
+            path = url
+        else:
+            path = url_parts.path or '/'
+
+            if url_parts.query:
+                path += '?' + url_parts.query
+
+        headers = dict(headers or [])
+
+        while True:
+            connection, reused = self._acquire(key, timeout)
+
+            try:
+                connection.request("GET", path, headers=headers)
+                response = connection.getresponse()
+                break
+            except (httplib.HTTPException, socket.error) as error:
+                connection.close()
+
+                # The server might have closed an idle connection, retry once
+                # with a fresh one
+                if not reused:
+                    raise urllib2.URLError(error)
+
+                MODULE_LOGGER.debug("Pooled connection failed, reconnecting")
+
+        return PooledResponse(self, key, connection, response)
+
+    def _acquire(self, key, timeout):
+        """Returns a (connection, reused) pair for the given key."""
+        now = time.time()
+
+        with self._lock:
+            idle_list = self._idle.get(key, [])
+
+            while idle_list:
+                connection, last_used = idle_list.pop()
+
+                if now - last_used <= self.idle_timeout:
+                    connection.timeout = timeout
+
+                    if connection.sock is not None:
+                        connection.sock.settimeout(timeout)
+
+                    return connection, True
+
+                connection.close()
+
+        return self._create_connection(key, timeout), False
+
+    @staticmethod
+    def _create_connection(key, timeout):
+        """Create a new connection for the given key."""
+        scheme, host, proxy = key
+
+        if proxy is None:
+            if scheme == "https":
+                return httplib.HTTPSConnection(host, timeout=timeout)
+
+            return httplib.HTTPConnection(host, timeout=timeout)
+
+        if scheme == "https":
+            connection = httplib.HTTPSConnection(proxy, timeout=timeout)
+            connection.set_tunnel(host)
+
+            return connection
+
+        return httplib.HTTPConnection(proxy, timeout=timeout)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(idle_list) for idle_list in self._idle.values())
+
+
+class TokenBucket(object):
+
+    """Thread safe token bucket rate limiter.
+
+    The bucket holds up to capacity tokens and refills at rate tokens per
+    second. Each request consumes one token, so bursts of up to capacity
+    requests go through without waiting while the long term rate never
+    exceeds the given rate. The same bucket can be shared between multiple
+    threads and objects.
+
+    Examples:
+        Allow bursts of 5 requests and 2 requests per second on average::
+
+            >>> from google_translate.utils import TokenBucket
+
+            >>> bucket = TokenBucket(2.0, 5)
+            >>> bucket.consume()  # Blocks until a token is available
+
+    Args:
+        rate (float): Tokens added to the bucket per second.
+
+        capacity (float): Maximum number of tokens that the bucket can
+            hold (default: 1).
+
+    """
+
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError(rate)
+
+        if capacity < 1:
+            raise ValueError(capacity)
+
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+
+        self._tokens = self.capacity
+        self._timestamp = time.time()
+        self._lock = threading.Lock()
+
+    def consume(self, tokens=1):
+        """Consume the given tokens, blocking until they are available.
+
+        The tokens are reserved right away so concurrent callers wait in
+        turn instead of racing for the same tokens.
+
+        Returns:
+            Time in seconds that the caller waited.
+
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+
+            wait_time = max(0.0, -self._tokens / self.rate)
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+
+        return wait_time
+
+    def try_consume(self, tokens=1):
+        """Consume the given tokens only if they are available right now.
+
+        Returns:
+            True if the tokens were consumed else False.
+
+        """
+        with self._lock:
+            self._refill()
+
+            if self._tokens < tokens:
+                return False
+
+            self._tokens -= tokens
+
+        return True
+
+    def _refill(self):
+        """Add the tokens earned since the last refill."""
+        now = time.time()
+
+        self._tokens = min(self.capacity, self._tokens + (now - self._timestamp) * self.rate)
+        self._timestamp = now
+
+
+class SingleFlight(object):
+
+    """Coalesce concurrent calls that share the same key.
+
+    While a call for a key is in flight, other callers of the same key do
+    not run the function again, they wait for the first call to finish and
+    receive its result (or its exception).
+
+    Examples:
+        Only one of the concurrent callers runs the function::
+
+            >>> from google_translate.utils import SingleFlight
+
+            >>> single_flight = SingleFlight()
+            >>> result = single_flight.do("key", function, "arg1", "arg2")
+
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args):
+        """Run function with args unless a call for key is already in flight.
+
+        Returns:
+            The result of the function.
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+
+            if call is None:
+                call = self._calls[key] = _FlightCall()
+                leader = True
+            else:
+                leader = False
+
+        if not leader:
+            MODULE_LOGGER.debug("Waiting for in-flight call, key: %r", key)
+            call.event.wait()
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = function(*args)
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+            call.event.set()
+
+        return call.result
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
+
+
+class _FlightCall(object):
+
+    """The state of an in-flight SingleFlight call."""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RetryBudget(object):
+
+    """Thread safe counter of the retries allowed for a group of requests.
+
+    Args:
+        retries (int): Number of retries that the group can spend.
+
+    """
+
+    def __init__(self, retries):
+        self._retries = retries
+        self._lock = threading.Lock()
+
+    @property
+    def retries(self):
+        return self._retries
+
+    def withdraw(self):
+        """Spend one retry. Returns True on success else False."""
+        with self._lock:
+            if self._retries < 1:
+                return False
+
+            self._retries -= 1
+
+        return True
+
+
+class RetryPolicy(object):
+
+    """Decide if and when a failed request should be retried.
+
+    RetryPolicy separates the request errors into three categories.
+
+        * rate limit replies (RATE_LIMIT_CODES), retried after the delay
+          that the 'Retry-After' header asks for or after a backoff delay
+        * client errors (other 4xx replies), never retried
+        * connection errors (everything else), retried after a backoff delay
+
+    The backoff delay grows exponentially with each attempt, is limited by
+    max_backoff and is randomized by the jitter factor in order to spread
+    the retries of concurrent workers.
+
+    Examples:
+        Retry up to 3 times and at most 10 retries for every 100 requests::
+
+            >>> from google_translate.utils import RetryPolicy
+
+            >>> policy = RetryPolicy(retries=3, budget_ratio=0.1)
+            >>> budget = policy.create_budget(100)
+
+    Attributes:
+        RATE_LIMIT_CODES (tuple): HTTP status codes that mark a rate limit
+            reply.
+
+    Args:
+        retries (int): Maximum attempts number before giving up (default: 5).
+
+        backoff (float): Delay in seconds before the first retry
+            (default: 1.0).
+
+        max_backoff (float): Maximum delay in seconds between two attempts
+            (default: 60.0).
+
+        jitter (float): Fraction of the delay that is randomized, between
+            0.0 and 1.0 (default: 0.5).
+
+        budget_ratio (float): Retries allowed per request of a group, see
+            create_budget method. When None there is no budget (default: 0.2).
+
+        budget_min (int): Retries allowed to any group regardless of its
+            size (default: 5).
+
+    """
+
+    RATE_LIMIT_CODES = (429, 503)
+
+    def __init__(self, retries=5, backoff=1.0, max_backoff=60.0, jitter=0.5, budget_ratio=0.2, budget_min=5):
+        if not isinstance(retries, int) or retries < 1:
+            raise ValueError(retries)
+
+        if backoff < 0 or max_backoff < backoff:
+            raise ValueError(backoff)
+
+        if jitter < 0.0 or jitter > 1.0:
+            raise ValueError(jitter)
+
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.budget_ratio = budget_ratio
+        self.budget_min = budget_min
+
+    def create_budget(self, requests):
+        """Returns a RetryBudget for a group of requests or None.
+
+        The budget allows budget_min + budget_ratio * requests retries
+        for the whole group.
+
+        """
+        if self.budget_ratio is None:
+            return None
+
+        return RetryBudget(self.budget_min + int(self.budget_ratio * requests))
+
+    def get_delay(self, attempt, error):
+        """Returns the delay before the next attempt or None to give up.
+
+        Args:
+            attempt (int): Number of the attempt that failed (starts from 1).
+
+            error (Exception): The error raised by the failed attempt.
+
+        """
+        if attempt >= self.retries or self.is_client_error(error):
+            return None
+
+        if self.is_rate_limit(error):
+            retry_after = self._get_retry_after(error)
+
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+
+        delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+
+        return delay - random.uniform(0, delay * self.jitter)
+
+    def is_rate_limit(self, error):
+        """Returns True if the error is a rate limit reply."""
+        return isinstance(error, urllib2.HTTPError) and error.code in self.RATE_LIMIT_CODES
+
+    def is_client_error(self, error):
+        """Returns True if the error is a client error (4xx) reply."""
+        return (isinstance(error, urllib2.HTTPError) and
+                400 <= error.code < 500 and
+                not self.is_rate_limit(error))
+
+    def is_connection_error(self, error):
+        """Returns True if the error is not an HTTP error reply."""
+        return not isinstance(error, urllib2.HTTPError)
+
+    @staticmethod
+    def _get_retry_after(error):
+        """Returns the 'Retry-After' value of the error in seconds or None."""
+        headers = error.info()
+
+        if headers is None:
+            return None
+
+        retry_after = headers.get("Retry-After")
+
+        if retry_after is None:
+            return None
+
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+
+        # HTTP-date format
+        date = parsedate_tz(retry_after)
+
+        if date is None:
+            return None
+
+        return max(0.0, mktime_tz(date) - time.time())
+
+
+def make_request(url, headers=None, proxy=None, timeout=10.0, simulate=False, pool=None):
     """Make a GET request to the given url.
 
     Args:
@@ -104,6 +686,9 @@ def make_request(url, headers=None, proxy=None, timeout=10.0, simulate=False):
 
         simulate (boolean): When True no real requests will be sent (default: False).
 
+        pool (ConnectionPool): When set the request is sent over a keep-alive
+            connection from the given pool (default: None).
+
     Returns:
         File like object on success else None. Note that when
         it runs in simulate mode it always returns None.
@@ -122,6 +707,10 @@ def make_request(url, headers=None, proxy=None, timeout=10.0, simulate=False):
         MODULE_LOGGER.info("Running in simulate mode no request will be sent")
         return None
 
+    if pool is not None:
+        MODULE_LOGGER.info("Sending request using the connection pool")
+        return pool.request(url, headers, proxy, timeout)
+
     if proxy is None:
         url_opener = urllib2.build_opener()
     else:
@@ -165,6 +754,91 @@ def parse_reply(reply, encoding="UTF-8"):
     return decode_string(reply_stream, encoding)
 
 
+def parse_sparse_json(data_string):
+    """Parse the sparse JSON arrays of the Google translate replies.
+
+    Google elides the empty array elements (e.g. '[,,"a",,1]') which is
+    not valid JSON. This parser fills each elided element with an empty
+    string while it reads the arrays in a single pass. As in javascript a
+    comma right before the closing bracket is a trailing comma and not an
+    elided element. Commas inside the strings are left untouched.
+
+    Args:
+        data_string (string): Reply string that contains only arrays,
+            strings, numbers and the true, false, null literals.
+
+    Returns:
+        The top level value (e.g. [["", "", "a", "", 1]]).
+
+    Raises:
+        ValueError
+
+    """
+    match = _SPARSE_TOKEN_PATTERN.match
+    literals = _SPARSE_LITERALS
+
+    # Dummy container that holds the top level value
+    root = []
+
+    container = root
+    stack = []
+    expect_value = True
+    position = 0
+
+    while True:
+        mobj = match(data_string, position)
+
+        if mobj is None:
+            break
+
+        position = mobj.end()
+        token = mobj.lastindex
+
+        if token == 1:
+            value, position = scanstring(data_string, position)
+        elif token == 2:
+            value = []
+        elif token == 3:
+            if not stack:
+                raise ValueError("Unexpected ']' at position {0}".format(mobj.start(3)))
+
+            container = stack.pop()
+            expect_value = False
+            continue
+        elif token == 4:
+            if container is root:
+                raise ValueError("Unexpected ',' at position {0}".format(mobj.start(4)))
+
+            if expect_value:
+                # Elided element
+                container.append("")
+
+            expect_value = True
+            continue
+        elif token == 8:
+            value = literals[mobj.group(8)]
+        elif mobj.group(6) or mobj.group(7):
+            value = float(mobj.group(5))
+        else:
+            value = int(mobj.group(5))
+
+        if not expect_value or (container is root and root):
+            raise ValueError("Expecting ',' delimiter at position {0}".format(mobj.start(token)))
+
+        container.append(value)
+        expect_value = False
+
+        if token == 2:
+            stack.append(container)
+            container = value
+            expect_value = True
+
+    if stack or not root or data_string[position:].strip():
+        raise ValueError("Invalid data at position {0}".format(position))
+
+    return root[0]
+
+
 def get_absolute_path(filename):
     """Returns the absolute path to the given file."""
     return os.path.dirname(os.path.abspath(filename))
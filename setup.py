@@ -23,6 +23,11 @@ setup(
     packages            = ["google_translate"],
     scripts             = ["bin/google-translate"],
     install_requires    = ["twodict", "mock"],
+    extras_require      = {"numpy": ["numpy"]},
+
+    # The vectorized tk_generator tests need numpy
+    tests_require       = ["mock", "numpy"],
+    test_suite          = "tests",
 
     package_data        = {
         "google_translate": ["data/languages"]
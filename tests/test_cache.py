@@ -4,14 +4,25 @@
 from __future__ import unicode_literals
 
 import sys
+import time
+import shutil
 import os.path
+import tempfile
 import unittest
+import threading
+import multiprocessing
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     import mock
-    from google_translate.cache import Cache
+    from google_translate.cache import (
+        Cache,
+        FIFOPolicy,
+        LRUPolicy,
+        LFUPolicy
+    )
+    from google_translate.snapshot import Snapshot, write_snapshot, JOURNAL_SUFFIX
 except ImportError as error:
     print error
     sys.exit(1)
@@ -36,6 +47,18 @@ class TestCacheInit(unittest.TestCase):
     def test_init_invalid_timeperiod_value(self):
         self.assertRaises(ValueError, Cache, 5, 0.0)
 
+    def test_init_invalid_policy(self):
+        self.assertRaises(ValueError, Cache, 5, 60.0, "mru")
+        self.assertRaises(TypeError, Cache, 5, 60.0, None)
+
+    def test_init_policy(self):
+        self.assertIsInstance(Cache(5, 60.0)._policy, FIFOPolicy)
+        self.assertIsInstance(Cache(5, 60.0, "lru")._policy, LRUPolicy)
+        self.assertIsInstance(Cache(5, 60.0, "lfu")._policy, LFUPolicy)
+
+        policy = LRUPolicy()
+        self.assertIs(Cache(5, 60.0, policy)._policy, policy)
+
 
 class TestCachePrivateMethods(unittest.TestCase):
 
@@ -148,10 +171,12 @@ class TestCache(unittest.TestCase):
     def test_get_oldest(self):
         cache = Cache(5, 60.0)
 
-        cache._items = {"k1": ["data", 1.0], "k2": ["data", 1.5], "k3": ["data", 0.5]}
+        for key in ("k3", "k1", "k2"):
+            cache.add(key, "data")
+
         self.assertEqual(cache.get_oldest(), "k3")
 
-        cache._items = {"k1": ["data", 0.1], "k2": ["data", 1.0]}
+        cache.add("k3", "data")
         self.assertEqual(cache.get_oldest(), "k1")
 
     def test_get_oldest_empty_cache(self):
@@ -217,31 +242,132 @@ class TestCache(unittest.TestCase):
 
         self.assertIsNone(cache.get("k1"))
 
-    @mock.patch.object(Cache, "_valid_timestamp")
-    def test_remove_old(self, mock_valid_timestamp):
+    def add_items(self, cache, items):
+        with mock.patch("google_translate.cache.time.time") as mock_time:
+            for key in sorted(items):
+                mock_time.return_value = items[key][1]
+                cache.add(key, items[key][0])
+
+    @mock.patch("google_translate.cache.time.time")
+    def test_remove_old(self, mock_time):
         cache = Cache(5, 60.0)
 
-        items = {"k1": ["v1", 0.1], "k2": ["v2", 0.5], "k3": ["v3", 1.8], "k4": ["v4", 55.5]}
-        cache._items = items
+        self.add_items(cache, {"k1": ["v1", 0.1], "k2": ["v2", 0.5], "k3": ["v3", 1.8], "k4": ["v4", 55.5]})
 
-        mock_valid_timestamp.side_effect = lambda x: True if x == "k4" else False
+        mock_time.return_value = 62.0
 
         self.assertEqual(cache.remove_old(), 3)
         self.assertEqual(cache._items, {"k4": ["v4", 55.5]})
-        mock_valid_timestamp.assert_has_calls([mock.call(key) for key in items])
+        self.assertEqual(cache.get_oldest(), "k4")
+        mock_time.assert_called_once()
 
-    @mock.patch.object(Cache, "_valid_timestamp")
-    def test_remove_old_empty_cache(self, mock_valid_timestamp):
+    @mock.patch("google_translate.cache.time.time")
+    def test_remove_old_empty_cache(self, mock_time):
         cache = Cache(5, 60.0)
 
         items = {"k1": ["v1", 0.1], "k2": ["v2", 0.5], "k3": ["v3", 1.8], "k4": ["v4", 55.5]}
-        cache._items = items
+        self.add_items(cache, items)
 
-        mock_valid_timestamp.return_value = True
+        mock_time.return_value = 60.0
 
         self.assertEqual(cache.remove_old(), 0)
         self.assertEqual(cache._items, items)
-        mock_valid_timestamp.assert_has_calls([mock.call(key) for key in items])
+
+    @mock.patch("google_translate.cache.time.time")
+    def test_remove_old_replaced_item(self, mock_time):
+        cache = Cache(5, 60.0)
+
+        self.add_items(cache, {"k1": ["v1", 0.1], "k2": ["v2", 0.5]})
+        self.add_items(cache, {"k1": ["v10", 30.0]})
+
+        mock_time.return_value = 70.0
+
+        self.assertEqual(cache.remove_old(), 1)
+        self.assertEqual(cache._items, {"k1": ["v10", 30.0]})
+
+    @mock.patch("google_translate.cache.time.time")
+    def test_add_removes_expired_items(self, mock_time):
+        cache = Cache(3, 60.0, "lru")
+
+        self.add_items(cache, {"k1": ["v1", 0.1], "k2": ["v2", 0.5], "k3": ["v3", 50.0]})
+
+        # The expired items make space, so the live k3 is not evicted
+        mock_time.return_value = 65.0
+        cache.add("k4", "v4")
+
+        self.assertEqual(cache._items, {"k3": ["v3", 50.0], "k4": ["v4", 65.0]})
+
+    @mock.patch("google_translate.cache.time.time")
+    def test_add_expire_batch(self, mock_time):
+        cache = Cache(50, 60.0)
+
+        self.add_items(cache, dict(("k%02d" % index, ["v", float(index)]) for index in range(20)))
+
+        mock_time.return_value = 100.0
+        cache.add("new", "v")
+
+        self.assertEqual(len(cache), 20 - Cache._EXPIRE_BATCH + 1)
+
+    def test_expiry_heap_size(self):
+        cache = Cache(5, 60.0)
+
+        for index in range(1000):
+            cache.add("k%d" % (index % 3), index)
+
+        self.assertLessEqual(len(cache._expiry_heap), 2 * len(cache) + Cache._EXPIRE_BATCH)
+
+    @mock.patch("google_translate.cache.time.time")
+    def test_get_removes_expired_item(self, mock_time):
+        cache = Cache(5, 60.0)
+
+        self.add_items(cache, {"k1": ["v1", 0.1]})
+
+        mock_time.return_value = 100.0
+
+        self.assertIsNone(cache.get("k1"))
+        self.assertEqual(cache._items, {})
+        self.assertIsNone(cache.get_oldest())
+
+    def test_reaper(self):
+        cache = Cache(5, 60.0, reap_interval=0.01)
+
+        with mock.patch.object(Cache, "remove_old") as mock_remove_old:
+            called = threading.Event()
+            mock_remove_old.side_effect = lambda: called.set()
+
+            self.assertTrue(called.wait(5.0))
+
+        cache.stop_reaper()
+        self.assertIsNone(cache._reaper)
+
+    def test_reaper_invalid_interval(self):
+        cache = Cache(5, 60.0)
+        self.assertRaises(ValueError, cache.start_reaper, 0.0)
+
+    def test_reaper_stops_with_cache(self):
+        cache = Cache(5, 60.0, reap_interval=0.01)
+        thread = cache._reaper[0]
+
+        del cache
+        thread.join(5.0)
+
+        self.assertFalse(thread.is_alive())
+
+    @mock.patch("google_translate.cache.time")
+    def test_insert(self, mock_time):
+        mock_time.time.return_value = 100.0
+        cache = Cache(2, 60.0)
+
+        cache.insert("k1", "v1", 50.0)
+        cache.insert("k2", "v2", 90.0)
+        cache.insert("k3", "v3", 95.0)
+
+        self.assertEqual(cache._items, {"k2": ["v2", 90.0], "k3": ["v3", 95.0]})
+        self.assertEqual(cache._dirty, set())
+
+        mock_time.time.return_value = 151.0
+        self.assertIsNone(cache.get("k2"))
+        self.assertEqual(cache.get("k3"), "v3")
 
     @mock.patch("google_translate.cache.write_dict")
     def test_store_success(self, mock_write_dict):
@@ -253,6 +379,18 @@ class TestCache(unittest.TestCase):
         self.assertTrue(cache.store("somefile"))
         mock_write_dict.assert_called_once_with("somefile", cache._items)
 
+    @mock.patch("google_translate.cache.write_dict")
+    def test_store_to_dict(self, mock_write_dict):
+        cache = Cache(5, 60.0)
+
+        record = mock.Mock()
+        record.to_dict.return_value = {"translation": "t1"}
+
+        cache._items = {"k1": [record, 0.5]}
+
+        cache.store("somefile")
+        mock_write_dict.assert_called_once_with("somefile", {"k1": [{"translation": "t1"}, 0.5]})
+
     @mock.patch("google_translate.cache.write_dict")
     def test_store_failure(self, mock_write_dict):
         cache = Cache(5, 60.0)
@@ -273,6 +411,18 @@ class TestCache(unittest.TestCase):
         mock_get_dict.assert_called_once_with("somefile")
         self.assertEqual(cache._items, mock_get_dict.return_value)
 
+    @mock.patch("google_translate.cache.get_dict")
+    def test_load_freezes_items(self, mock_get_dict):
+        cache = Cache(5, 60.0)
+
+        mock_get_dict.return_value = {"k1": [{"extra": {"nouns": ["n1"]}}, time.time()]}
+        cache.load("somefile")
+
+        info_dict = cache.get("k1")
+
+        self.assertEqual(info_dict, {"extra": {"nouns": ["n1"]}})
+        self.assertRaises(TypeError, info_dict["extra"]["nouns"].append, "n2")
+
     @mock.patch("google_translate.cache.get_dict")
     def test_load_failure(self, mock_get_dict):
         cache = Cache(5, 60.0)
@@ -293,6 +443,351 @@ class TestCache(unittest.TestCase):
         mock_get_dict.assert_called_once_with("somefile")
         self.assertEqual(cache._items, {"k3": ["v3", 1.5]})
 
+    @mock.patch("google_translate.cache.get_dict")
+    def test_load_eviction_order(self, mock_get_dict):
+        cache = Cache(2, 60.0)
+
+        mock_get_dict.return_value = {"k1": ["v1", 0.9], "k2": ["v2", 0.2], "k3": ["v3", 0.5]}
+
+        self.assertTrue(cache.load("somefile"))
+        self.assertEqual(cache._items, {"k1": ["v1", 0.9], "k3": ["v3", 0.5]})
+        self.assertEqual(cache.get_oldest(), "k3")
+
+
+class TestCacheSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, "cache.snap")
+
+        write_snapshot(self.filename, [("k1", ["v1", 10.0]), ("k2", ["v2", 20.0]), ("k3", ["v3", 30.0])])
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_open_snapshot(self):
+        cache = Cache(5, 60.0)
+
+        self.assertTrue(cache.open_snapshot(self.filename))
+        self.assertEqual(len(cache), 0)
+        self.assertTrue(cache.has("k1"))
+        self.assertFalse(cache.has("k4"))
+
+    def test_open_snapshot_failure(self):
+        cache = Cache(5, 60.0)
+
+        self.assertFalse(cache.open_snapshot(os.path.join(self.temp_dir, "missing")))
+        self.assertIsNone(cache._snapshot)
+
+    @mock.patch("google_translate.cache.time.time")
+    def test_get_from_snapshot(self, mock_time):
+        cache = Cache(5, 60.0)
+        cache.open_snapshot(self.filename)
+
+        mock_time.return_value = 75.0
+
+        self.assertEqual(cache.get("k2"), "v2")
+        self.assertEqual(cache._items, {"k2": ["v2", 20.0]})
+
+        # Expired in the snapshot
+        self.assertIsNone(cache.get("k1"))
+        self.assertIsNone(cache.get("k4"))
+        self.assertEqual(cache._items, {"k2": ["v2", 20.0]})
+
+    def test_get_from_snapshot_frozen(self):
+        write_snapshot(self.filename, [("k1", [{"extra": {"nouns": ["n1"]}}, time.time()])])
+
+        cache = Cache(5, 60.0)
+        cache.open_snapshot(self.filename)
+
+        info_dict = cache.get("k1")
+
+        self.assertIs(cache.get("k1"), info_dict)
+        self.assertRaises(TypeError, info_dict["extra"].clear)
+
+    @mock.patch("google_translate.cache.time.time")
+    def test_store_snapshot(self, mock_time):
+        cache = Cache(5, 60.0)
+        cache.open_snapshot(self.filename)
+
+        mock_time.return_value = 75.0
+        cache.add("k2", "v20")
+        cache.add("k4", "v4")
+
+        self.assertTrue(cache.store_snapshot(self.filename))
+
+        snapshot = Snapshot(self.filename)
+        self.assertEqual(sorted(snapshot.items()), [("k2", ["v20", 75.0]), ("k3", ["v3", 30.0]), ("k4", ["v4", 75.0])])
+
+    def test_store_snapshot_failure(self):
+        cache = Cache(5, 60.0)
+        cache.add("k1", "v1")
+
+        with mock.patch("google_translate.cache.write_snapshot", side_effect=IOError):
+            self.assertFalse(cache.store_snapshot(self.filename))
+
+
+def _save_items(filename, start):
+    cache = Cache(100, 60.0)
+    cache.open_store(filename)
+
+    for index in range(start, start + 20):
+        cache.add("k%d" % index, index)
+        cache.save()
+
+
+class TestCacheStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, "config", "cache.snap")
+        self.journal_filename = self.filename + JOURNAL_SUFFIX
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_open_store_empty(self):
+        cache = Cache(5, 60.0)
+
+        self.assertFalse(cache.open_store(self.filename))
+        self.assertEqual(cache._store_filename, self.filename)
+        self.assertTrue(cache.save())
+
+    def test_save_without_store(self):
+        cache = Cache(5, 60.0)
+        cache.add("k1", "v1")
+
+        self.assertFalse(cache.save())
+        self.assertFalse(cache.compact())
+
+    def test_save_dirty_items(self):
+        cache = Cache(5, 60.0)
+        cache.open_store(self.filename)
+
+        cache.add("k1", "v1")
+        self.assertTrue(cache.save())
+
+        size = os.path.getsize(self.journal_filename)
+
+        # Nothing to save
+        self.assertTrue(cache.save())
+        self.assertEqual(os.path.getsize(self.journal_filename), size)
+
+        cache.add("k2", "v2")
+        self.assertTrue(cache.save())
+        self.assertGreater(os.path.getsize(self.journal_filename), size)
+
+        new_cache = Cache(5, 60.0)
+        self.assertTrue(new_cache.open_store(self.filename))
+        self.assertEqual(len(new_cache), 0)
+        self.assertTrue(new_cache.has("k2"))
+        self.assertEqual(new_cache.get("k1"), "v1")
+        self.assertEqual(new_cache.get("k2"), "v2")
+
+    def test_promoted_items_not_dirty(self):
+        write_snapshot(self.filename, [("k1", ["v1", time.time()])])
+
+        cache = Cache(5, 60.0)
+        self.assertTrue(cache.open_store(self.filename))
+
+        self.assertEqual(cache.get("k1"), "v1")
+        self.assertTrue(cache.save())
+        self.assertEqual(os.path.getsize(self.journal_filename), 0)
+
+    def test_evicted_items_not_saved(self):
+        cache = Cache(1, 60.0)
+        cache.open_store(self.filename)
+
+        cache.add("k1", "v1")
+        cache.add("k2", "v2")
+        cache.save()
+
+        self.assertEqual(cache._dirty, set())
+        self.assertEqual(sorted(cache._journal), ["k2"])
+
+    def test_save_truncates_torn_record(self):
+        cache = Cache(5, 60.0)
+        cache.open_store(self.filename)
+        cache.add("k1", "v1")
+        cache.save()
+
+        with open(self.journal_filename, "ab") as journal_file:
+            journal_file.write(b"torn")
+
+        cache = Cache(5, 60.0)
+        cache.open_store(self.filename)
+        cache.add("k2", "v2")
+        self.assertTrue(cache.save())
+
+        new_cache = Cache(5, 60.0)
+        new_cache.open_store(self.filename)
+        self.assertEqual(new_cache.get("k1"), "v1")
+        self.assertEqual(new_cache.get("k2"), "v2")
+
+    def test_save_failure(self):
+        cache = Cache(5, 60.0)
+        cache.open_store(self.filename)
+        cache.add("k1", "v1")
+
+        with mock.patch("google_translate.cache.append_journal", side_effect=IOError):
+            self.assertFalse(cache.save())
+
+        self.assertEqual(cache._dirty, set(["k1"]))
+
+    def test_compact(self):
+        write_snapshot(self.filename, [("k1", ["v1", time.time()]), ("k2", ["v2", 10.0])])
+
+        cache = Cache(5, 60.0)
+        cache.open_store(self.filename)
+
+        cache.add("k1", "v10")
+        cache.add("k3", "v3")
+        cache.save()
+
+        self.assertTrue(cache.compact())
+        self.assertEqual(os.path.getsize(self.journal_filename), 0)
+        self.assertEqual(cache._journal, {})
+
+        # The expired k2 is dropped
+        snapshot = Snapshot(self.filename)
+        self.assertEqual(sorted(key for key, _ in snapshot.items()), ["k1", "k3"])
+        self.assertEqual(snapshot.get("k1")[0], "v10")
+
+    @mock.patch.object(Cache, "_COMPACT_MIN_SIZE", 0)
+    def test_save_compacts_journal(self):
+        cache = Cache(5, 60.0)
+        cache.open_store(self.filename)
+
+        cache.add("k1", "v1")
+        cache.save()
+
+        self.assertEqual(os.path.getsize(self.journal_filename), 0)
+        self.assertEqual(Snapshot(self.filename).get("k1")[0], "v1")
+        self.assertEqual(cache._snapshot.get("k1")[0], "v1")
+
+    def test_needs_compaction(self):
+        cache = Cache(5, 60.0)
+        cache.open_store(self.filename)
+
+        self.assertFalse(cache._needs_compaction(Cache._COMPACT_MIN_SIZE - 1))
+        self.assertTrue(cache._needs_compaction(Cache._COMPACT_MIN_SIZE))
+
+        with mock.patch("google_translate.cache.os.path.getsize", return_value=Cache._COMPACT_MIN_SIZE * 8):
+            self.assertFalse(cache._needs_compaction(Cache._COMPACT_MIN_SIZE))
+            self.assertTrue(cache._needs_compaction(Cache._COMPACT_MIN_SIZE * 2))
+
+    def test_store_snapshot_includes_journal(self):
+        cache = Cache(5, 60.0)
+        cache.open_store(self.filename)
+        cache.add("k1", "v1")
+        cache.save()
+
+        new_cache = Cache(5, 60.0)
+        new_cache.open_store(self.filename)
+
+        snapshot_filename = os.path.join(self.temp_dir, "new.snap")
+        self.assertTrue(new_cache.store_snapshot(snapshot_filename))
+        self.assertEqual(Snapshot(snapshot_filename).get("k1")[0], "v1")
+
+    def test_multiple_processes(self):
+        Cache(5, 60.0).open_store(self.filename)
+
+        with mock.patch.object(Cache, "_COMPACT_MIN_SIZE", 1024):
+            processes = [multiprocessing.Process(target=_save_items, args=(self.filename, index * 20)) for index in range(4)]
+
+            for process in processes:
+                process.start()
+
+            for process in processes:
+                process.join()
+
+        cache = Cache(100, 60.0)
+        cache.open_store(self.filename)
+
+        for index in range(80):
+            self.assertEqual(cache.get("k%d" % index), index)
+
+
+class TestCachePolicies(unittest.TestCase):
+
+    def fill(self, policy, keys):
+        cache = Cache(len(keys), 60.0, policy)
+
+        for key in keys:
+            cache.add(key, key)
+
+        return cache
+
+    def test_fifo_eviction(self):
+        cache = self.fill("fifo", ["k1", "k2", "k3"])
+
+        cache.get("k1")
+        cache.add("k4", "k4")
+
+        self.assertEqual(sorted(cache._items), ["k2", "k3", "k4"])
+
+    def test_lru_eviction(self):
+        cache = self.fill("lru", ["k1", "k2", "k3"])
+
+        cache.get("k1")
+        cache.add("k4", "k4")
+
+        self.assertEqual(sorted(cache._items), ["k1", "k3", "k4"])
+        self.assertEqual(cache.get_oldest(), "k3")
+
+    def test_lru_get_missing_key(self):
+        cache = self.fill("lru", ["k1", "k2"])
+
+        self.assertIsNone(cache.get("k3"))
+        self.assertEqual(cache.get_oldest(), "k1")
+
+    def test_lfu_eviction(self):
+        cache = self.fill("lfu", ["k1", "k2", "k3"])
+
+        cache.get("k1")
+        cache.get("k1")
+        cache.get("k2")
+        cache.add("k4", "k4")
+
+        self.assertEqual(sorted(cache._items), ["k1", "k2", "k4"])
+
+        # The new key has the lowest count
+        self.assertEqual(cache.get_oldest(), "k4")
+
+    def test_lfu_remove_min_count(self):
+        policy = LFUPolicy()
+
+        for key in ("k1", "k2"):
+            policy.insert(key)
+
+        policy.touch("k2")
+        policy.touch("k2")
+        policy.remove("k1")
+
+        self.assertEqual(policy.peek(), "k2")
+
+        policy.remove("k2")
+        self.assertIsNone(policy.peek())
+
+    @mock.patch("google_translate.cache.time.time")
+    def test_remove_old_updates_policy(self, mock_time):
+        cache = Cache(2, 60.0, "lru")
+
+        for timestamp, key in ((1.0, "k1"), (2.0, "k2")):
+            mock_time.return_value = timestamp
+            cache.add(key, key)
+
+        mock_time.return_value = 61.5
+        self.assertEqual(cache.remove_old(), 1)
+
+        self.assertEqual(cache.get_oldest(), "k2")
+
+    def test_policy_clear(self):
+        for policy in (FIFOPolicy(), LRUPolicy(), LFUPolicy()):
+            policy.insert("k1")
+            policy.clear()
+            self.assertIsNone(policy.peek())
+
 
 def main():
     unittest.main()
@@ -6,16 +6,21 @@ from __future__ import unicode_literals
 import os
 import sys
 import json
+import time
+import threading
 import unittest
 import logging.config
 
-from urllib2 import URLError
+from urllib2 import URLError, HTTPError
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
     import mock
     from google_translate import GoogleTranslator
+    from google_translate.utils import RetryPolicy
+    from google_translate.tk_generator import TK_MEMO
+    from google_translate.records import InfoRecord
 except ImportError as error:
     print error
     sys.exit(1)
@@ -130,14 +135,13 @@ class TestGetHeaders(unittest.TestCase):
 
 class TestGetInfo(unittest.TestCase):
 
-    @mock.patch("google_translate.translator.copy.deepcopy")
     @mock.patch("google_translate.translator.Cache.get")
-    def test_get_info_cache_hit(self, mock_cache_get, mock_deepcopy):
+    def test_get_info_cache_hit(self, mock_cache_get):
         translator = GoogleTranslator()
 
-        self.assertEqual(translator._get_info("test", "ru", "en"), mock_deepcopy.return_value)
+        # The cached values are immutable and shared without a copy
+        self.assertIs(translator._get_info("test", "ru", "en"), mock_cache_get.return_value)
         mock_cache_get.assert_called_once_with("testruen")
-        mock_deepcopy.assert_called_once_with(mock_cache_get.return_value)
 
     @mock.patch.object(GoogleTranslator, "_try_make_request")
     @mock.patch.object(GoogleTranslator, "_build_request")
@@ -149,7 +153,7 @@ class TestGetInfo(unittest.TestCase):
         mock_try_make_request.return_value = None
 
         self.assertIsNone(translator._get_info("test", "ru", "en"))
-        mock_cache_get.assert_called_once_with("testruen")
+        mock_cache_get.assert_has_calls([mock.call("testruen")] * 2)
         mock_build_request.assert_called_once_with("test", "ru", "en")
         mock_try_make_request.assert_called_once_with(mock_build_request.return_value)
 
@@ -157,22 +161,119 @@ class TestGetInfo(unittest.TestCase):
     @mock.patch.object(GoogleTranslator, "_string_to_json")
     @mock.patch.object(GoogleTranslator, "_try_make_request")
     @mock.patch.object(GoogleTranslator, "_build_request")
-    @mock.patch("google_translate.translator.copy.deepcopy")
     @mock.patch("google_translate.translator.parse_reply")
     @mock.patch("google_translate.translator.Cache")
-    def test_get_info_valid_request(self, mock_cache, mock_parse_reply, mock_deepcopy, mock_build_request, mock_try_make_request, mock_string_to_json, mock_extract_data):
+    def test_get_info_valid_request(self, mock_cache, mock_parse_reply, mock_build_request, mock_try_make_request, mock_string_to_json, mock_extract_data):
         translator = GoogleTranslator()
 
         mock_cache.return_value.get.return_value = None  # Simulate cache miss
-        self.assertEqual(translator._get_info("test", "ru", "en"), mock_deepcopy.return_value)
-        mock_cache.return_value.get.assert_called_once_with("testruen")
+        self.assertIs(translator._get_info("test", "ru", "en"), mock_extract_data.return_value)
+        mock_cache.return_value.get.assert_has_calls([mock.call("testruen")] * 2)
         mock_build_request.assert_called_once_with("test", "ru", "en")
         mock_try_make_request.assert_called_once_with(mock_build_request.return_value)
         mock_parse_reply.assert_called_once_with(mock_try_make_request.return_value, translator._encoding)
         mock_string_to_json.assert_called_once_with(mock_parse_reply.return_value)
         mock_extract_data.assert_called_once_with(mock_string_to_json.return_value)
-        mock_deepcopy.assert_called_once_with(mock_extract_data.return_value)
+        mock_cache.return_value.add.assert_called_once_with("testruen", mock_extract_data.return_value)
+
+
+    @mock.patch.object(GoogleTranslator, "_extract_data")
+    @mock.patch.object(GoogleTranslator, "_string_to_json")
+    @mock.patch.object(GoogleTranslator, "_try_make_request")
+    @mock.patch("google_translate.translator.parse_reply")
+    def test_get_info_concurrent_misses(self, mock_parse_reply, mock_try_make_request, mock_string_to_json, mock_extract_data):
+        translator = GoogleTranslator(max_workers=5)
+
+        request_started = threading.Event()
+        release_request = threading.Event()
+
+        def slow_request(request_url):
+            request_started.set()
+            release_request.wait(5.0)
+            return "reply"
+
+        mock_try_make_request.side_effect = slow_request
+        mock_extract_data.return_value = {"translation": "t1"}
+
+        pool_result = []
+
+        thread = threading.Thread(target=lambda: pool_result.extend(translator._map(lambda word: translator._get_info(word, "fr", "en"), ["test"] * 5)))
+        thread.start()
+
+        request_started.wait(5.0)
+        time.sleep(0.1)
+        release_request.set()
+        thread.join(5.0)
+
+        self.assertEqual(pool_result, [{"translation": "t1"}] * 5)
+        mock_try_make_request.assert_called_once()
+        self.assertEqual(len(translator._single_flight), 0)
+
+    @mock.patch.object(GoogleTranslator, "_try_make_request")
+    @mock.patch.object(GoogleTranslator, "_build_request")
+    def test_get_info_offline(self, mock_build_request, mock_try_make_request):
+        translator = GoogleTranslator(offline=True)
+        translator.cache.add("dogfren", InfoRecord([[["chien", "dog", "", "", 1]], None, "en"]))
+
+        self.assertEqual(translator._get_info("dog", "fr", "en")["translation"], "chien")
+        self.assertIsNone(translator._get_info("cat", "fr", "en"))
+        mock_build_request.assert_not_called()
+        mock_try_make_request.assert_not_called()
+
+    @mock.patch.object(GoogleTranslator, "_try_make_request")
+    def test_translate_offline_batch(self, mock_try_make_request):
+        translator = GoogleTranslator(offline=True, batch_mode=True)
+        translator.cache.add("dogfren", InfoRecord([[["chien", "dog", "", "", 1]], None, "en"]))
+
+        self.assertEqual(translator.translate(["dog", "cat", "house"], "fr", "en"), ["chien", None, None])
+        mock_try_make_request.assert_not_called()
+
+    def test_get_info_record_cache_hit(self):
+        translator = GoogleTranslator()
+        record = InfoRecord([[["chien", "dog", "", "", 1]], None, "en"])
+
+        translator.cache.add("dogfren", record)
+        info = translator._get_info("dog", "fr", "en")
+
+        self.assertIs(info, record)
+
+    def test_detect_extracts_only_src_lang(self):
+        translator = GoogleTranslator()
+        record = InfoRecord([[["dog", "dog", "", "", 1]], None, "en"])
+
+        translator.cache.add("dogenauto", record)
+
+        self.assertEqual(translator.detect("dog"), "english")
+
+        self.assertEqual(list(record._values), ["src_lang"])
+
+    def test_get_info_dict_output(self):
+        translator = GoogleTranslator()
+        translator.cache.add("dogfrauto", InfoRecord([[["chien", "dog", "", "", 1]], None, "en"]))
+
+        record = translator.get_info_dict("dog", "fr")
+        self.assertIsInstance(record, InfoRecord)
+
+        info_dict = translator.get_info_dict("dog", "fr", output="dict")["dog"]
+
+        self.assertIs(type(info_dict), dict)
+        self.assertEqual(info_dict, record)
+        self.assertEqual(info_dict["translation"], "chien")
+        self.assertEqual(json.loads(translator.get_info_dict("dog", "fr", output="json"))["dog"], info_dict)
+
+    def test_translate_additional_shared(self):
+        translator = GoogleTranslator()
+        translator.cache.add("dogfrauto", InfoRecord([[["chien", "dog", "", "", 1]], [["noun", [], [["chien", ["dog"]]], "dog", 1]], "en"]))
+
+        extra = translator.translate("dog", "fr", additional=True)
 
+        self.assertIs(extra, translator.translate("dog", "fr", additional=True))
+        self.assertRaises(TypeError, extra.clear)
+
+        extra_dict = translator.translate("dog", "fr", additional=True, output="dict")["dog"]
+        extra_dict["nouns"]["chien"].append("hound")
+
+        self.assertEqual(extra, {"nouns": {"chien": ["dog"]}})
 
 
 class TestPrivateMethods(unittest.TestCase):
@@ -213,10 +314,61 @@ class TestPrivateMethods(unittest.TestCase):
         mock_sleep.reset_mock()
 
         translator = GoogleTranslator(random_wait=True)
+        mock_rand_uniform.return_value = 8.0
 
         translator._wait()
         mock_rand_uniform.assert_called_once_with(GoogleTranslator.WAIT_MIN, GoogleTranslator.WAIT_MAX)
-        mock_sleep.assert_called_once_with(mock_rand_uniform.return_value)
+        mock_sleep.assert_called_once_with(8.0)
+        mock_sleep.reset_mock()
+
+        # The time passed since the last request counts towards the wait
+        translator._wait(5.0)
+        mock_sleep.assert_called_once_with(3.0)
+        mock_sleep.reset_mock()
+
+        translator._wait(3600.0)
+        mock_sleep.assert_not_called()
+
+    @mock.patch.object(GoogleTranslator, "_wait")
+    def test_throttle(self, mock_wait):
+        mock_rate_limiter = mock.MagicMock()
+        mock_rate_limiter.consume.return_value = 0.0
+
+        translator = GoogleTranslator(rate_limiter=mock_rate_limiter)
+
+        translator._throttle()
+        translator._throttle()
+        self.assertEqual(mock_rate_limiter.consume.call_count, 2)
+        mock_wait.assert_not_called()
+
+        # Test random wait between requests
+        translator = GoogleTranslator(random_wait=True)
+
+        with mock.patch("google_translate.translator.time") as mock_time:
+            mock_time.return_value = 100.0
+            translator._throttle()
+            mock_wait.assert_not_called()
+
+            mock_time.return_value = 104.0
+            translator._throttle()
+            mock_wait.assert_called_once_with(4.0)
+
+    def test_random_wait_with_rate_limiter(self):
+        self.assertRaises(ValueError, GoogleTranslator, random_wait=True, rate_limiter=mock.MagicMock())
+
+    def test_default_rate_limiter(self):
+        translator = GoogleTranslator(wait_time=4.0)
+        self.assertEqual(translator._rate_limiter.rate, 0.25)
+
+    @mock.patch.object(GoogleTranslator, "_wait")
+    def test_no_wait_time(self, mock_wait):
+        for wait_time in (0, 0.0, -1.0):
+            translator = GoogleTranslator(wait_time=wait_time)
+            self.assertIsNone(translator._rate_limiter)
+
+            translator._throttle()
+            translator._throttle()
+            mock_wait.assert_not_called()
 
     @unittest.skip(b"Deprecated Google has changed the JSON reply")
     @mock.patch("google_translate.translator.json.loads")
@@ -254,6 +406,18 @@ class TestPrivateMethods(unittest.TestCase):
 
         self.assertIsNone(translator._string_to_json(123456))
 
+    def test_string_to_json_sparse(self):
+        translator = GoogleTranslator()
+
+        self.assertEqual(translator._string_to_json('[[["a","b",,,1],[,,"c","d"]],"e",,,1,,[0]]'),
+                         [[["a", "b", "", "", 1], ["", "", "c", "d"]], "e", "", "", 1, "", [0]])
+
+        # Commas inside the strings are not elided elements
+        self.assertEqual(translator._string_to_json('[[["x,,y","[,z",,,3]],,"en"]'),
+                         [[["x,,y", "[,z", "", "", 3]], "", "en"])
+
+        self.assertIsNone(translator._string_to_json('[[1,2]'))
+
     def test_extract_data(self):
         translator = GoogleTranslator()
 
@@ -494,10 +658,13 @@ class TestPrivateMethods(unittest.TestCase):
             self.assertEqual(translator._extract_data(item), outputs[index])
 
 
+    @mock.patch.object(GoogleTranslator, "_throttle")
     @mock.patch.object(GoogleTranslator, "_get_proxy")
-    @mock.patch.object(GoogleTranslator, "_wait")
-    @mock.patch("google_translate.translator.make_request")
-    def test_try_make_request_remove_proxy(self, mock_make_request, mock_wait, mock_get_proxy):
+    @mock.patch("google_translate.translator.sleep")
+    @mock.patch("google_translate.translator.Urllib2Transport")
+    def test_try_make_request_remove_proxy(self, mock_transport, mock_wait, mock_get_proxy, mock_throttle):
+        mock_make_request = mock_transport.return_value.request
+
         mock_proxy_selector = mock.MagicMock()
         translator = GoogleTranslator(mock_proxy_selector)
 
@@ -509,22 +676,24 @@ class TestPrivateMethods(unittest.TestCase):
         mock_proxy_selector.remove_proxy.assert_called_once_with("127.0.0.1:8080")
         self.assertEqual(mock_wait.call_count, translator._retries - 1)
 
+    @mock.patch.object(GoogleTranslator, "_throttle")
     @mock.patch.object(GoogleTranslator, "_get_headers")
     @mock.patch.object(GoogleTranslator, "_get_proxy")
-    @mock.patch.object(GoogleTranslator, "_wait")
-    @mock.patch("google_translate.translator.make_request")
-    def test_try_make_request(self, mock_make_request, mock_wait, mock_get_proxy, mock_get_headers):
+    @mock.patch("google_translate.translator.sleep")
+    @mock.patch("google_translate.translator.Urllib2Transport")
+    def test_try_make_request(self, mock_transport, mock_wait, mock_get_proxy, mock_get_headers, mock_throttle):
+        mock_make_request = mock_transport.return_value.request
+
         translator = GoogleTranslator(simulate=True)
 
         # Test simulate case
-        # make_request should return None when in simulate mode
-        mock_make_request.return_value = None
-
+        # No request should be sent when in simulate mode
         self.assertIsNone(translator._try_make_request("https://www.google.com"))
-        mock_make_request.assert_called_once_with("https://www.google.com", mock_get_headers.return_value, mock_get_proxy.return_value, 10.0, True)
+        mock_make_request.assert_not_called()
         mock_get_proxy.assert_called_once()
         mock_get_headers.assert_called_once()
         mock_wait.assert_not_called()
+        mock_throttle.assert_not_called()
 
         mock_make_request.reset_mock()
         mock_get_proxy.reset_mock()
@@ -538,13 +707,14 @@ class TestPrivateMethods(unittest.TestCase):
         # Test raise URLError
         mock_make_request.side_effect = URLError("invalid url")
 
-        make_request_calls = [mock.call("https://www.google.com", mock_get_headers.return_value, mock_get_proxy.return_value, timeout, False)] * retries
+        make_request_calls = [mock.call("https://www.google.com", mock_get_headers.return_value, mock_get_proxy.return_value, timeout)] * retries
 
         self.assertIsNone(translator._try_make_request("https://www.google.com"))
         mock_make_request.assert_has_calls(make_request_calls)
         self.assertEqual(mock_wait.call_count, retries - 1)
         self.assertEqual(mock_get_proxy.call_count, retries)
         self.assertEqual(mock_get_headers.call_count, retries)
+        self.assertEqual(mock_throttle.call_count, retries)
 
         mock_make_request.reset_mock()
         mock_wait.reset_mock()
@@ -555,11 +725,70 @@ class TestPrivateMethods(unittest.TestCase):
         mock_make_request.side_effect = None
 
         self.assertEqual(translator._try_make_request("https://www.google.com"), mock_make_request.return_value)
-        mock_make_request.assert_called_once_with("https://www.google.com", mock_get_headers.return_value, mock_get_proxy.return_value, timeout, False)
+        mock_make_request.assert_called_once_with("https://www.google.com", mock_get_headers.return_value, mock_get_proxy.return_value, timeout)
         mock_wait.assert_not_called()
         mock_get_proxy.assert_called_once()
         mock_get_headers.assert_called_once()
 
+    @mock.patch.object(GoogleTranslator, "_throttle")
+    @mock.patch.object(GoogleTranslator, "_get_proxy")
+    @mock.patch("google_translate.translator.sleep")
+    @mock.patch("google_translate.translator.Urllib2Transport")
+    def test_try_make_request_http_errors(self, mock_transport, mock_sleep, mock_get_proxy, mock_throttle):
+        mock_make_request = mock_transport.return_value.request
+
+        mock_proxy_selector = mock.MagicMock()
+        translator = GoogleTranslator(mock_proxy_selector)
+
+        mock_get_proxy.return_value = "127.0.0.1:8080"
+
+        # Client errors fail fast
+        mock_make_request.side_effect = HTTPError("https://test.com", 404, "Not Found", None, None)
+
+        self.assertIsNone(translator._try_make_request("https://test.com"))
+        mock_make_request.assert_called_once()
+        mock_sleep.assert_not_called()
+        mock_proxy_selector.remove_proxy.assert_not_called()
+
+        mock_make_request.reset_mock()
+
+        # Rate limit replies are retried without removing the proxy
+        mock_make_request.side_effect = HTTPError("https://test.com", 429, "Too Many Requests", {"Retry-After": "7"}, None)
+
+        self.assertIsNone(translator._try_make_request("https://test.com"))
+        self.assertEqual(mock_make_request.call_count, translator._retries)
+        mock_sleep.assert_has_calls([mock.call(7.0)] * (translator._retries - 1))
+        mock_proxy_selector.remove_proxy.assert_not_called()
+
+    @mock.patch.object(GoogleTranslator, "_throttle")
+    @mock.patch("google_translate.translator.sleep")
+    @mock.patch("google_translate.translator.Urllib2Transport")
+    def test_try_make_request_retry_budget(self, mock_transport, mock_sleep, mock_throttle):
+        mock_make_request = mock_transport.return_value.request
+
+        translator = GoogleTranslator(retry_policy=RetryPolicy(retries=5, budget_ratio=0.0, budget_min=3))
+
+        mock_make_request.side_effect = URLError("invalid url")
+
+        self.assertEqual(translator._map(lambda word: translator._try_make_request(word), ["w1", "w2"]), [None, None])
+
+        # 2 first attempts + 3 retries
+        self.assertEqual(mock_make_request.call_count, 5)
+        self.assertEqual(mock_sleep.call_count, 3)
+
+
+    @mock.patch("google_translate.tk_generator._TL")
+    def test_build_request_tk_memo(self, mock_tl):
+        mock_tl.return_value = "1234.5678"
+        TK_MEMO.clear()
+
+        translator = GoogleTranslator()
+
+        for dst_lang in ["fr", "de", "ru", "el", "ja"] * 4:
+            translator._build_request("fan out", dst_lang, "en")
+
+        mock_tl.assert_called_once_with(b"fan out")
+        self.assertEqual((TK_MEMO.hits, TK_MEMO.misses), (19, 1))
 
     @mock.patch("google_translate.translator.get_tk")
     @mock.patch("google_translate.translator.quote_unicode")
@@ -668,10 +897,10 @@ class TestPrivateMethods(unittest.TestCase):
             #mock_val_lang.reset_mock()
             mock_get_info.reset_mock()
 
-        def check_calls(word, dlang, slang):
+        def check_calls(word, dlang, slang, partial=True):
             #mock_val_word.assert_called_once_with(word)
             #mock_val_lang.assert_has_calls([mock.call(dlang, allow_auto=False), mock.call(slang)], any_order=True)
-            mock_get_info.assert_called_once_with(word, dlang, slang)
+            mock_get_info.assert_called_once_with(word, dlang, slang, partial)
 
         # Test src_lang = dst_lang
         self.assertEqual(translator._translate("test", "en", "en", False), "test")
@@ -714,7 +943,7 @@ class TestPrivateMethods(unittest.TestCase):
 
         # Test no typo, with additional, translation found
         self.assertEqual(translator._translate("test", "ru", "en", True), mock_get_info.return_value["extra"])
-        check_calls("test", "ru", "en")
+        check_calls("test", "ru", "en", False)
         reset_mocks()
 
         # Test with typo
@@ -771,7 +1000,7 @@ class TestPrivateMethods(unittest.TestCase):
         #mock_val_word.assert_called_once_with("test")
         #mock_val_lang.assert_has_calls([mock.call("ru", allow_auto=False), mock.call("en")], any_order=True)
         #mock_val_lang.assert_called_once_with("ru")
-        mock_get_info.assert_called_once_with("test", "en", "ru")
+        mock_get_info.assert_called_once_with("test", "en", "ru", True)
 
         #mock_val_word.reset_mock()
         #mock_val_lang.reset_mock()
@@ -785,7 +1014,7 @@ class TestPrivateMethods(unittest.TestCase):
         #mock_val_word.assert_called_once_with("testt")
         #mock_val_lang.assert_has_calls([mock.call("ru", allow_auto=False), mock.call("en")], any_order=True)
         #mock_val_lang.assert_called_once_with("ru")
-        mock_get_info.assert_called_once_with("testt", "en", "ru")
+        mock_get_info.assert_called_once_with("testt", "en", "ru", True)
 
         #mock_val_word.reset_mock()
         #mock_val_lang.reset_mock()
@@ -797,7 +1026,7 @@ class TestPrivateMethods(unittest.TestCase):
         #mock_val_word.assert_called_once_with("test")
         #mock_val_lang.assert_has_calls([mock.call("ru", allow_auto=False), mock.call("en")], any_order=True)
         #mock_val_lang.assert_called_once_with("ru")
-        mock_get_info.assert_called_once_with("test", "en", "ru")
+        mock_get_info.assert_called_once_with("test", "en", "ru", True)
 
     @mock.patch.object(GoogleTranslator, "_get_info")
     #@mock.patch.object(GoogleTranslator, "_validate_language")
@@ -812,7 +1041,7 @@ class TestPrivateMethods(unittest.TestCase):
         #mock_val_word.assert_called_once_with("test")
         #mock_val_lang.assert_called_once_with("en", allow_auto=False)
         # 'af' is the first language in lang_db
-        mock_get_info.assert_called_once_with("test", "af", "en")
+        mock_get_info.assert_called_once_with("test", "af", "en", True)
 
         #mock_val_word.reset_mock()
         #mock_val_lang.reset_mock()
@@ -826,7 +1055,7 @@ class TestPrivateMethods(unittest.TestCase):
 
         #mock_val_word.assert_called_once_with("testt")
         #mock_val_lang.assert_called_once_with("en", allow_auto=False)
-        mock_get_info.assert_called_once_with("testt", "af", "en")
+        mock_get_info.assert_called_once_with("testt", "af", "en", True)
 
         #mock_val_word.reset_mock()
         #mock_val_lang.reset_mock()
@@ -838,7 +1067,7 @@ class TestPrivateMethods(unittest.TestCase):
 
         #mock_val_word.assert_called_once_with("test")
         #mock_val_lang.assert_called_once_with("en", allow_auto=False)
-        mock_get_info.assert_called_once_with("test", "af", "en")
+        mock_get_info.assert_called_once_with("test", "af", "en", True)
 
         #mock_val_word.reset_mock()
         #mock_val_lang.reset_mock()
@@ -915,7 +1144,124 @@ class TestPrivateMethods(unittest.TestCase):
         mock_function.assert_has_calls([mock.call(item, *params2[1:-1]) for item in params2[0]])
         mock_convert_output.assert_called_once_with(params2[0], [mock_function.return_value] * len(params2[0]), params2[-1])
         mock_validate_word.assert_has_calls([mock.call(item) for item in params2[0]])
-        self.assertEqual(mock_wait.call_count, len(params2[0]) - 1)
+        mock_wait.assert_not_called()
+
+    @mock.patch.object(GoogleTranslator, "_map")
+    @mock.patch.object(GoogleTranslator, "_get_info")
+    @mock.patch.object(GoogleTranslator, "_convert_output")
+    def test_do_work_cached_and_duplicate_words(self, mock_convert_output, mock_get_info, mock_map):
+        translator = GoogleTranslator()
+        translator.cache.add("w1fren", {"translation": "t1"})
+
+        mock_get_info.side_effect = lambda word, dst_lang, src_lang: word.upper()
+        mock_map.side_effect = lambda function, items: [function(item) for item in items]
+
+        words = ["w1", "w2", "w1", "w3", "w2"]
+
+        translator._do_work(translator._get_info, words, "fr", "en", "text")
+
+        # Only the distinct missing words are scheduled
+        self.assertEqual(mock_map.call_args[0][1], ["w2", "w3"])
+        self.assertEqual(mock_get_info.call_count, 3)
+        mock_convert_output.assert_called_once_with(words, ["W1", "W2", "W1", "W3", "W2"], "text")
+
+    @mock.patch.object(GoogleTranslator, "_wait")
+    @mock.patch.object(GoogleTranslator, "_validate_word")
+    @mock.patch.object(GoogleTranslator, "_convert_output")
+    def test_do_work_max_workers(self, mock_convert_output, mock_validate_word, mock_wait):
+        translator = GoogleTranslator(max_workers=4)
+
+        words = ["w%s" % index for index in range(20)]
+        mock_function = mock.MagicMock(side_effect=lambda word, lang: word.upper())
+
+        self.assertEqual(translator._do_work(mock_function, words, "fr", "text"), mock_convert_output.return_value)
+        mock_function.assert_has_calls([mock.call(word, "fr") for word in words], any_order=True)
+        mock_convert_output.assert_called_once_with(words, [word.upper() for word in words], "text")
+        mock_validate_word.assert_has_calls([mock.call(word) for word in words])
+        mock_wait.assert_not_called()
+
+    @mock.patch.object(GoogleTranslator, "_wait")
+    @mock.patch.object(GoogleTranslator, "_get_batch_info")
+    @mock.patch.object(GoogleTranslator, "_validate_word")
+    @mock.patch.object(GoogleTranslator, "_convert_output")
+    def test_do_work_batch_mode(self, mock_convert_output, mock_validate_word, mock_get_batch_info, mock_wait):
+        translator = GoogleTranslator(batch_mode=True)
+
+        words = ["w1", "w2", "w3"]
+        mock_function = mock.MagicMock()
+        mock_get_batch_info.return_value = True
+
+        # Test functions that can not use batch requests
+        self.assertEqual(translator._do_work(mock_function, words, "text"), mock_convert_output.return_value)
+        mock_get_batch_info.assert_not_called()
+
+        mock_function.reset_mock()
+
+        # Test batch request
+        with mock.patch.object(GoogleTranslator, "_translate", mock_function):
+            self.assertEqual(translator._do_work(translator._translate, words, "fr", "en", False, "text"), mock_convert_output.return_value)
+
+        mock_get_batch_info.assert_called_once_with(words, "fr", "en")
+        mock_function.assert_has_calls([mock.call(word, "fr", "en", False) for word in words])
+        mock_convert_output.assert_called_with(words, [mock_function.return_value] * len(words), "text")
+        mock_wait.assert_not_called()
+
+    def test_can_batch(self):
+        translator = GoogleTranslator(batch_mode=True)
+
+        self.assertTrue(translator._can_batch(translator._translate, "fr", "en", False))
+        self.assertFalse(translator._can_batch(translator._translate, "fr", "en", True))
+        self.assertFalse(translator._can_batch(translator._translate, "en", "en", False))
+        self.assertFalse(translator._can_batch(translator._translate, "en", "auto", False))
+
+        self.assertTrue(translator._can_batch(translator._romanize, "ru"))
+        self.assertFalse(translator._can_batch(translator._romanize, "auto"))
+        self.assertTrue(translator._can_batch(translator._word_exists, "en"))
+        self.assertFalse(translator._can_batch(translator._detect))
+
+    def test_split_batches(self):
+        translator = GoogleTranslator()
+
+        self.assertEqual(translator._split_batches(["w1", "w2", "w3"]), [["w1", "w2", "w3"]])
+        self.assertEqual(translator._split_batches(["w1", "w2\nw3", "w4"]), [["w1"], ["w2\nw3"], ["w4"]])
+
+        words = ["a" * 1000, "b" * 1000, "c"]
+        self.assertEqual(translator._split_batches(words), [["a" * 1000], ["b" * 1000, "c"]])
+
+    def test_split_batch_reply(self):
+        translator = GoogleTranslator()
+
+        json_data = [
+            [["t1\n", "o1\n", None, None, 3], ["t2. ", "o2. ", None, None, 3], ["t3", "o3", None, None, 3], [None, None, "r1\nr2 r3", "R1\nR2 R3"]],
+            None,
+            "fr",
+            None,
+            None,
+            None,
+            0.5,
+            None
+        ]
+
+        expected_output = [
+            [[["t1", "o1", None, None, 3], [None, None, "r1", "R1"]], None, "fr", None, None, None, 0.5, None],
+            [[["t2. ", "o2. ", None, None, 3], ["t3", "o3", None, None, 3], [None, None, "r2 r3", "R2 R3"]], None, "fr", None, None, None, 0.5, None]
+        ]
+
+        self.assertEqual(translator._split_batch_reply(json_data, ["o1", "o2. o3"]), expected_output)
+        self.assertEqual(translator._extract_data(expected_output[1])["translation"], "t2. t3")
+
+        # Test words number mismatch
+        self.assertIsNone(translator._split_batch_reply(json_data, ["o1", "o2. ", "o3"]))
+
+        # Test typo
+        json_data[7] = ["<b>o1</b>\no2. o3", "o1\no2. o3"]
+        self.assertIsNone(translator._split_batch_reply(json_data, ["o1", "o2. o3"])[0][7])
+        self.assertIsNone(translator._split_batch_reply(json_data, ["o1", "o2. o3"])[1][7])
+
+        self.assertEqual(translator._split_batch_reply(json_data, ["o", "o2. o3"])[0][7], ["o1", "o1"])
+
+        # Test invalid input
+        self.assertIsNone(translator._split_batch_reply(None, ["o1"]))
 
 class TestTranslate(unittest.TestCase):
 
@@ -1118,7 +1464,7 @@ class TestGoogleTranslatorInitiation(unittest.TestCase):
 
         translator = GoogleTranslator()
 
-        mock_cache.assert_called_once_with(GoogleTranslator.MAX_CACHE_SIZE, GoogleTranslator.CACHE_VALID_PERIOD)
+        mock_cache.assert_called_once_with(GoogleTranslator.MAX_CACHE_SIZE, GoogleTranslator.CACHE_VALID_PERIOD, GoogleTranslator.CACHE_POLICY)
         mock_twodict.assert_called_once_with(auto="auto")
         #mock_get_abspath.assert_called_once_with(google_translate.translator.__file__)
         #mock_ospath_join.assert_called_once_with(mock_get_abspath.return_value, "data", GoogleTranslator.LANGUAGES_DB)
@@ -1131,6 +1477,19 @@ class TestGoogleTranslatorInitiation(unittest.TestCase):
 
         mock_twodict.return_value.__setitem__.assert_has_calls(mock_calls)
 
+    @mock.patch("google_translate.translator.Cache")
+    def test_init_cache(self, mock_cache):
+        cache = mock.Mock()
+        cache.get.return_value = InfoRecord([[["chien", "dog", "", "", 1]], None, "en"])
+
+        translator = GoogleTranslator(cache=cache)
+
+        self.assertIs(translator.cache, cache)
+        mock_cache.assert_not_called()
+
+        self.assertEqual(translator.translate("dog", "fr", "en"), "chien")
+        cache.get.assert_called_once_with("dogfren")
+
 
 def main():
     unittest.main()
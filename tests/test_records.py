@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+from __future__ import unicode_literals
+
+import sys
+import copy
+import json
+import pickle
+import os.path
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from google_translate.records import InfoRecord, FrozenDict, FrozenList, freeze, thaw, to_plain
+except ImportError as error:
+    print error
+    sys.exit(1)
+
+# Set up global test settings
+from tests import *
+
+
+class TestInfoRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.json_list = [
+            [["σκύλος", "dog", "", "", 1], ["", "", "skýlos", "dog"]],
+            [["noun", ["σκύλος"], [["σκύλος", ["dog", "hound"], "", 0.5]], "dog", 1]],
+            "en", "", "", "", 0.5, ""
+        ]
+
+        self.info_dict = {
+            "original_text": "dog",
+            "romanization": "dog",
+            "translation": "σκύλος",
+            "has_typo": False,
+            "src_lang": "en",
+            "extra": {"nouns": {"σκύλος": ["dog", "hound"]}},
+            "match": 0.5
+        }
+
+    def test_to_dict(self):
+        record = InfoRecord(self.json_list)
+
+        self.assertEqual(record.to_dict(), self.info_dict)
+        self.assertIsInstance(record.to_dict(), dict)
+
+    def test_invalid_json_list(self):
+        self.assertEqual(InfoRecord(1234)["translation"], "")
+        self.assertEqual(InfoRecord(None)["match"], 1.0)
+
+    def test_lazy_extraction(self):
+        record = InfoRecord(self.json_list)
+
+        self.assertEqual(record["src_lang"], "en")
+        self.assertEqual(sorted(record._values), ["src_lang"])
+
+        self.assertEqual(record["translation"], "σκύλος")
+        self.assertEqual(sorted(record._values), ["original_text", "src_lang", "translation"])
+
+    def test_mapping_interface(self):
+        record = InfoRecord(self.json_list)
+
+        self.assertEqual(len(record), 7)
+        self.assertEqual(sorted(record.keys()), sorted(self.info_dict.keys()))
+        self.assertEqual(dict(record), self.info_dict)
+        self.assertIn("extra", record)
+        self.assertNotIn("unknown", record)
+        self.assertIsNone(record.get("unknown"))
+        self.assertRaises(KeyError, record.__getitem__, "unknown")
+
+        self.assertTrue(record == self.info_dict)
+        self.assertFalse(record != self.info_dict)
+        self.assertFalse(record == "dog")
+
+    def test_immutable(self):
+        record = InfoRecord(self.json_list)
+
+        self.assertRaises(TypeError, setattr, record, "_json_list", [])
+        self.assertRaises(TypeError, record["extra"].clear)
+        self.assertRaises(TypeError, record["extra"]["nouns"].__setitem__, "key", "value")
+        self.assertRaises(TypeError, record["extra"]["nouns"]["σκύλος"].append, "puppy")
+
+        self.assertIs(copy.copy(record), record)
+        self.assertIs(copy.deepcopy(record), record)
+
+    def test_pickle(self):
+        record = InfoRecord(self.json_list)
+        record["extra"]
+
+        self.assertEqual(pickle.loads(pickle.dumps(record, 2)), self.info_dict)
+
+    def test_thaw(self):
+        record = InfoRecord(self.json_list)
+
+        extra = thaw(record["extra"])
+        extra["nouns"]["σκύλος"].append("puppy")
+
+        self.assertIs(type(extra), dict)
+        self.assertIs(type(extra["nouns"]["σκύλος"]), list)
+        self.assertEqual(record["extra"], self.info_dict["extra"])
+
+        self.assertEqual(thaw([record, "text"]), [self.info_dict, "text"])
+        self.assertIs(type(copy.deepcopy(record["extra"])), dict)
+
+    def test_to_plain(self):
+        record = InfoRecord(self.json_list)
+        info_dict = {"translation": "dog"}
+
+        self.assertEqual(to_plain(record), self.info_dict)
+        self.assertIs(type(to_plain(record)), dict)
+        self.assertIs(to_plain(info_dict), info_dict)
+        self.assertEqual(to_plain("text"), "text")
+
+    def test_freeze(self):
+        frozen = freeze({"a": [1, {"b": [2]}]})
+
+        self.assertIsInstance(frozen, FrozenDict)
+        self.assertIsInstance(frozen["a"], FrozenList)
+        self.assertIsInstance(frozen["a"][1], FrozenDict)
+        self.assertEqual(frozen, {"a": [1, {"b": [2]}]})
+        self.assertEqual(json.loads(json.dumps(frozen)), {"a": [1, {"b": [2]}]})
+
+    def test_to_dict_copies_extra(self):
+        record = InfoRecord(self.json_list)
+
+        record.to_dict()["extra"].clear()
+        self.assertEqual(record["extra"], self.info_dict["extra"])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
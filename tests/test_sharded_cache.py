@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+from __future__ import unicode_literals
+
+import sys
+import shutil
+import os.path
+import tempfile
+import unittest
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import mock
+    from google_translate.cache import LRUPolicy
+    from google_translate.records import InfoRecord
+    from google_translate.sharded_cache import ShardedCache
+except ImportError as error:
+    print error
+    sys.exit(1)
+
+# Set up global test settings
+from tests import *
+
+
+class TestShardedCache(unittest.TestCase):
+
+    def add_items(self, cache, items):
+        with mock.patch("google_translate.cache.time.time") as mock_time:
+            for key, (obj, timestamp) in sorted(items.items(), key=lambda item: item[1][1]):
+                mock_time.return_value = timestamp
+                cache.add(key, obj)
+
+    def test_init_invalid_args(self):
+        self.assertRaises(TypeError, ShardedCache, 5.5, 60.0)
+        self.assertRaises(TypeError, ShardedCache, 5, 60, shards=2)
+        self.assertRaises(TypeError, ShardedCache, 5, 60.0, shards=2.0)
+        self.assertRaises(TypeError, ShardedCache, 5, 60.0, LRUPolicy(), 2)
+        self.assertRaises(ValueError, ShardedCache, 5, 60.0, "mru", 2)
+        self.assertRaises(ValueError, ShardedCache, 5, 60.0, shards=0)
+        self.assertRaises(ValueError, ShardedCache, 5, 60.0, shards=6)
+
+    def test_init_shard_sizes(self):
+        cache = ShardedCache(10, 60.0, "lru", shards=4)
+
+        self.assertEqual(cache.shards, 4)
+        self.assertEqual(cache.max_size, 10)
+        self.assertEqual([shard.max_size for shard in cache._shards], [3, 3, 2, 2])
+
+    def test_add_get(self):
+        cache = ShardedCache(100, 60.0, shards=4)
+        record = InfoRecord([[["chien", "dog", "", "", 1]], None, "en"])
+
+        cache.add("dogfren", record)
+
+        for index in range(20):
+            cache.add(index, "v%d" % index)
+
+        self.assertIs(cache.get("dogfren"), record)
+        self.assertEqual(cache.get(7), "v7")
+        self.assertIsNone(cache.get("catfren"))
+        self.assertTrue(cache.has(7))
+        self.assertFalse(cache.has(20))
+        self.assertEqual(len(cache), 21)
+        self.assertTrue(cache.has_space())
+
+        # The items are spread over the shards
+        self.assertTrue(all(len(shard) > 0 for shard in cache._shards))
+
+    def test_add_shard_full(self):
+        cache = ShardedCache(4, 60.0, shards=2)
+        shard = cache._get_shard(0)
+
+        keys = [key for key in range(100) if cache._get_shard(key) is shard][:3]
+        self.add_items(cache, dict((key, [key, float(index)]) for index, key in enumerate(keys)))
+
+        self.assertFalse(cache.has(keys[0]))
+        self.assertEqual(len(shard), 2)
+        self.assertEqual(len(cache), 2)
+
+    def test_valid_period(self):
+        cache = ShardedCache(10, 60.0, shards=2)
+
+        cache.valid_period = 30.0
+
+        self.assertEqual(cache.valid_period, 30.0)
+        self.assertEqual([shard.valid_period for shard in cache._shards], [30.0, 30.0])
+        self.assertRaises(ValueError, setattr, cache, "valid_period", 0.0)
+
+    @mock.patch("google_translate.cache.time.time")
+    def test_remove_old(self, mock_time):
+        cache = ShardedCache(10, 60.0, shards=4)
+        self.add_items(cache, {"k1": ["v1", 0.1], "k2": ["v2", 0.5], "k3": ["v3", 1.8], "k4": ["v4", 55.5]})
+
+        mock_time.return_value = 62.0
+
+        self.assertEqual(cache.remove_old(), 3)
+        self.assertEqual(cache.items(), [("k4", ["v4", 55.5])])
+
+    @mock.patch("google_translate.cache.time.time")
+    def test_store_load(self, mock_time):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+
+        filename = os.path.join(temp_dir, "cache")
+
+        cache = ShardedCache(10, 60.0, shards=4)
+        self.add_items(cache, {"k1": ["v1", 0.5], "k2": [InfoRecord([[["chien", "dog", "", "", 1]], None, "en"]), 0.9]})
+
+        self.assertTrue(cache.store(filename))
+
+        mock_time.return_value = 1.0
+
+        new_cache = ShardedCache(10, 60.0, shards=3)
+        self.assertTrue(new_cache.load(filename))
+
+        self.assertEqual(new_cache.get("k1"), "v1")
+        self.assertEqual(new_cache.get("k2")["translation"], "chien")
+        self.assertEqual(sorted(timestamp for _, (_, timestamp) in new_cache.items()), [0.5, 0.9])
+
+        self.assertFalse(new_cache.load(os.path.join(temp_dir, "missing")))
+
+    def test_threads(self):
+        cache = ShardedCache(1000, 60.0, "lru", shards=8)
+
+        def add_get(start):
+            for index in range(start, start + 100):
+                cache.add(index, index)
+                self.assertEqual(cache.get(index), index)
+
+        threads = [threading.Thread(target=add_get, args=(index * 100,)) for index in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(cache), 800)
+
+    def test_repr(self):
+        self.assertEqual(repr(ShardedCache(10, 60.0, shards=2)), "ShardedCache(10, 60.0, shards=2)")
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
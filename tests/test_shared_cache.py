@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import sys
+import shutil
+import os.path
+import tempfile
+import unittest
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from google_translate import GoogleTranslator
+    from google_translate.records import InfoRecord
+    from google_translate.shared_cache import (
+        start_cache_server,
+        connect_cache
+    )
+except ImportError as error:
+    print error
+    sys.exit(1)
+
+# Set up global test settings
+from tests import *
+
+
+def _add_items(cache, start):
+    for index in range(start, start + 50):
+        cache.add("k%d" % index, index)
+
+
+def _connect_and_add(address, authkey):
+    cache = connect_cache(address, authkey)
+    cache.add("σκύλος", "dog")
+
+
+class TestSharedCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.address = os.path.join(self.temp_dir, "cache.sock")
+        self.manager = start_cache_server(1000, 60.0, address=self.address, authkey=b"secret")
+        self.cache = self.manager.get_cache()
+
+    def tearDown(self):
+        self.manager.shutdown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_init_invalid_args(self):
+        self.assertRaises(TypeError, start_cache_server, 5.5, 60.0)
+        self.assertRaises(ValueError, start_cache_server, 5, 60.0, "mru")
+
+    def test_add_get(self):
+        record = InfoRecord([[["chien", "dog", "", "", 1]], None, "en"])
+
+        self.cache.add("dogfren", record)
+
+        self.assertEqual(self.cache.get("dogfren"), record)
+        self.assertIsNone(self.cache.get("catfren"))
+        self.assertTrue(self.cache.has("dogfren"))
+        self.assertFalse(self.cache.has("catfren"))
+        self.assertEqual(self.cache.remove_old(), 0)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_forked_processes(self):
+        processes = [multiprocessing.Process(target=_add_items, args=(self.cache, index * 50)) for index in range(4)]
+
+        for process in processes:
+            process.start()
+
+        for process in processes:
+            process.join()
+
+        self.assertEqual(len(self.cache), 200)
+        self.assertEqual(self.cache.get("k199"), 199)
+
+    def test_os_fork_after_use(self):
+        # The parent uses its connection before it forks
+        self.cache.add("warm", -1)
+
+        pids = []
+
+        for index in range(4):
+            pid = os.fork()
+
+            if pid == 0:
+                try:
+                    for key in range(index * 50, index * 50 + 50):
+                        self.cache.add(key, key)
+
+                        if self.cache.get(key) != key:
+                            os._exit(1)
+
+                    os._exit(0 if self.cache.get("warm") == -1 else 1)
+                except BaseException:
+                    os._exit(1)
+
+            pids.append(pid)
+
+        self.assertEqual(self.cache.get("warm"), -1)
+
+        for pid in pids:
+            self.assertEqual(os.waitpid(pid, 0)[1], 0)
+
+        self.assertEqual(len(self.cache), 201)
+        self.assertEqual(self.cache.get(199), 199)
+
+    def test_connect(self):
+        process = multiprocessing.Process(target=_connect_and_add, args=(self.address, b"secret"))
+        process.start()
+        process.join()
+
+        self.assertEqual(self.cache.get("σκύλος"), "dog")
+        self.assertEqual(connect_cache(self.address, b"secret").get("σκύλος"), "dog")
+
+    def test_shared_between_translators(self):
+        self.cache.add("dogfren", InfoRecord([[["chien", "dog", "", "", 1]], None, "en"]))
+
+        translator = GoogleTranslator(cache=connect_cache(self.address, b"secret"), offline=True)
+
+        self.assertEqual(translator.translate("dog", "fr", "en"), "chien")
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import sys
+import shutil
+import os.path
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import mock
+    from google_translate.records import InfoRecord
+    from google_translate.snapshot import (
+        Snapshot,
+        write_snapshot,
+        append_journal,
+        read_journal,
+        lock_file
+    )
+except ImportError as error:
+    print error
+    sys.exit(1)
+
+# Set up global test settings
+from tests import *
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, "config", "cache.snap")
+
+        self.items = {
+            "dogfren": [{"translation": "chien", "extra": {}}, 0.5],
+            "σκύλοςenel": [{"translation": "dog", "extra": {"nouns": {"dog": ["σκύλος"]}}}, 1.5],
+            5: ["int key", 2.5],
+            "long": ["a" * 1000, 3.5]
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_write_read(self):
+        write_snapshot(self.filename, self.items.items())
+
+        snapshot = Snapshot(self.filename)
+
+        self.assertEqual(len(snapshot), 4)
+
+        for key, item in self.items.items():
+            self.assertIn(key, snapshot)
+            self.assertEqual(snapshot.get(key), item)
+
+        self.assertNotIn("5", snapshot)
+        self.assertIsNone(snapshot.get("missing"))
+        self.assertEqual(sorted(snapshot.items()), sorted(self.items.items()))
+
+        snapshot.close()
+
+    def test_compression(self):
+        write_snapshot(self.filename, self.items.items())
+
+        self.assertLess(os.path.getsize(self.filename), 1000)
+
+    def test_info_record(self):
+        record = InfoRecord([[["chien", "dog", "", "", 1]], "", "en"])
+        write_snapshot(self.filename, [("dogfren", [record, 0.5])])
+
+        self.assertEqual(Snapshot(self.filename).get("dogfren"), [record.to_dict(), 0.5])
+
+    def test_empty(self):
+        write_snapshot(self.filename, [])
+
+        snapshot = Snapshot(self.filename)
+        self.assertEqual(len(snapshot), 0)
+        self.assertIsNone(snapshot.get("key"))
+        self.assertEqual(snapshot.items(), [])
+
+    def test_many_items(self):
+        write_snapshot(self.filename, (("key%d" % index, [index, float(index)]) for index in range(5000)))
+
+        snapshot = Snapshot(self.filename)
+
+        self.assertEqual(len(snapshot), 5000)
+        self.assertEqual(snapshot.get("key4321"), [4321, 4321.0])
+        self.assertIsNone(snapshot.get("key5000"))
+
+    def test_copy_raw_items(self):
+        write_snapshot(self.filename, self.items.items())
+        snapshot = Snapshot(self.filename)
+
+        copy_filename = os.path.join(self.temp_dir, "copy.snap")
+        write_snapshot(copy_filename, snapshot.raw_items())
+
+        self.assertEqual(sorted(Snapshot(copy_filename).items()), sorted(self.items.items()))
+
+    def test_replace_open_snapshot(self):
+        write_snapshot(self.filename, [("k1", ["v1", 0.5])])
+        snapshot = Snapshot(self.filename)
+
+        write_snapshot(self.filename, [("k2", ["v2", 0.5])])
+
+        # The open snapshot still reads the old file
+        self.assertEqual(snapshot.get("k1"), ["v1", 0.5])
+        self.assertEqual(Snapshot(self.filename).get("k2"), ["v2", 0.5])
+
+    def test_write_failure_removes_temp_file(self):
+        write_snapshot(self.filename, [("k1", ["v1", 0.5])])
+
+        with mock.patch("google_translate.snapshot.os.rename", side_effect=OSError):
+            self.assertRaises(OSError, write_snapshot, self.filename, [("k2", ["v2", 0.5])])
+
+        self.assertEqual(os.listdir(os.path.dirname(self.filename)), ["cache.snap"])
+
+    def test_invalid_file(self):
+        self.assertRaises(IOError, Snapshot, os.path.join(self.temp_dir, "missing"))
+
+        invalid_filename = os.path.join(self.temp_dir, "invalid")
+
+        with open(invalid_filename, "wb") as invalid_file:
+            invalid_file.write(b"[[\"k1\", [\"v1\", 0.5]]]" * 10)
+
+        self.assertRaises(ValueError, Snapshot, invalid_filename)
+
+        open(invalid_filename, "wb").close()
+        self.assertRaises(ValueError, Snapshot, invalid_filename)
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, "config", "cache.snap.journal")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_append_read(self):
+        with lock_file(self.filename) as journal_file:
+            append_journal(journal_file, [("k1", ["v1", 0.5]), ("σκύλος", [{"a": ["b"]}, 1.5])])
+            append_journal(journal_file, [("k1", ["v10", 2.5])])
+
+        with lock_file(self.filename, exclusive=False) as journal_file:
+            journal, size = read_journal(journal_file)
+
+        self.assertEqual(size, os.path.getsize(self.filename))
+
+        self.assertEqual(sorted(journal), ["k1", "σκύλος"])
+        self.assertEqual(journal["k1"].decode(), ["v10", 2.5])
+        self.assertEqual(journal["σκύλος"].decode(), [{"a": ["b"]}, 1.5])
+
+    def test_read_empty(self):
+        with lock_file(self.filename) as journal_file:
+            self.assertEqual(read_journal(journal_file), ({}, 0))
+
+    def test_read_torn_record(self):
+        with lock_file(self.filename) as journal_file:
+            append_journal(journal_file, [("k1", ["v1", 0.5]), ("k2", ["v2", 1.5])])
+
+        size = os.path.getsize(self.filename)
+
+        with open(self.filename, "r+b") as journal_file:
+            journal_file.truncate(size - 3)
+
+        with lock_file(self.filename) as journal_file:
+            journal, valid_size = read_journal(journal_file)
+
+        self.assertEqual(list(journal), ["k1"])
+        self.assertLess(valid_size, size - 3)
+
+    @mock.patch("google_translate.snapshot.fcntl")
+    def test_lock_file(self, mock_fcntl):
+        with lock_file(self.filename, exclusive=False) as journal_file:
+            mock_fcntl.flock.assert_called_once_with(journal_file.fileno(), mock_fcntl.LOCK_SH)
+
+        mock_fcntl.flock.assert_called_with(mock.ANY, mock_fcntl.LOCK_UN)
+
+    @mock.patch("google_translate.snapshot.fcntl", None)
+    def test_lock_file_no_fcntl(self):
+        with lock_file(self.filename) as journal_file:
+            append_journal(journal_file, [("k1", ["v1", 0.5])])
+
+        self.assertTrue(os.path.exists(self.filename))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+from __future__ import unicode_literals
+
+import os
+import sys
+import shutil
+import os.path
+import tempfile
+import unittest
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import mock
+    from google_translate.records import InfoRecord
+    from google_translate.sqlite_cache import SqliteCache
+except ImportError as error:
+    print error
+    sys.exit(1)
+
+# Set up global test settings
+from tests import *
+
+
+def _add_items(filename, start):
+    cache = SqliteCache(filename, 1000, 60.0)
+
+    for index in range(start, start + 50):
+        cache.add("k%d" % index, index)
+
+    cache.close()
+
+
+class TestSqliteCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, "cache", "cache.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def add_items(self, cache, items):
+        with mock.patch("google_translate.sqlite_cache.time.time") as mock_time:
+            for key, (obj, timestamp) in sorted(items.items(), key=lambda item: item[1][1]):
+                mock_time.return_value = timestamp
+                cache.add(key, obj)
+
+    def test_init_invalid_args(self):
+        self.assertRaises(TypeError, SqliteCache, None, 5, 60.0)
+        self.assertRaises(TypeError, SqliteCache, self.filename, 5.5, 60.0)
+        self.assertRaises(TypeError, SqliteCache, self.filename, 5, 60)
+        self.assertRaises(ValueError, SqliteCache, self.filename, 0, 60.0)
+        self.assertRaises(ValueError, SqliteCache, self.filename, 5, 0.0)
+        self.assertRaises(ValueError, SqliteCache, self.filename, 5, 60.0, "mru")
+
+    def test_init_wal_mode(self):
+        cache = SqliteCache(self.filename, 5, 60.0)
+
+        self.assertEqual(cache._execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertTrue(os.path.exists(self.filename))
+
+    def test_add_get(self):
+        cache = SqliteCache(self.filename, 5, 60.0)
+
+        cache.add("k1", {"translation": "σκύλος", "extra": {"nouns": {"a": ["b"]}}})
+        cache.add("k2", "v2")
+
+        self.assertEqual(cache.get("k1"), {"translation": "σκύλος", "extra": {"nouns": {"a": ["b"]}}})
+        self.assertEqual(cache.get("k2"), "v2")
+        self.assertIsNone(cache.get("k3"))
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.has("k1"))
+        self.assertFalse(cache.has("k3"))
+
+    def test_get_frozen(self):
+        cache = SqliteCache(self.filename, 5, 60.0)
+        cache.add("k1", {"extra": {"nouns": {"a": ["b"]}}})
+
+        info_dict = cache.get("k1")
+
+        self.assertRaises(TypeError, info_dict["extra"]["nouns"]["a"].append, "c")
+        self.assertRaises(TypeError, info_dict.update, {})
+
+    def test_add_replace(self):
+        cache = SqliteCache(self.filename, 5, 60.0)
+
+        cache.add("k1", "v1")
+        cache.add("k1", "v10")
+
+        self.assertEqual(cache.get("k1"), "v10")
+        self.assertEqual(len(cache), 1)
+
+    def test_add_info_record(self):
+        cache = SqliteCache(self.filename, 5, 60.0)
+        record = InfoRecord([[["chien", "dog", "", "", 1]], "", "en"])
+
+        cache.add("k1", record)
+        self.assertEqual(cache.get("k1"), record.to_dict())
+
+    def test_persistence(self):
+        cache = SqliteCache(self.filename, 5, 60.0)
+        cache.add("k1", "v1")
+        cache.close()
+
+        cache = SqliteCache(self.filename, 5, 60.0)
+        self.assertEqual(cache.get("k1"), "v1")
+        self.assertEqual(len(cache), 1)
+
+    def test_add_cache_full(self):
+        cache = SqliteCache(self.filename, 3, 60.0)
+        self.add_items(cache, {"k1": ["v1", 1.0], "k2": ["v2", 2.0], "k3": ["v3", 3.0]})
+
+        self.assertFalse(cache.has_space())
+        self.assertEqual(cache.get_oldest(), "k1")
+
+        self.add_items(cache, {"k4": ["v4", 4.0]})
+        self.assertEqual(sorted(key for key, _ in cache.items()), ["k2", "k3", "k4"])
+        self.assertEqual(len(cache), 3)
+
+    def test_add_cache_full_removes_expired_items(self):
+        cache = SqliteCache(self.filename, 3, 60.0, "lru")
+        self.add_items(cache, {"k1": ["v1", 1.0], "k2": ["v2", 2.0], "k3": ["v3", 50.0]})
+
+        self.add_items(cache, {"k4": ["v4", 65.0]})
+        self.assertEqual(sorted(cache.items()), [("k3", ["v3", 50.0]), ("k4", ["v4", 65.0])])
+
+    @mock.patch("google_translate.sqlite_cache.time.time")
+    def test_lru_eviction(self, mock_time):
+        cache = SqliteCache(self.filename, 3, 60.0, "lru")
+        self.add_items(cache, {"k1": ["v1", 1.0], "k2": ["v2", 2.0], "k3": ["v3", 3.0]})
+
+        mock_time.return_value = 4.0
+        cache.get("k1")
+
+        self.assertEqual(cache.get_oldest(), "k2")
+
+    @mock.patch("google_translate.sqlite_cache.time.time")
+    def test_lfu_eviction(self, mock_time):
+        cache = SqliteCache(self.filename, 3, 60.0, "lfu")
+        self.add_items(cache, {"k1": ["v1", 1.0], "k2": ["v2", 2.0], "k3": ["v3", 3.0]})
+
+        mock_time.return_value = 4.0
+        cache.get("k1")
+        cache.get("k2")
+
+        self.assertEqual(cache.get_oldest(), "k3")
+
+    @mock.patch("google_translate.sqlite_cache.time.time")
+    def test_get_buffers_hits(self, mock_time):
+        cache = SqliteCache(self.filename, 3, 60.0, "lfu")
+        self.add_items(cache, {"k1": ["v1", 1.0], "k2": ["v2", 2.0]})
+
+        reader = SqliteCache(self.filename, 3, 60.0, "lfu")
+        query = "SELECT accessed, hits FROM items WHERE key = 'k1'"
+
+        mock_time.return_value = 4.0
+
+        for _ in range(SqliteCache._TOUCH_BATCH - 1):
+            self.assertEqual(cache.get("k1"), "v1")
+
+        self.assertEqual(reader._execute(query).fetchone(), (1.0, 1))
+
+        cache.get("k1")
+        self.assertEqual(reader._execute(query).fetchone(), (4.0, SqliteCache._TOUCH_BATCH + 1))
+
+    @mock.patch("google_translate.sqlite_cache.time.time")
+    def test_buffered_hits_written(self, mock_time):
+        cache = SqliteCache(self.filename, 3, 60.0, "lfu")
+        self.add_items(cache, {"k1": ["v1", 1.0], "k2": ["v2", 2.0]})
+
+        query = "SELECT hits FROM items WHERE key = 'k1'"
+
+        mock_time.return_value = 4.0
+        cache.get("k1")
+
+        # On add
+        self.add_items(cache, {"k3": ["v3", 5.0]})
+        self.assertEqual(cache._execute(query).fetchone(), (2,))
+
+        # On close
+        cache.get("k1")
+        cache.close()
+        self.assertEqual(cache._execute(query).fetchone(), (3,))
+
+        # Before the eviction order is read
+        cache.get("k2")
+        cache.get("k2")
+        cache.get("k2")
+        self.assertEqual(cache.get_oldest(), "k3")
+
+    @mock.patch("google_translate.sqlite_cache.time.time")
+    def test_get_removes_expired_item(self, mock_time):
+        cache = SqliteCache(self.filename, 3, 60.0)
+        self.add_items(cache, {"k1": ["v1", 1.0]})
+
+        mock_time.return_value = 100.0
+
+        self.assertIsNone(cache.get("k1"))
+        self.assertEqual(len(cache), 0)
+
+    @mock.patch("google_translate.sqlite_cache.time.time")
+    def test_remove_old(self, mock_time):
+        cache = SqliteCache(self.filename, 5, 60.0)
+        self.add_items(cache, {"k1": ["v1", 0.1], "k2": ["v2", 0.5], "k3": ["v3", 1.8], "k4": ["v4", 55.5]})
+
+        mock_time.return_value = 62.0
+
+        self.assertEqual(cache.remove_old(), 3)
+        self.assertEqual(cache.items(), [("k4", ["v4", 55.5])])
+        self.assertEqual(len(cache), 1)
+
+    def test_store_load(self):
+        cache = SqliteCache(self.filename, 5, 60.0)
+        self.add_items(cache, {"k1": ["v1", 0.5], "k2": ["v2", 0.9]})
+
+        json_file = os.path.join(self.temp_dir, "cache.json")
+        self.assertTrue(cache.store(json_file))
+
+        new_cache = SqliteCache(os.path.join(self.temp_dir, "new.db"), 5, 60.0)
+        self.assertTrue(new_cache.load(json_file))
+        self.assertEqual(sorted(new_cache.items()), [("k1", ["v1", 0.5]), ("k2", ["v2", 0.9])])
+
+    def test_load_cache_smaller_than_file(self):
+        cache = SqliteCache(self.filename, 2, 60.0)
+        self.add_items(cache, {"k0": ["v0", 2.0]})
+
+        json_file = os.path.join(self.temp_dir, "cache.json")
+
+        with mock.patch("google_translate.sqlite_cache.get_dict") as mock_get_dict:
+            mock_get_dict.return_value = {"k1": ["v1", 0.5], "k2": ["v2", 0.8], "k3": ["v3", 1.5]}
+            self.assertTrue(cache.load(json_file))
+
+        self.assertEqual(sorted(cache.items()), [("k0", ["v0", 2.0]), ("k3", ["v3", 1.5])])
+        self.assertEqual(len(cache), 2)
+
+    def test_load_failure(self):
+        cache = SqliteCache(self.filename, 2, 60.0)
+        self.assertFalse(cache.load(os.path.join(self.temp_dir, "missing.json")))
+
+    def test_rollback(self):
+        cache = SqliteCache(self.filename, 2, 60.0)
+        cache.add("k1", "v1")
+
+        # Not json serializable
+        self.assertRaises(TypeError, cache.add, "k2", object())
+
+        with mock.patch.object(cache, "_size", side_effect=ValueError):
+            self.assertRaises(ValueError, cache.add, "k3", "v3")
+
+        self.assertEqual(cache.items(), [("k1", ["v1", cache.items()[0][1][1]])])
+        self.assertEqual(len(cache), 1)
+
+    def test_multiple_processes(self):
+        SqliteCache(self.filename, 1000, 60.0).close()
+
+        processes = [multiprocessing.Process(target=_add_items, args=(self.filename, index * 50)) for index in range(4)]
+
+        for process in processes:
+            process.start()
+
+        for process in processes:
+            process.join()
+
+        cache = SqliteCache(self.filename, 1000, 60.0)
+        self.assertEqual(len(cache), 200)
+        self.assertEqual(cache.get("k199"), 199)
+
+    def test_repr(self):
+        cache = SqliteCache(self.filename, 2, 60.0)
+        self.assertEqual(repr(cache), "SqliteCache(%r)" % self.filename)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
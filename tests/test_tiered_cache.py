@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+from __future__ import unicode_literals
+
+import sys
+import shutil
+import os.path
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import mock
+    from google_translate.cache import Cache
+    from google_translate.tiered_cache import TieredCache
+    from google_translate.sqlite_cache import SqliteCache
+except ImportError as error:
+    print error
+    sys.exit(1)
+
+# Set up global test settings
+from tests import *
+
+
+class TestTieredCache(unittest.TestCase):
+
+    def setUp(self):
+        self.l1_cache = Cache(2, 60.0, "lru")
+        self.l2_cache = Cache(100, 60.0)
+
+    def test_add_sync(self):
+        cache = TieredCache(self.l1_cache, self.l2_cache, async_writes=False)
+
+        cache.add("k1", "v1")
+
+        self.assertEqual(self.l1_cache.get("k1"), "v1")
+        self.assertEqual(self.l2_cache.get("k1"), "v1")
+
+    def test_add_async(self):
+        cache = TieredCache(self.l1_cache, self.l2_cache)
+
+        for index in range(10):
+            cache.add("k%d" % index, index)
+
+        cache.flush()
+
+        self.assertEqual(len(cache), 10)
+        self.assertEqual(cache._pending, {})
+        self.assertEqual(self.l2_cache.get("k0"), 0)
+
+        cache.close()
+
+    def test_get_promotes_l2_hits(self):
+        cache = TieredCache(self.l1_cache, self.l2_cache)
+        self.l2_cache.add("k1", "v1")
+
+        self.assertEqual(cache.get("k1"), "v1")
+        self.assertTrue(self.l1_cache.has("k1"))
+        self.assertIsNone(cache.get("k2"))
+
+        cache.close()
+
+    def test_promoted_item_shared(self):
+        temp_dir = tempfile.mkdtemp()
+        l2_cache = SqliteCache(os.path.join(temp_dir, "cache.db"), 100, 60.0)
+        cache = TieredCache(self.l1_cache, l2_cache)
+
+        try:
+            l2_cache.add("k1", {"extra": {"nouns": ["n1"]}})
+
+            # The L2 cache decodes frozen items, the L1 hits share them
+            info_dict = cache.get("k1")
+
+            self.assertIs(cache.get("k1"), info_dict)
+            self.assertRaises(TypeError, info_dict["extra"]["nouns"].append, "n2")
+        finally:
+            cache.close()
+            l2_cache.close()
+            shutil.rmtree(temp_dir)
+
+    def test_get_l1_hit(self):
+        l2_cache = mock.Mock()
+        cache = TieredCache(self.l1_cache, l2_cache, async_writes=False)
+
+        cache.add("k1", "v1")
+
+        self.assertEqual(cache.get("k1"), "v1")
+        l2_cache.get.assert_not_called()
+
+    def test_get_pending_item(self):
+        l2_cache = mock.Mock()
+        write_started = threading.Event()
+        release_write = threading.Event()
+
+        def slow_add(key, obj):
+            write_started.set()
+            release_write.wait(5.0)
+
+        l2_cache.add.side_effect = slow_add
+
+        cache = TieredCache(self.l1_cache, l2_cache)
+
+        cache.add("k1", "v1")
+        write_started.wait(5.0)
+
+        # Evicted from L1 while the L2 write is pending
+        cache.add("k2", "v2")
+        cache.add("k3", "v3")
+        self.assertFalse(self.l1_cache.has("k1"))
+
+        self.assertEqual(cache.get("k1"), "v1")
+        self.assertTrue(cache.has("k1"))
+        l2_cache.get.assert_not_called()
+
+        release_write.set()
+        cache.close()
+
+        self.assertEqual(cache._pending, {})
+
+    def test_write_error(self):
+        l2_cache = mock.Mock()
+        l2_cache.add.side_effect = IOError
+
+        cache = TieredCache(self.l1_cache, l2_cache)
+        cache.add("k1", "v1")
+        cache.flush()
+
+        self.assertEqual(cache._pending, {})
+        self.assertTrue(cache._writer.is_alive())
+
+        cache.close()
+
+    def test_has(self):
+        cache = TieredCache(self.l1_cache, self.l2_cache, async_writes=False)
+        self.l2_cache.add("k1", "v1")
+
+        self.assertTrue(cache.has("k1"))
+        self.assertFalse(cache.has("k2"))
+
+    def test_remove_old(self):
+        l1_cache = mock.Mock()
+        l2_cache = mock.Mock()
+        l1_cache.remove_old.return_value = 1
+        l2_cache.remove_old.return_value = 2
+
+        cache = TieredCache(l1_cache, l2_cache, async_writes=False)
+        self.assertEqual(cache.remove_old(), 3)
+
+    def test_close(self):
+        cache = TieredCache(self.l1_cache, self.l2_cache)
+        writer = cache._writer
+
+        cache.add("k1", "v1")
+        cache.close()
+
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(self.l2_cache.get("k1"), "v1")
+
+        # Writes are synchronous after close
+        cache.add("k2", "v2")
+        self.assertEqual(self.l2_cache.get("k2"), "v2")
+
+        cache.close()
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+from __future__ import unicode_literals
+
+import sys
+import random
+import os.path
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import mock
+    from google_translate import tk_generator
+    from google_translate.tk_generator import get_tk, get_tk_batch, TkMemo
+except ImportError as error:
+    print error
+    sys.exit(1)
+
+# Set up global test settings
+from tests import *
+
+
+class TestGetTk(unittest.TestCase):
+
+    # Values produced by the original javascript port
+    KNOWN_VALUES = [
+        ("", "446252.64352"),
+        ("dog", "20278.424826"),
+        ("Hello world", "880793.738517"),
+        ("καλημέρα", "383731.257727"),
+        ("我喜欢学习", "471179.66759"),
+        ("The quick brown fox jumps over the lazy dog. " * 42, "140215.268283")
+    ]
+
+    def test_get_tk_known_values(self):
+        for word, tk in self.KNOWN_VALUES:
+            self.assertEqual(get_tk(word), tk)
+
+    def test_get_tk_encoded_string(self):
+        self.assertEqual(get_tk("καλημέρα".encode("UTF-8")), "383731.257727")
+
+    @unittest.skipIf(sys.maxunicode == 0xffff, "narrow python build")
+    def test_get_tk_non_bmp(self):
+        self.assertEqual(get_tk("pizza \U0001f355"), "294265.149813")
+        self.assertEqual(get_tk("\U0001f355"), "499766.103546")
+
+    def test_rl_compiled(self):
+        compiled = tk_generator._compile_rl("+-a^+6")
+
+        self.assertEqual(compiled, ((True, False, 10), (False, True, 6)))
+        self.assertEqual(tk_generator._RL(123456789, "+-a^+6"), 2001363345)
+        self.assertEqual(tk_generator._RL(123456789, compiled), 2001363345)
+
+    def test_shr32(self):
+        self.assertEqual(tk_generator._shr32(2 ** 40 + 5, 3), 0)
+        self.assertEqual(tk_generator._shr32(0xffffffff, 28), 15)
+        self.assertEqual(tk_generator._shr32(7, 0), 7)
+        self.assertEqual(tk_generator._shr32(7, 32), 0)
+
+
+class TestGetTkBatch(unittest.TestCase):
+
+    def setUp(self):
+        # Enough words of the same length to fill the NumPy buckets
+        self.words = ["word%03d" % index for index in range(40)]
+        self.words += [word for word, _ in TestGetTk.KNOWN_VALUES]
+        self.words += ["καλημέρα".encode("UTF-8"), ""] * 20
+
+    def test_get_tk_batch_empty(self):
+        self.assertEqual(get_tk_batch([]), [])
+
+    @mock.patch("google_translate.tk_generator.numpy", None)
+    def test_get_tk_batch_fallback(self):
+        self.assertEqual(get_tk_batch(self.words), [get_tk(word) for word in self.words])
+
+    @unittest.skipIf(tk_generator.numpy is None, "numpy is not installed")
+    def test_get_tk_batch_numpy(self):
+        self.assertEqual(get_tk_batch(self.words), [get_tk(word) for word in self.words])
+
+    @unittest.skipIf(tk_generator.numpy is None, "numpy is not installed")
+    def test_get_tk_batch_numpy_mixed_words(self):
+        generator = random.Random(0)
+
+        words = ["".join(generator.choice("abc xyzαβγ我喜欢") for _ in range(generator.randint(0, 40))) for _ in range(300)]
+
+        # Non BMP characters, surrogate pairs and lone surrogates
+        words[::30] = ["pizza \U0001f355", "\ud83c\udf55", "\ud83c", "a\udf55b", "\U0001f355" * 3] * 2
+
+        expected_output = [tk_generator._TL(word.encode("UTF-8")) for word in words]
+
+        with mock.patch.object(tk_generator, "_TL", wraps=tk_generator._TL) as mock_tl:
+            self.assertEqual(get_tk_batch(words), expected_output)
+
+        # Only the special words and the longest words use the scalar code
+        self.assertLess(mock_tl.call_count, 10 + tk_generator._MIN_BATCH_SIZE)
+
+    @unittest.skipIf(tk_generator.numpy is None, "numpy is not installed")
+    def test_get_tk_batch_numpy_encoded_words(self):
+        words = ["καλημέρα".encode("UTF-8"), "dog", b"cat"] * 10
+
+        self.assertEqual(get_tk_batch(words), [get_tk(word) for word in words])
+
+    @unittest.skipIf(tk_generator.numpy is None, "numpy is not installed")
+    def test_get_tk_batch_numpy_nul_words(self):
+        words = ["dog", "a\0b", "\0"] * 10
+
+        self.assertEqual(get_tk_batch(words), [get_tk(word) for word in words])
+
+    @unittest.skipIf(tk_generator.numpy is None, "numpy is not installed")
+    def test_format_tk_batch(self):
+        values = tk_generator.numpy.array([0, 7, 1000, 406604, 999999], dtype=tk_generator.numpy.uint32)
+
+        for b in (0, 406604, 2 ** 31):
+            self.assertEqual(tk_generator._format_tk_batch(values, b), ["%d.%d" % (value, value ^ b) for value in values.tolist()])
+
+    @unittest.skipIf(tk_generator.numpy is None, "numpy is not installed")
+    def test_get_tk_batch_numpy_empty_words(self):
+        self.assertEqual(get_tk_batch([""] * 20), ["446252.64352"] * 20)
+
+
+class TestTkMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.memo = TkMemo(2)
+
+    def test_init_invalid_size(self):
+        self.assertRaises(ValueError, TkMemo, 0)
+
+    def test_get_counters(self):
+        self.assertEqual(self.memo.get(b"dog"), "20278.424826")
+        self.assertEqual(self.memo.get(b"dog"), "20278.424826")
+
+        self.assertEqual((self.memo.hits, self.memo.misses), (1, 1))
+
+    @mock.patch("google_translate.tk_generator._TL")
+    def test_get_lru_eviction(self, mock_tl):
+        mock_tl.side_effect = lambda word: word.upper()
+
+        self.memo.get(b"dog")
+        self.memo.get(b"cat")
+        self.memo.get(b"dog")
+        self.memo.get(b"house")  # Evicts 'cat'
+
+        self.assertEqual(len(self.memo), 2)
+        self.memo.get(b"dog")
+        self.memo.get(b"cat")
+
+        self.assertEqual(mock_tl.call_count, 4)
+        self.assertEqual((self.memo.hits, self.memo.misses), (2, 4))
+
+    @mock.patch("google_translate.tk_generator._TKK")
+    def test_get_seed_change(self, mock_tkk):
+        mock_tkk.return_value = [406604, 1836941114]
+        self.memo.get(b"dog")
+
+        mock_tkk.return_value = [406605, 1836941114]
+        self.assertNotEqual(self.memo.get(b"dog"), "20278.424826")
+        self.assertEqual(self.memo.misses, 2)
+
+    def test_clear(self):
+        self.memo.get(b"dog")
+        self.memo.clear()
+
+        self.assertEqual((len(self.memo), self.memo.hits, self.memo.misses), (0, 0, 0))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+# -*- coding: UTF-8 -*-
+
+from __future__ import unicode_literals
+
+import sys
+import os.path
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from urllib2 import HTTPError
+
+try:
+    import mock
+    from google_translate import GoogleTranslator, UserAgentSelector
+    from google_translate.utils import TokenBucket, RetryPolicy, ConnectionPool, parse_reply
+    from google_translate.transport import Transport, Urllib2Transport, LocalTransport
+    from google_translate.fake_server import FakeGoogleServer, dump_sparse_json
+except ImportError as error:
+    print error
+    sys.exit(1)
+
+# Set up global test settings
+from tests import *
+
+
+class TestTransports(unittest.TestCase):
+
+    def test_transport_not_implemented(self):
+        self.assertRaises(NotImplementedError, Transport().request, "url")
+
+    @mock.patch("google_translate.transport.make_request")
+    def test_urllib2_transport(self, mock_make_request):
+        transport = Urllib2Transport("pool")
+
+        self.assertEqual(transport.request("url", "headers", "proxy", 5.0), mock_make_request.return_value)
+        mock_make_request.assert_called_once_with("url", "headers", "proxy", 5.0, pool="pool")
+
+    @mock.patch("google_translate.transport.make_request")
+    def test_local_transport(self, mock_make_request):
+        transport = LocalTransport("http://127.0.0.1:8080")
+
+        transport.request("https://translate.google.ru/translate_a/single?q=dog", "headers")
+        mock_make_request.assert_called_once_with("http://127.0.0.1:8080/translate_a/single?q=dog", "headers", None, 10.0, pool=None)
+
+
+class TestFakeGoogleServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeGoogleServer()
+        self.server.start()
+
+        self.retry_policy = RetryPolicy(retries=3, backoff=0.0, max_backoff=0.0)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def get_translator(self, **kwargs):
+        return GoogleTranslator(transport=self.server.get_transport(),
+                                rate_limiter=TokenBucket(1000.0, 1000),
+                                retry_policy=self.retry_policy,
+                                **kwargs)
+
+    def test_build_reply(self):
+        reply = self.server.build_reply("dog\ncat", "fr", "auto")
+
+        self.assertEqual(reply[0][:2], [["fr:dog\n", "dog\n", None, None, 3], ["fr:cat", "cat", None, None, 3]])
+        self.assertEqual(reply[2], "en")
+
+    def test_reply_is_sparse(self):
+        body = self.server.get_transport().request(self.server.url + "/translate_a/single?q=dog&tl=fr").read()
+
+        self.assertTrue(body.startswith(b'[[["fr:dog","dog",,,3],[,,"fr:dog"]],[["noun",'))
+        self.assertNotIn(b"null", body)
+        self.assertEqual(self.get_translator()._string_to_json(body.decode("utf-8"))[0][0], ["fr:dog", "dog", "", "", 3])
+
+    def test_dump_sparse_json(self):
+        self.assertEqual(dump_sparse_json([["a", "b", None, None, 3], None, "\xe9", None]), '[["a","b",,,3],,"\xe9"]')
+        self.assertEqual(dump_sparse_json([None, [None], True, 0.5]), '[,[],true,0.5]')
+
+    def test_stop_closes_connections(self):
+        pool = ConnectionPool()
+
+        # Return the connection to the pool, else it is closed when the reply is collected
+        reply = pool.request(self.server.url + "/translate_a/single?q=dog&tl=fr")
+        reply.read()
+        reply.close()
+
+        connections = self.server._server._connections.items()
+        self.assertEqual(len(connections), 1)
+
+        self.server.stop()
+
+        self.assertEqual(self.server._server._connections, {})
+        self.assertFalse(connections[0][1].is_alive())
+
+    def test_translate(self):
+        translator = self.get_translator()
+
+        self.assertEqual(translator.translate("dog", "fr"), "fr:dog")
+        self.assertEqual(translator.translate("dog", "fr", additional=True), {"nouns": {"fr:dog": ["dog"]}})
+        self.assertEqual(translator.detect("dog"), "english")
+        self.assertEqual(self.server.stats["requests"], 2)
+
+    def test_translate_batch(self):
+        translator = self.get_translator(batch_mode=True)
+        words = ["dog", "cat", "house"]
+
+        self.assertEqual(translator.translate(words, "fr", "en"), ["fr:dog", "fr:cat", "fr:house"])
+        self.assertEqual(self.server.stats["requests"], 1)
+
+    def test_translate_batch_additional(self):
+        translator = self.get_translator(batch_mode=True)
+
+        self.assertEqual(translator.translate(["dog", "cat"], "fr", "en"), ["fr:dog", "fr:cat"])
+        self.assertEqual(translator.translate("dog", "fr", "en"), "fr:dog")
+        self.assertEqual(self.server.stats["requests"], 1)
+
+        # The batch replies have no additional translations
+        self.assertEqual(translator.translate("dog", "fr", "en", additional=True), {"nouns": {"fr:dog": ["dog"]}})
+        self.assertEqual(translator.get_info_dict("cat", "fr", "en", output="dict")["cat"]["extra"], {"nouns": {"fr:cat": ["cat"]}})
+        self.assertEqual(self.server.stats["requests"], 3)
+
+        # The full info dictionaries serve the batches too
+        self.assertEqual(translator.translate(["dog", "cat"], "fr", "en"), ["fr:dog", "fr:cat"])
+        self.assertEqual(self.server.stats["requests"], 3)
+
+    def test_translate_batch_auto(self):
+        translator = self.get_translator(batch_mode=True)
+
+        # The detected language of a batch does not belong to each word
+        self.assertEqual(translator.translate(["bonjour", "hola"], "en"), ["en:bonjour", "en:hola"])
+        self.assertEqual(self.server.stats["requests"], 2)
+
+        self.assertEqual(translator.translate(["dog", "cat"], "fr", "en"), ["fr:dog", "fr:cat"])
+        self.assertEqual(self.server.stats["requests"], 3)
+
+        # The batch items are not cached under the keys that detect reads
+        self.assertEqual(translator.detect("dog"), "english")
+        self.assertEqual(self.server.stats["requests"], 4)
+
+    def test_rate_limit_burst(self):
+        self.server.burst_every = 1
+        self.server.burst_length = 1
+        self.server.retry_after = 0
+
+        translator = self.get_translator()
+
+        self.assertEqual(translator.translate(["dog", "cat"], "fr"), ["fr:dog", "fr:cat"])
+        self.assertEqual(self.server.stats["status"], {200: 2, 429: 1})
+
+    def test_error_rate(self):
+        self.server.error_rate = 1.0
+
+        translator = self.get_translator()
+
+        self.assertIsNone(translator.translate("dog", "fr"))
+        self.assertEqual(self.server.stats["status"], {500: 3})
+
+    def test_not_found(self):
+        transport = self.server.get_transport()
+
+        self.assertRaises(HTTPError, transport.request, "http://example.com/missing")
+
+    def test_useragents(self):
+        selector = UserAgentSelector(http_mode=True, transport=self.server.get_transport())
+
+        self.assertIn(selector.get_useragent(), self.server.useragents)
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == '__main__':
+    main()
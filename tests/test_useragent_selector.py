@@ -30,9 +30,11 @@ class TestPrivateMethods(unittest.TestCase):
         self.ua_list = ["ua-1", "ua-2", "ua-3", "ua-3"]
         self.headers = [("User-Agent", UserAgentSelector.DEFAULT_UA)]
 
-    @mock.patch("google_translate.selectors.make_request")
     @mock.patch("google_translate.selectors.parse_reply", return_value="<textarea var1='1', var2='2'>ua-1\nua-2\nua-3</textarea>")
-    def test_get_from_http(self, mock_parse_reply, mock_make_request):
+    def test_get_from_http(self, mock_parse_reply):
+        self.selector._transport = mock.MagicMock()
+        mock_make_request = self.selector._transport.request
+
         self.assertEqual(self.selector._get_from_http(), self.ua_list[:3])
 
         mock_make_request.assert_called_once_with(UserAgentSelector.HTTP_URL, self.headers)
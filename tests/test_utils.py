@@ -8,6 +8,9 @@ import sys
 import time
 import logging.config
 import unittest
+import threading
+
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -361,6 +364,270 @@ class TestFunctions(unittest.TestCase):
     def test_get_dict_invalid_filename(self):
         self.assertRaises(AssertionError, google_translate.utils.get_dict, 1234)
 
+    def test_parse_sparse_json(self):
+        parse_sparse_json = google_translate.utils.parse_sparse_json
+
+        self.assertEqual(parse_sparse_json('[[["a","b",,,1],[,,"c","d"]],"e",,,1,,[0]]'),
+                         [[["a", "b", "", "", 1], ["", "", "c", "d"]], "e", "", "", 1, "", [0]])
+        self.assertEqual(parse_sparse_json(' [ "a,,b", "[,", -1.5e3, 0.5, true, false, null ] '),
+                         ["a,,b", "[,", -1500.0, 0.5, True, False, None])
+        self.assertEqual(parse_sparse_json('[[],[,],[1,,]]'), [[], [""], [1, ""]])
+        self.assertEqual(parse_sparse_json('"\\u03c4\\n"'), "τ\n")
+
+    def test_parse_sparse_json_invalid(self):
+        for data in ["", "[", "]", "[1 2]", "[1],[2]", "[1]x", '{"a": 1}', "[,,1"]:
+            self.assertRaises(ValueError, google_translate.utils.parse_sparse_json, data)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_init_invalid_params(self):
+        self.assertRaises(ValueError, google_translate.utils.TokenBucket, 0)
+        self.assertRaises(ValueError, google_translate.utils.TokenBucket, 1.0, 0)
+
+    @mock.patch("google_translate.utils.time.sleep")
+    @mock.patch("google_translate.utils.time.time")
+    def test_consume(self, mock_time, mock_sleep):
+        mock_time.return_value = 100.0
+        bucket = google_translate.utils.TokenBucket(2.0, 3)
+
+        # Burst
+        for _ in range(3):
+            self.assertEqual(bucket.consume(), 0.0)
+
+        mock_sleep.assert_not_called()
+
+        # Empty bucket, each new token takes 0.5 seconds
+        self.assertEqual(bucket.consume(), 0.5)
+        self.assertEqual(bucket.consume(), 1.0)
+        mock_sleep.assert_has_calls([mock.call(0.5), mock.call(1.0)])
+
+        mock_sleep.reset_mock()
+
+        # Refill after some time
+        mock_time.return_value = 110.0
+        self.assertEqual(bucket.consume(), 0.0)
+        mock_sleep.assert_not_called()
+
+    @mock.patch("google_translate.utils.time.time")
+    def test_try_consume(self, mock_time):
+        mock_time.return_value = 100.0
+        bucket = google_translate.utils.TokenBucket(1.0)
+
+        self.assertTrue(bucket.try_consume())
+        self.assertFalse(bucket.try_consume())
+
+        mock_time.return_value = 101.0
+        self.assertTrue(bucket.try_consume())
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_do(self):
+        single_flight = google_translate.utils.SingleFlight()
+
+        self.assertEqual(single_flight.do("key", lambda x, y: x + y, 1, 2), 3)
+        self.assertEqual(len(single_flight), 0)
+
+    def test_do_concurrent_calls(self):
+        single_flight = google_translate.utils.SingleFlight()
+
+        started = threading.Event()
+        release = threading.Event()
+        function = mock.MagicMock(return_value="result")
+
+        def slow_function():
+            started.set()
+            release.wait(5.0)
+            return function()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(single_flight.do("key", slow_function))) for _ in range(5)]
+
+        threads[0].start()
+        started.wait(5.0)
+
+        for thread in threads[1:]:
+            thread.start()
+
+        time.sleep(0.1)
+        release.set()
+
+        for thread in threads:
+            thread.join(5.0)
+
+        self.assertEqual(results, ["result"] * 5)
+        function.assert_called_once()
+
+    def test_do_error(self):
+        single_flight = google_translate.utils.SingleFlight()
+
+        def function():
+            raise IOError("error")
+
+        self.assertRaises(IOError, single_flight.do, "key", function)
+        self.assertEqual(len(single_flight), 0)
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = google_translate.utils.RetryPolicy(retries=5, backoff=1.0, max_backoff=10.0, jitter=0.0)
+
+    def test_init_invalid_params(self):
+        self.assertRaises(ValueError, google_translate.utils.RetryPolicy, 0)
+        self.assertRaises(ValueError, google_translate.utils.RetryPolicy, 5, 10.0, 5.0)
+        self.assertRaises(ValueError, google_translate.utils.RetryPolicy, 5, 1.0, 5.0, 1.5)
+
+    def test_get_delay_connection_error(self):
+        error = URLError("invalid url")
+
+        self.assertEqual([self.policy.get_delay(attempt, error) for attempt in range(1, 6)], [1.0, 2.0, 4.0, 8.0, None])
+
+        policy = google_translate.utils.RetryPolicy(retries=20, max_backoff=10.0)
+        self.assertEqual(policy.get_delay(10, error) <= 10.0, True)
+        self.assertEqual(policy.get_delay(10, error) >= 5.0, True)
+
+    def test_get_delay_client_error(self):
+        error = HTTPError("url", 400, "Bad Request", None, None)
+
+        self.assertIsNone(self.policy.get_delay(1, error))
+        self.assertTrue(self.policy.is_client_error(error))
+        self.assertFalse(self.policy.is_connection_error(error))
+
+    def test_get_delay_rate_limit(self):
+        error = HTTPError("url", 503, "Service Unavailable", {}, None)
+        self.assertEqual(self.policy.get_delay(2, error), 2.0)
+
+        error = HTTPError("url", 429, "Too Many Requests", {"Retry-After": "3"}, None)
+        self.assertEqual(self.policy.get_delay(1, error), 3.0)
+
+        error = HTTPError("url", 429, "Too Many Requests", {"Retry-After": "3600"}, None)
+        self.assertEqual(self.policy.get_delay(1, error), 10.0)
+
+        error = HTTPError("url", 429, "Too Many Requests", {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, None)
+        self.assertEqual(self.policy.get_delay(1, error), 0.0)
+
+    def test_create_budget(self):
+        budget = google_translate.utils.RetryPolicy(budget_ratio=0.1, budget_min=2).create_budget(50)
+        self.assertEqual(budget.retries, 7)
+
+        for _ in range(7):
+            self.assertTrue(budget.withdraw())
+
+        self.assertFalse(budget.withdraw())
+
+        self.assertIsNone(google_translate.utils.RetryPolicy(budget_ratio=None).create_budget(50))
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    # Paths that redirect, e.g. the rate limit redirect to the 'sorry' page
+    REDIRECTS = {"/redirect": "/word", "/rate-limited": "/sorry", "/loop": "/loop"}
+
+    def do_GET(self):
+        self.server.connections.add(self.client_address)
+
+        status = {"/missing": 404, "/sorry": 429}.get(self.path, 200)
+        body = self.path.encode("utf-8")
+
+        if self.path in self.REDIRECTS:
+            status = 302
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+
+        if status == 302:
+            self.send_header("Location", self.REDIRECTS[self.path])
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class QuietHTTPServer(HTTPServer):
+
+    def handle_error(self, request, client_address):
+        # Clients close their keep-alive connections at the end of each test
+        pass
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = QuietHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        self.server.connections = set()
+
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.url = "http://127.0.0.1:%s" % self.server.server_port
+        self.pool = google_translate.utils.ConnectionPool(max_size=2, idle_timeout=60.0)
+
+    def tearDown(self):
+        self.pool.clear()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_init_invalid_params(self):
+        self.assertRaises(ValueError, google_translate.utils.ConnectionPool, 0)
+        self.assertRaises(ValueError, google_translate.utils.ConnectionPool, 5, 0.0)
+
+    def test_reuse_connection(self):
+        for index in range(5):
+            reply = google_translate.utils.make_request(self.url + "/word%s?q=1" % index, pool=self.pool)
+            self.assertEqual(google_translate.utils.parse_reply(reply), "/word%s?q=1" % index)
+
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(len(self.pool), 1)
+
+    def test_idle_timeout(self):
+        self.pool.idle_timeout = 0.01
+
+        google_translate.utils.parse_reply(google_translate.utils.make_request(self.url + "/a", pool=self.pool))
+        time.sleep(0.05)
+        google_translate.utils.parse_reply(google_translate.utils.make_request(self.url + "/b", pool=self.pool))
+
+        self.assertEqual(len(self.server.connections), 2)
+
+    def test_unread_reply_not_reused(self):
+        google_translate.utils.make_request(self.url + "/a", pool=self.pool).close()
+        self.assertEqual(len(self.pool), 0)
+
+    def test_http_error(self):
+        self.assertRaises(HTTPError, google_translate.utils.make_request, self.url + "/missing", pool=self.pool)
+        self.assertEqual(len(self.pool), 1)
+
+    def test_redirect(self):
+        reply = google_translate.utils.make_request(self.url + "/redirect", pool=self.pool)
+
+        self.assertEqual(google_translate.utils.parse_reply(reply), "/word")
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_redirect_to_error(self):
+        with self.assertRaises(HTTPError) as context:
+            google_translate.utils.make_request(self.url + "/rate-limited", pool=self.pool)
+
+        self.assertEqual(context.exception.code, 429)
+        self.assertEqual(len(self.pool), 1)
+
+    def test_redirect_loop(self):
+        with self.assertRaises(HTTPError) as context:
+            google_translate.utils.make_request(self.url + "/loop", pool=self.pool)
+
+        self.assertEqual(context.exception.code, 302)
+
+    def test_url_error(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+        self.assertRaises(URLError, google_translate.utils.make_request, self.url + "/a", timeout=1.0, pool=self.pool)
+
 
 def main():
     unittest.main()